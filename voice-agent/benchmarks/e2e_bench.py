@@ -0,0 +1,317 @@
+"""
+Offline end-to-end benchmark for the /playwright/ws pipeline.
+
+Starts a local replica of the login/dashboard site and a fake
+OpenAI-compatible server in this process, runs the API server as a
+subprocess pointed at both (headless, no network), then drives
+/playwright/ws with scripted WebSocket clients. Reports p50/p95/p99
+instruction latency, throughput and memory per browser session.
+
+Simple commands ("click Get Started", "scroll down") can be answered by the
+fast-path router or the code cache without an LLM call, so latency is also
+reported per path (llm, cache, fast path). Pass --no-fast-path to send
+every instruction to the LLM.
+
+Run from the voice-agent directory:
+    poetry run python -m benchmarks.e2e_bench --clients 4 --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+import websockets
+from .fake_llm import FakeLLM
+from .stub_site import StubSite
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCRIPT = [
+    "log in with the test account",
+    "click Get Started",
+    "scroll down",
+    "log out and start over",
+]
+
+READY_MARKERS = ("Async browser opened and ready!", "Failed to open browser")
+DONE_MARKERS = ("Code executed successfully!", "Execution failed!")
+STATUS_MARKERS = ("Current state:", "State error:")
+# Logged before the outcome when an instruction skipped the LLM
+PATH_MARKERS = (
+    ("Matched a simple command on the page", "fast path"),
+    ("Reused cached code for this page", "cache"),
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def process_tree_rss(pid: int):
+    """Resident memory (bytes) of a process and all its descendants; None where /proc is unavailable."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    children: dict[int, list] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, ...
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            for line in (proc / str(current) / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+                    break
+        except OSError:
+            continue
+    return total
+
+
+class MemorySampler:
+    """Samples the server's process-tree RSS in the background and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.baseline = process_tree_rss(pid)
+        self.peak = self.baseline
+        self._task = None
+
+    async def _run(self):
+        while True:
+            rss = await asyncio.to_thread(process_tree_rss, self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def start_server(port: int, env: dict, workdir: str) -> subprocess.Popen:
+    server_env = {**os.environ, **env}
+    server_env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), os.environ.get("PYTHONPATH")]))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "voice_agent.server:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=server_env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start within {timeout}s")
+
+
+async def receive_until(ws, markers: tuple, timeout: float, seen: list = None) -> str:
+    """Read messages until one starts with a marker and return it; text messages are appended to `seen`."""
+    async with asyncio.timeout(timeout):
+        while True:
+            message = await ws.recv()
+            if not isinstance(message, str):
+                continue
+            if seen is not None:
+                seen.append(message)
+            if message.startswith(markers):
+                return message
+
+
+def instruction_path(messages: list) -> str:
+    """Which path answered an instruction: "fast path", "cache" or "llm"."""
+    for marker, path in PATH_MARKERS:
+        if any(message.startswith(marker) for message in messages):
+            return path
+    return "llm"
+
+
+async def run_client(client_id: int, ws_url: str, rounds: int, timeout: float, results: list):
+    async with websockets.connect(ws_url, max_size=None, open_timeout=timeout) as ws:
+        started = time.perf_counter()
+        ready = await receive_until(ws, READY_MARKERS, timeout)
+        results.append({"client": client_id, "kind": "open", "seconds": time.perf_counter() - started,
+                        "ok": ready.startswith(READY_MARKERS[0])})
+        if not results[-1]["ok"]:
+            return
+
+        for round_number in range(rounds):
+            for instruction in SCRIPT:
+                started = time.perf_counter()
+                await ws.send(instruction)
+                seen = []
+                try:
+                    outcome = await receive_until(ws, DONE_MARKERS, timeout, seen)
+                    ok = outcome.startswith(DONE_MARKERS[0])
+                except TimeoutError:
+                    ok = False
+                results.append({"client": client_id, "kind": "instruction", "instruction": instruction,
+                                "round": round_number, "seconds": time.perf_counter() - started, "ok": ok,
+                                "path": instruction_path(seen)})
+
+                # Drain the rest of this instruction's messages before timing the next one
+                await ws.send("status")
+                await receive_until(ws, STATUS_MARKERS, timeout)
+        await ws.send("quit")
+
+
+def report(results: list, wall_seconds: float, clients: int, sampler: MemorySampler, llm: FakeLLM) -> dict:
+    opens = [r["seconds"] for r in results if r["kind"] == "open"]
+    instructions = [r for r in results if r["kind"] == "instruction"]
+    latencies = [r["seconds"] for r in instructions]
+    failures = sum(not r["ok"] for r in instructions)
+
+    summary = {
+        "clients": clients,
+        "instructions": len(instructions),
+        "failures": failures,
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_per_second": round(len(instructions) / wall_seconds, 2) if wall_seconds else 0.0,
+        "session_open_p50_ms": round(percentile(opens, 50) * 1000, 1),
+        "latency_ms": {f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)},
+        "per_instruction_p50_ms": {
+            instruction: round(percentile([r["seconds"] for r in instructions if r["instruction"] == instruction], 50) * 1000, 1)
+            for instruction in SCRIPT
+        },
+        "latency_ms_by_path": {
+            path: {
+                "count": len(times),
+                **{f"p{p}": round(percentile(times, p) * 1000, 1) for p in (50, 95, 99)},
+            }
+            for path in ("llm", "cache", "fast path")
+            if (times := [r["seconds"] for r in instructions if r["path"] == path])
+        },
+        "llm_requests": llm.requests,
+        "llm_prompt_chars_avg": llm.prompt_chars // llm.requests if llm.requests else 0,
+    }
+    if sampler.baseline is not None:
+        summary["memory_baseline_mb"] = round(sampler.baseline / 2**20, 1)
+        summary["memory_peak_mb"] = round(sampler.peak / 2**20, 1)
+        summary["memory_per_session_mb"] = round((sampler.peak - sampler.baseline) / 2**20 / clients, 1)
+
+    print(f"\nClients: {clients}, instructions: {len(instructions)} ({failures} failed) in {summary['wall_seconds']}s")
+    print(f"Throughput: {summary['throughput_per_second']} instructions/s")
+    print(f"Session open p50: {summary['session_open_p50_ms']} ms")
+    print("Instruction latency: " + ", ".join(f"{k}={v} ms" for k, v in summary["latency_ms"].items()))
+    for instruction, ms in summary["per_instruction_p50_ms"].items():
+        paths = sorted({r["path"] for r in instructions if r["instruction"] == instruction})
+        print(f"  {instruction!r:36} p50={ms} ms ({', '.join(paths)})")
+    print("Latency by path:")
+    for path, stats in summary["latency_ms_by_path"].items():
+        print(f"  {path:36} n={stats['count']}, " + ", ".join(f"{k}={v} ms" for k, v in stats.items() if k != "count"))
+    print(f"LLM requests: {llm.requests} (avg prompt {summary['llm_prompt_chars_avg']} chars)")
+    if sampler.baseline is not None:
+        print(f"Memory: baseline {summary['memory_baseline_mb']} MB, peak {summary['memory_peak_mb']} MB, "
+              f"{summary['memory_per_session_mb']} MB per session")
+    else:
+        print("Memory: unavailable on this platform")
+    return summary
+
+
+async def main(args):
+    with StubSite() as site, FakeLLM(site.url, args.ttft, args.token_latency) as llm, \
+            tempfile.TemporaryDirectory(prefix="voice-agent-bench-") as workdir:
+        port = free_port()
+        env = {
+            "START_URL": site.url,
+            "ALLOWED_DOMAIN": "127.0.0.1",
+            "OPENAI_BASE_URL": llm.base_url,
+            "OPENAI_API_KEY": "benchmark",
+            "BROWSER_HEADLESS": "true",
+            "BROWSER_SLOW_MO": "0",
+            "MAX_BROWSER_SESSIONS": str(max(args.clients, 1)),
+        }
+        if args.no_cache:
+            env["CODE_CACHE_MAX_ENTRIES"] = "0"
+        if args.no_fast_path:
+            env["FAST_PATH_ENABLED"] = "false"
+
+        server = start_server(port, env, workdir)
+        try:
+            await asyncio.to_thread(wait_until_up, f"http://127.0.0.1:{port}/", server)
+            sampler = MemorySampler(server.pid)
+            sampler.start()
+
+            results = []
+            # FIFO scheduling: the scripted clients never mean to interrupt themselves
+            ws_url = f"ws://127.0.0.1:{port}/playwright/ws?policy=queue"
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(
+                *(run_client(i, ws_url, args.rounds, args.timeout, results) for i in range(args.clients)),
+                return_exceptions=True,
+            )
+            wall_seconds = time.perf_counter() - started
+            await sampler.stop()
+
+            for i, outcome in enumerate(outcomes):
+                if isinstance(outcome, Exception):
+                    print(f"Client {i} failed: {outcome!r}")
+
+            summary = report(results, wall_seconds, args.clients, sampler, llm)
+            if args.json:
+                Path(args.json).write_text(json.dumps({"args": vars(args), "summary": summary, "results": results}, indent=2))
+                print(f"Results written to {args.json}")
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4, help="concurrent WebSocket clients")
+    parser.add_argument("--rounds", type=int, default=3, help="times each client runs the script")
+    parser.add_argument("--ttft", type=float, default=0.5, help="fake LLM time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="fake LLM delay per streamed chunk (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-step timeout (s)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the generated-code cache")
+    parser.add_argument("--no-fast-path", action="store_true", help="send simple commands to the LLM too")
+    parser.add_argument("--json", help="write raw results and the summary to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Element context extraction benchmark.
+
+Compares the old per-element lookup (one locator query plus four evaluate
+calls per match) against the batched single-evaluate extractor on a page
+with many matching elements.
+
+Run from the voice-agent directory:
+    poetry run python -m benchmarks.element_context_bench
+"""
+import argparse
+import asyncio
+import time
+from playwright.async_api import async_playwright
+from voice_agent.playwright.element_context import extract_element_context
+
+TERMS = ["Get Started", "Report", "Dairy", "Login"]
+
+
+def build_page(rows: int) -> str:
+    cards = []
+    for i in range(rows):
+        cards.append(f"""
+        <div class="card" data-row="{i}">
+            <h3>Dairy Report {i}</h3>
+            <a class="btn" href="/report/{i}">Get Started</a>
+            <button aria-label="login-{i}">Login</button>
+        </div>""")
+    return f"<html><body><main>{''.join(cards)}</main></body></html>"
+
+
+async def legacy_element_context(page, search_terms: list) -> tuple[list, int]:
+    """Previous implementation (same selector and error handling), instrumented to count CDP round trips."""
+    round_trips = 0
+    contexts = []
+    for term in search_terms:
+        try:
+            round_trips += 1
+            elements = await page.locator(f'text*="{term}"').all()
+            for i, element in enumerate(elements[:3]):
+                try:
+                    round_trips += 4
+                    outer_html = await element.evaluate('el => el.outerHTML')
+                    parent_html = await element.evaluate('el => el.parentElement?.outerHTML')
+                    tag_name = await element.evaluate('el => el.tagName')
+                    attributes = await element.evaluate('''el => {
+                        const attrs = {};
+                        for (let attr of el.attributes) attrs[attr.name] = attr.value;
+                        return attrs;
+                    }''')
+                    contexts.append({
+                        "search_term": term,
+                        "element_index": i,
+                        "tag_name": tag_name,
+                        "attributes": attributes,
+                        "outer_html": outer_html[:1000],
+                        "parent_html": parent_html[:1000] if parent_html else None,
+                    })
+                except Exception as e:
+                    print(f"legacy: error getting context for element {i}: {e}")
+        except Exception as e:
+            print(f"legacy: error finding elements for term '{term}': {e}")
+    return contexts, round_trips
+
+
+async def time_it(fn, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = await fn()
+    return result, (time.perf_counter() - started) / iterations * 1000
+
+
+async def main(rows: int, iterations: int):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(build_page(rows))
+
+        (legacy, legacy_trips), legacy_ms = await time_it(lambda: legacy_element_context(page, TERMS), iterations)
+        batched, batched_ms = await time_it(lambda: extract_element_context(page, TERMS), iterations)
+
+        print(f"Page: {rows} cards, terms: {TERMS}")
+        print(f"{'':10} {'matches':>8} {'round trips':>12} {'ms/call':>10}")
+        print(f"{'legacy':10} {len(legacy):>8} {legacy_trips:>12} {legacy_ms:>10.1f}")
+        print(f"{'batched':10} {len(batched):>8} {1:>12} {batched_ms:>10.1f}")
+        print(f"Speed-up: {legacy_ms / batched_ms:.1f}x")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.iterations))
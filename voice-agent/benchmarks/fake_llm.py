@@ -0,0 +1,163 @@
+"""
+Minimal OpenAI-compatible chat completions endpoint returning canned code.
+
+Supports `POST /v1/chat/completions` with and without `stream`. The reply is
+picked by keyword from the instruction in the last user message, and is
+delayed by `first_token_latency` plus `token_latency` per streamed chunk so
+benchmarks can model a real model's time-to-first-token and decode speed.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def canned_responses(site_url: str) -> list:
+    """(keywords, code) pairs checked in order against the lowercased instruction."""
+    return [
+        (("log in", "login"), """# Log in with the benchmark account
+email_field = _async_page.get_by_role("textbox", name="Email")
+print(f"Found {await email_field.count()} email fields")
+await email_field.fill("bench@example.com")
+await _async_page.get_by_role("textbox", name="Enter your password").fill("bench-password")
+await _async_page.get_by_role("button", name="Login").click()
+await _async_page.wait_for_url("**/dashboard")
+await settled()
+print("  Logged in")"""),
+        (("get started",), """# Open the first product
+link = _async_page.get_by_role("link", name="Get Started").first
+await link.click()
+await _async_page.wait_for_url("**/dairy-profit-intelligence*")
+await settled()
+print("  Opened product page")"""),
+        (("scroll",), """# Scroll the page
+await _async_page.mouse.wheel(0, 800)
+await settled()
+print("  Scrolled down")"""),
+        (("logout", "log out", "start over"), f"""# Return to the login page
+await _async_page.goto("{site_url}")
+await settled()
+print("  Back at login")"""),
+    ]
+
+
+_CHUNK_RE = re.compile(r"\S+\s*|\s+")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeLLMServer"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        code = self.server.owner.reply_for(request.get("messages", []))
+        model = request.get("model", "fake")
+
+        time.sleep(self.server.owner.first_token_latency)
+        if request.get("stream"):
+            self._stream(code, model)
+        else:
+            self._complete(code, model)
+
+    def _complete(self, code: str, model: str):
+        body = json.dumps({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": code}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, code: str, model: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta: dict, finish_reason=None):
+            payload = json.dumps({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            })
+            self._write_chunk(f"data: {payload}\n\n")
+
+        event({"role": "assistant", "content": ""})
+        for i, piece in enumerate(_CHUNK_RE.findall(code)):
+            if i:
+                time.sleep(self.server.owner.token_latency)
+            event({"content": piece})
+        event({}, finish_reason="stop")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class FakeLLM:
+    """Serves canned completions on 127.0.0.1; counts requests and prompt sizes."""
+
+    def __init__(self, site_url: str, first_token_latency: float = 0.5, token_latency: float = 0.01, port: int = 0):
+        self.responses = canned_responses(site_url)
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.requests = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+        self.server = FakeLLMServer(("127.0.0.1", port), _Handler)
+        self.server.owner = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def reply_for(self, messages: list) -> str:
+        prompt_chars = sum(len(json.dumps(m.get("content", ""))) for m in messages)
+        with self._lock:
+            self.requests += 1
+            self.prompt_chars += prompt_chars
+
+        instruction = ""
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                content = message.get("content", "")
+                if isinstance(content, list):
+                    content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+                instruction = content.lower()
+                break
+
+        for keywords, code in self.responses:
+            if any(keyword in instruction for keyword in keywords):
+                return code
+        return 'print("No canned code for this instruction")'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,105 @@
+"""
+Static replica of the farmce login -> dashboard flow, served from a thread.
+
+Only the structure the automation relies on is reproduced: the Email and
+password textboxes, the Login button, and a dashboard with "Get Started"
+links that lead to /dairy-profit-intelligence.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOGIN_PAGE = """<!doctype html>
+<html><head><title>Farmce - Login</title></head>
+<body>
+  <main>
+    <h1>Welcome back</h1>
+    <form id="login" onsubmit="event.preventDefault(); setTimeout(() => location.href = '/dashboard', 50);">
+      <label for="email">Email</label>
+      <input id="email" type="email" aria-label="Email" placeholder="Email">
+      <label for="password">Password</label>
+      <input id="password" type="password" aria-label="Enter your password" placeholder="Enter your password">
+      <button type="submit">Login</button>
+    </form>
+  </main>
+</body></html>
+"""
+
+DASHBOARD_CARDS = "".join(
+    f"""
+    <section class="card" data-testid="product-{i}">
+      <h2>{name}</h2>
+      <p>Insights for {name.lower()}.</p>
+      <a class="btn" href="/dairy-profit-intelligence?product={i}">Get Started</a>
+    </section>"""
+    for i, name in enumerate(["Dairy Profit Intelligence", "Feed Planner", "Herd Health", "Milk Quality"])
+)
+
+DASHBOARD_PAGE = f"""<!doctype html>
+<html><head><title>Farmce - Dashboard</title></head>
+<body>
+  <nav><a href="/dashboard">Home</a> <a href="/">Logout</a></nav>
+  <main>{DASHBOARD_CARDS}</main>
+  <script>
+    // Late-rendered content, like the real dashboard's client-side fetches
+    setTimeout(() => {{
+      const note = document.createElement('p');
+      note.textContent = 'Last synced just now';
+      document.querySelector('main').appendChild(note);
+    }}, 100);
+  </script>
+</body></html>
+"""
+
+PRODUCT_PAGE = """<!doctype html>
+<html><head><title>Farmce - Dairy Profit Intelligence</title></head>
+<body>
+  <nav><a href="/dashboard">Back to dashboard</a></nav>
+  <main>
+    <h1>Dairy Profit Intelligence</h1>
+    <table>""" + "".join(f"<tr><td>Farm {i}</td><td>{i * 37 % 100}%</td></tr>" for i in range(200)) + """</table>
+  </main>
+</body></html>
+"""
+
+ROUTES = {
+    "/": LOGIN_PAGE,
+    "/dashboard": DASHBOARD_PAGE,
+    "/dairy-profit-intelligence": PRODUCT_PAGE,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = ROUTES.get(self.path.split("?", 1)[0])
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubSite:
+    """Serves the replica pages on 127.0.0.1 from a daemon thread."""
+
+    def __init__(self, port: int = 0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
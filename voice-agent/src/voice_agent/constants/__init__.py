@@ -1,3 +1,119 @@
-from .env import OPENAI_API_KEY
+from .env import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    LLM_MODEL,
+    LLM_TIMEOUT,
+    LLM_MAX_CONNECTIONS,
+    MAX_BROWSER_SESSIONS,
+    SESSION_ACQUIRE_TIMEOUT,
+    CODE_CACHE_MAX_ENTRIES,
+    CODE_CACHE_TTL,
+    ALLOWED_DOMAIN,
+    PROMPT_TOKEN_BUDGET,
+    SCREENSHOT_FORMAT,
+    SCREENSHOT_QUALITY,
+    SCREENSHOT_FULL_PAGE,
+    SCREENSHOT_MAX_WIDTH,
+    SCREENSHOT_MAX_HEIGHT,
+    SCREENSHOT_WORKERS,
+    RETRY_IMAGE_MAX_DIM,
+    RETRY_IMAGE_MAX_CHARS,
+    SETTLE_QUIET_MS,
+    SETTLE_TIMEOUT_MS,
+    BROWSER_HEADLESS,
+    BROWSER_SLOW_MO,
+    START_URL,
+    CONTEXT_POOL_SIZE,
+    CONTEXT_POOL_MAX_IDLE,
+    AUTH_USER,
+    AUTH_STATE_DIR,
+    AUTH_STATE_TTL,
+    AUTH_PATH,
+    WORKER_PROCESSES,
+    WORKER_BASE_PORT,
+    WORKER_STICKY_SLACK,
+    IS_WORKER,
+    SCHEDULER_POLICY,
+    SCHEDULER_MAX_QUEUE,
+    MACRO_DIR,
+    REPLAY_HEALTH_TIMEOUT,
+    PLANNER_ENABLED,
+    PLANNER_MAX_STEPS,
+    PLAN_STEP_RETRIES,
+    FAST_PATH_ENABLED,
+    SELECTOR_STORE_PATH,
+    SELECTOR_MAX_MISSES,
+    SELECTOR_PROMPT_LIMIT,
+    SELECTOR_SAVE_DELAY,
+    RESOURCE_POLICY,
+    RESOURCE_BLOCK_TYPES,
+    RESOURCE_ALLOW_DOMAINS,
+    RESOURCE_DENY_DOMAINS,
+    RESOURCE_CACHE_DIR,
+    RESOURCE_CACHE_MAX_BYTES,
+    RESOURCE_CACHE_TTL,
+    ARTIFACT_DIR,
+    ARTIFACT_MAX_BYTES,
+    ARTIFACT_MAX_AGE,
+    ARTIFACT_BASE_URL,
+)
 
-__all__ = ["OPENAI_API_KEY"]
\ No newline at end of file
+__all__ = [
+    "OPENAI_API_KEY",
+    "OPENAI_BASE_URL",
+    "LLM_MODEL",
+    "LLM_TIMEOUT",
+    "LLM_MAX_CONNECTIONS",
+    "MAX_BROWSER_SESSIONS",
+    "SESSION_ACQUIRE_TIMEOUT",
+    "CODE_CACHE_MAX_ENTRIES",
+    "CODE_CACHE_TTL",
+    "ALLOWED_DOMAIN",
+    "PROMPT_TOKEN_BUDGET",
+    "SCREENSHOT_FORMAT",
+    "SCREENSHOT_QUALITY",
+    "SCREENSHOT_FULL_PAGE",
+    "SCREENSHOT_MAX_WIDTH",
+    "SCREENSHOT_MAX_HEIGHT",
+    "SCREENSHOT_WORKERS",
+    "RETRY_IMAGE_MAX_DIM",
+    "RETRY_IMAGE_MAX_CHARS",
+    "SETTLE_QUIET_MS",
+    "SETTLE_TIMEOUT_MS",
+    "BROWSER_HEADLESS",
+    "BROWSER_SLOW_MO",
+    "START_URL",
+    "CONTEXT_POOL_SIZE",
+    "CONTEXT_POOL_MAX_IDLE",
+    "AUTH_USER",
+    "AUTH_STATE_DIR",
+    "AUTH_STATE_TTL",
+    "AUTH_PATH",
+    "WORKER_PROCESSES",
+    "WORKER_BASE_PORT",
+    "WORKER_STICKY_SLACK",
+    "IS_WORKER",
+    "SCHEDULER_POLICY",
+    "SCHEDULER_MAX_QUEUE",
+    "MACRO_DIR",
+    "REPLAY_HEALTH_TIMEOUT",
+    "PLANNER_ENABLED",
+    "PLANNER_MAX_STEPS",
+    "PLAN_STEP_RETRIES",
+    "FAST_PATH_ENABLED",
+    "SELECTOR_STORE_PATH",
+    "SELECTOR_MAX_MISSES",
+    "SELECTOR_PROMPT_LIMIT",
+    "SELECTOR_SAVE_DELAY",
+    "RESOURCE_POLICY",
+    "RESOURCE_BLOCK_TYPES",
+    "RESOURCE_ALLOW_DOMAINS",
+    "RESOURCE_DENY_DOMAINS",
+    "RESOURCE_CACHE_DIR",
+    "RESOURCE_CACHE_MAX_BYTES",
+    "RESOURCE_CACHE_TTL",
+    "ARTIFACT_DIR",
+    "ARTIFACT_MAX_BYTES",
+    "ARTIFACT_MAX_AGE",
+    "ARTIFACT_BASE_URL",
+]
\ No newline at end of file
@@ -3,4 +3,98 @@ import os
 
 load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # point at a local fake server for testing
+
+# LLM client
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+
+# Browser session limits
+MAX_BROWSER_SESSIONS = int(os.getenv("MAX_BROWSER_SESSIONS", "20"))
+SESSION_ACQUIRE_TIMEOUT = float(os.getenv("SESSION_ACQUIRE_TIMEOUT", "10"))
+
+# Generated-code cache
+CODE_CACHE_MAX_ENTRIES = int(os.getenv("CODE_CACHE_MAX_ENTRIES", "512"))
+CODE_CACHE_TTL = float(os.getenv("CODE_CACHE_TTL", "3600"))
+
+# Navigation is restricted to this host
+ALLOWED_DOMAIN = os.getenv("ALLOWED_DOMAIN", "farmce-dev.oraczen.xyz")
+
+# Prompt construction
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+
+# Screenshot capture defaults
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "jpeg")  # "png" or "jpeg"
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "70"))
+SCREENSHOT_FULL_PAGE = os.getenv("SCREENSHOT_FULL_PAGE", "false").lower() == "true"
+SCREENSHOT_MAX_WIDTH = int(os.getenv("SCREENSHOT_MAX_WIDTH", "1280"))
+SCREENSHOT_MAX_HEIGHT = int(os.getenv("SCREENSHOT_MAX_HEIGHT", "2400"))
+SCREENSHOT_WORKERS = int(os.getenv("SCREENSHOT_WORKERS", "4"))
+
+# Retry vision input
+RETRY_IMAGE_MAX_DIM = int(os.getenv("RETRY_IMAGE_MAX_DIM", "1024"))
+RETRY_IMAGE_MAX_CHARS = int(os.getenv("RETRY_IMAGE_MAX_CHARS", "200000"))  # base64 characters
+
+# DOM stability waits
+SETTLE_QUIET_MS = int(os.getenv("SETTLE_QUIET_MS", "300"))
+SETTLE_TIMEOUT_MS = int(os.getenv("SETTLE_TIMEOUT_MS", "5000"))
+BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "false").lower() == "true"
+BROWSER_SLOW_MO = int(os.getenv("BROWSER_SLOW_MO", "0"))
+
+# Page each browser session starts on
+START_URL = os.getenv("START_URL", "https://farmce-dev.oraczen.xyz/")
+
+# Warm browser contexts kept ready at START_URL (0 disables the pool)
+CONTEXT_POOL_SIZE = int(os.getenv("CONTEXT_POOL_SIZE", "2"))
+CONTEXT_POOL_MAX_IDLE = float(os.getenv("CONTEXT_POOL_MAX_IDLE", "600"))  # seconds before a warm page is considered stale
+
+# Saved login state (cookies + localStorage) reused by new browser contexts
+AUTH_USER = os.getenv("AUTH_USER", "default")  # cache key for the configured account's saved login
+AUTH_STATE_DIR = os.getenv("AUTH_STATE_DIR", ".auth")
+AUTH_STATE_TTL = float(os.getenv("AUTH_STATE_TTL", "43200"))  # seconds
+AUTH_PATH = os.getenv("AUTH_PATH", "/auth")  # the app redirects here when the session has expired
+
+# Multi-process mode: browser sessions run in worker processes behind this one (0 = single process, "auto" = one per core)
+WORKER_PROCESSES = (os.cpu_count() or 1) if os.getenv("WORKER_PROCESSES", "0") == "auto" else int(os.getenv("WORKER_PROCESSES", "0"))
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "8100"))  # worker i listens on 127.0.0.1:WORKER_BASE_PORT + i
+WORKER_STICKY_SLACK = int(os.getenv("WORKER_STICKY_SLACK", "2"))  # extra sessions a client's home worker may carry before spilling over
+IS_WORKER = os.getenv("VOICE_AGENT_WORKER", "false").lower() == "true"  # set by the front end for its workers
+
+# Per-session instruction scheduling: barge_in, latest or queue (see scheduler.py)
+SCHEDULER_POLICY = os.getenv("SCHEDULER_POLICY", "barge_in")
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "5"))
+
+# Recorded macros (validated code per step) replayed without the LLM
+MACRO_DIR = os.getenv("MACRO_DIR", "macros")
+REPLAY_HEALTH_TIMEOUT = float(os.getenv("REPLAY_HEALTH_TIMEOUT", "2"))  # seconds to wait for a step's first element before healing it
+
+# Compound instructions ("log in, open X and take a screenshot") are planned into steps
+PLANNER_ENABLED = os.getenv("PLANNER_ENABLED", "true").lower() == "true"
+PLANNER_MAX_STEPS = int(os.getenv("PLANNER_MAX_STEPS", "6"))
+PLAN_STEP_RETRIES = int(os.getenv("PLAN_STEP_RETRIES", "1"))  # extra runs of a failed step, after the page settles
+
+# Rule-based fast path for simple commands (click/type/scroll/back); anything else goes to the LLM
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+
+# Learned selectors: locators that worked per URL pattern and target, reused by the prompt and the fast path
+SELECTOR_STORE_PATH = os.getenv("SELECTOR_STORE_PATH", "selectors.json")
+SELECTOR_MAX_MISSES = int(os.getenv("SELECTOR_MAX_MISSES", "2"))  # consecutive checks that match nothing before an entry is dropped
+SELECTOR_PROMPT_LIMIT = int(os.getenv("SELECTOR_PROMPT_LIMIT", "5"))
+SELECTOR_SAVE_DELAY = float(os.getenv("SELECTOR_SAVE_DELAY", "2.0"))  # seconds changes are batched before the file is rewritten
+
+# Request interception per browser context: off, lean (no fonts/media/trackers), strict (also images and third-party hosts) or auto (lean when headless)
+RESOURCE_POLICY = os.getenv("RESOURCE_POLICY", "auto")
+RESOURCE_BLOCK_TYPES = set(filter(None, os.getenv("RESOURCE_BLOCK_TYPES").split(","))) if os.getenv("RESOURCE_BLOCK_TYPES") is not None else None
+RESOURCE_ALLOW_DOMAINS = tuple(filter(None, os.getenv("RESOURCE_ALLOW_DOMAINS", ALLOWED_DOMAIN).split(",")))
+RESOURCE_DENY_DOMAINS = tuple(filter(None, os.getenv("RESOURCE_DENY_DOMAINS", "").split(",")))
+RESOURCE_CACHE_DIR = os.getenv("RESOURCE_CACHE_DIR", ".resource-cache")
+RESOURCE_CACHE_MAX_BYTES = int(os.getenv("RESOURCE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+RESOURCE_CACHE_TTL = float(os.getenv("RESOURCE_CACHE_TTL", "86400"))
+
+# Content-addressed artifact store for screenshots, served at /artifacts/<id>
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(500 * 1024 * 1024)))
+ARTIFACT_MAX_AGE = float(os.getenv("ARTIFACT_MAX_AGE", str(7 * 24 * 3600)))  # seconds since last use
+ARTIFACT_BASE_URL = os.getenv("ARTIFACT_BASE_URL", "").rstrip("/")  # e.g. http://host:8000; artifact URLs are relative when empty
\ No newline at end of file
@@ -1,4 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from .playwright.session import session_manager
+from .playwright.selector_store import selector_store
+from .playwright import llm
+from .workers import worker_pool
 
-app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # In multi-process mode this process only routes; browsers run in the workers
+    if worker_pool.enabled:
+        await worker_pool.start()
+    else:
+        await session_manager.start()
+    try:
+        yield
+    finally:
+        try:
+            if worker_pool.enabled:
+                await worker_pool.shutdown()
+            await session_manager.shutdown()
+        finally:
+            selector_store.flush()
+            await llm.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,183 @@
+import math
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Latency buckets (seconds) covering in-page calls through multi-second LLM completions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: Optional[dict] = None) -> str:
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def render(self) -> list:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[tuple, list] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def render(self) -> list:
+        lines = self.header()
+        for key, counts in self._counts.items():
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "voice_agent_stage_seconds", "Time spent in each stage of an instruction", ("stage",)
+)
+INSTRUCTION_SECONDS = Histogram(
+    "voice_agent_instruction_seconds", "End-to-end instruction latency", ("status",)
+)
+INSTRUCTIONS_TOTAL = Counter("voice_agent_instructions_total", "Instructions processed", ("status",))
+RETRIES_TOTAL = Counter("voice_agent_retries_total", "Execution attempts after the first")
+FAILURES_TOTAL = Counter("voice_agent_failures_total", "Failed execution attempts or stages", ("stage",))
+CODE_CACHE_LOOKUPS = Counter("voice_agent_code_cache_lookups_total", "Generated-code cache lookups", ("result",))
+FAST_PATH_TOTAL = Counter("voice_agent_fast_path_total", "Instructions tried on the rule-based fast path", ("result",))
+RESOURCE_REQUESTS = Counter("voice_agent_resource_requests_total", "Browser requests seen by the resource policy", ("action",))
+ARTIFACTS_STORED = Counter("voice_agent_artifacts_stored_total", "Screenshots written to the artifact store", ("result",))
+ARTIFACT_STORE_BYTES = Gauge("voice_agent_artifact_store_bytes", "Bytes held by the artifact store")
+SELECTOR_LOOKUPS = Counter("voice_agent_selector_lookups_total", "Learned selectors checked against the page", ("result",))
+ACTIVE_SESSIONS = Gauge("voice_agent_active_sessions", "Open browser sessions")
+CODE_CACHE_ENTRIES = Gauge("voice_agent_code_cache_entries", "Entries in the generated-code cache")
+WARM_CONTEXTS = Gauge("voice_agent_warm_contexts", "Pre-navigated browser contexts waiting in the pool")
+WORKER_CONNECTIONS = Gauge("voice_agent_worker_connections", "WebSockets relayed to each worker process", ("worker",))
+
+
+class InstructionTimer:
+    """
+    Collects per-stage timings for one instruction and feeds the stage histogram.
+    Stages must not nest, so they add up to no more than the total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def finish(self, status: str) -> dict:
+        total = self.elapsed
+        INSTRUCTION_SECONDS.observe(total, status=status)
+        INSTRUCTIONS_TOTAL.inc(status=status)
+        return self.as_dict(total)
+
+    def as_dict(self, total: Optional[float] = None) -> dict:
+        """Stage timings in milliseconds, plus the total."""
+        timings = {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
+        timings["total"] = round((self.elapsed if total is None else total) * 1000, 1)
+        return timings
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from ..constants import ARTIFACT_DIR, ARTIFACT_MAX_BYTES, ARTIFACT_MAX_AGE, ARTIFACT_BASE_URL
+from ..metrics import ARTIFACTS_STORED
+from .screenshots import Screenshot, run_off_loop
+
+EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/gif": "gif", "image/webp": "webp"}
+MIME_TYPES = {extension: mime for mime, extension in EXTENSIONS.items()}
+
+_ARTIFACT_ID = re.compile(r"^[0-9a-f]{64}\.[a-z]+$")
+
+# Retention sweeps for age run at most this often (seconds); size is enforced on every write
+PRUNE_INTERVAL = 60.0
+
+
+class Artifact:
+    """A stored file, addressed by the hash of its content."""
+
+    def __init__(self, artifact_id: str, path: Path, size: int, mime_type: str):
+        self.id = artifact_id
+        self.path = path
+        self.size = size
+        self.mime_type = mime_type
+
+    @property
+    def url(self) -> str:
+        return f"{ARTIFACT_BASE_URL}/artifacts/{self.id}"
+
+    def __repr__(self):
+        return f"Artifact({self.id}, {self.size} bytes)"
+
+
+class ArtifactStore:
+    """
+    Content-addressed files (screenshots) under `directory`, served at /artifacts/<id>.
+
+    An artifact's id is the SHA-256 of its bytes plus its extension, so an
+    identical frame is stored once however many times it is captured. Reads
+    and writes refresh an artifact's mtime, which doubles as its last-use time:
+    artifacts unused for `max_age` seconds are deleted, and the least recently
+    used go first whenever the store grows past `max_bytes`. Writes run in the
+    screenshot thread pool.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_DIR, max_bytes: int = ARTIFACT_MAX_BYTES, max_age: float = ARTIFACT_MAX_AGE):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # id -> (path, size), least recently used first
+        self._index: Optional[OrderedDict[str, tuple[Path, int]]] = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _path(self, artifact_id: str) -> Path:
+        # Two-character fan-out keeps directories small on long-running nodes
+        return self.directory / artifact_id[:2] / artifact_id
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        files = []
+        if self.directory.exists():
+            for path in self.directory.glob("*/*"):
+                if not _ARTIFACT_ID.match(path.name):
+                    continue  # in-flight temp files
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path.name, path, stat.st_size))
+        files.sort()
+        self._index = OrderedDict((name, (path, size)) for _, name, path, size in files)
+        self._bytes = sum(size for _, _, _, size in files)
+
+    def _touch(self, artifact_id: str, path: Path):
+        self._index.move_to_end(artifact_id)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _remove(self, artifact_id: str):
+        path, size = self._index.pop(artifact_id)
+        self._bytes -= size
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _enforce_retention(self):
+        now = time.time()
+        if now - self._last_prune >= PRUNE_INTERVAL:
+            self._last_prune = now
+            for artifact_id, (path, _) in list(self._index.items()):
+                try:
+                    if now - path.stat().st_mtime <= self.max_age:
+                        break  # ordered by last use; everything after is newer
+                except OSError:
+                    pass
+                self._remove(artifact_id)
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            self._remove(next(iter(self._index)))
+
+    def put_bytes(self, data: bytes, mime_type: str) -> Artifact:
+        """Store `data` (blocking; see `put` for the async form) and return its artifact."""
+        artifact_id = f"{hashlib.sha256(data).hexdigest()}.{EXTENSIONS.get(mime_type, 'bin')}"
+        path = self._path(artifact_id)
+        with self._lock:
+            self._load_index()
+            if artifact_id in self._index and path.exists():
+                self._touch(artifact_id, path)
+                ARTIFACTS_STORED.inc(result="duplicate")
+                return Artifact(artifact_id, path, len(data), mime_type)
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{artifact_id}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._index[artifact_id] = (path, len(data))
+            self._bytes += len(data)
+            ARTIFACTS_STORED.inc(result="new")
+            self._enforce_retention()
+        return Artifact(artifact_id, path, len(data), mime_type)
+
+    async def put(self, data: bytes, mime_type: str) -> Artifact:
+        return await run_off_loop(self.put_bytes, data, mime_type)
+
+    async def put_screenshot(self, screenshot: Screenshot) -> Artifact:
+        return await self.put(await screenshot.bytes(), screenshot.mime_type)
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        """The artifact with this id, if it is still stored; counts as a use for LRU eviction."""
+        if not _ARTIFACT_ID.match(artifact_id):
+            return None
+        path = self._path(artifact_id)
+        with self._lock:
+            self._load_index()
+            if not path.exists():
+                if artifact_id in self._index:
+                    self._remove(artifact_id)
+                return None
+            if artifact_id not in self._index:
+                # Written by another process sharing the directory (e.g. a worker)
+                size = path.stat().st_size
+                self._index[artifact_id] = (path, size)
+                self._bytes += size
+            self._touch(artifact_id, path)
+            size = self._index[artifact_id][1]
+        extension = artifact_id.rsplit(".", 1)[-1]
+        return Artifact(artifact_id, path, size, MIME_TYPES.get(extension, "application/octet-stream"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            return {"artifacts": len(self._index), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+artifact_store = ArtifactStore()
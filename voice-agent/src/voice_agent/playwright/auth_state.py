@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlparse
+from ..constants import ALLOWED_DOMAIN, AUTH_STATE_DIR, AUTH_STATE_TTL, AUTH_PATH
+
+
+class AuthStateCache:
+    """
+    Per-user Playwright storage state (cookies and localStorage) saved after a login.
+
+    Entries live in memory and on disk so restarts keep the login. An entry is
+    treated as expired when it is older than `ttl` or when a persistent cookie
+    for the app's domain has passed its expiry. Navigation to the auth page in
+    a watched page means the server rejected the state, so the entry is dropped
+    and the next successful login saves a fresh one.
+    """
+
+    def __init__(self, directory: str = AUTH_STATE_DIR, ttl: float = AUTH_STATE_TTL, auth_path: str = AUTH_PATH):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.auth_path = auth_path
+        self._entries: dict[str, dict] = {}
+        self._listeners: list[Callable[[str], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def is_auth_url(self, url: Optional[str]) -> bool:
+        return bool(url) and urlparse(url).path.rstrip("/").startswith(self.auth_path.rstrip("/"))
+
+    def subscribe(self, listener: Callable[[str], None]):
+        """Call `listener(user)` whenever a user's saved state changes or is dropped."""
+        self._listeners.append(listener)
+
+    def _notify(self, user: str):
+        for listener in self._listeners:
+            try:
+                listener(user)
+            except Exception as e:
+                print(f"Auth state listener failed: {e}")
+
+    def _path(self, user: str) -> Path:
+        return self.directory / f"{hashlib.sha256(user.encode('utf-8')).hexdigest()[:16]}.json"
+
+    def _expires_at(self, entry: dict) -> float:
+        expires_at = entry["saved_at"] + self.ttl
+        for cookie in entry["state"].get("cookies", []):
+            domain = cookie.get("domain", "").lstrip(".")
+            if cookie.get("expires", -1) > 0 and domain and ALLOWED_DOMAIN.endswith(domain):
+                expires_at = min(expires_at, cookie["expires"])
+        return expires_at
+
+    def _load(self, user: str) -> Optional[dict]:
+        path = self._path(user)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable auth state {path}: {e}")
+            return None
+        self._entries[user] = entry
+        return entry
+
+    def get(self, user: Optional[str]) -> Optional[dict]:
+        """Storage state for `user`, or None if there is none or it has expired."""
+        if not user:
+            return None
+        entry = self._entries.get(user) or self._load(user)
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.time() >= self._expires_at(entry):
+            print(f"Saved login for {user} has expired")
+            self.invalidate(user)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["state"]
+
+    def put(self, user: Optional[str], state: dict):
+        if not user:
+            return
+        entry = {"saved_at": time.time(), "state": state}
+        self._entries[user] = entry
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(user)
+            # Session cookies are credentials: keep the file private to this user account
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+        except OSError as e:
+            print(f"Failed to persist auth state for {user}: {e}")
+        print(f"Saved login state for {user} ({len(state.get('cookies', []))} cookies)")
+        self._notify(user)
+
+    def invalidate(self, user: Optional[str]):
+        if not user:
+            return
+        existed = self._entries.pop(user, None) is not None
+        try:
+            self._path(user).unlink()
+            existed = True
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Failed to remove auth state for {user}: {e}")
+        if existed:
+            print(f"Dropped saved login state for {user}")
+            self._notify(user)
+
+    async def save_from_context(self, user: Optional[str], context):
+        """Save an async context's storage state after a successful login."""
+        if user:
+            self.put(user, await context.storage_state())
+
+    def save_from_sync_context(self, user: Optional[str], context):
+        """Save a sync-API context's storage state after a successful login."""
+        if user:
+            self.put(user, context.storage_state())
+
+    def watch(self, page, user: Optional[str]):
+        """Drop `user`'s saved state when `page` gets redirected to the auth page."""
+        if not user:
+            return
+
+        def on_navigated(frame):
+            if frame == page.main_frame and self.is_auth_url(frame.url) and user in self._entries:
+                print(f"Redirected to {frame.url}; saved login for {user} is no longer valid")
+                self.invalidate(user)
+
+        page.on("framenavigated", on_navigated)
+
+    def stats(self) -> dict:
+        return {"users": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+auth_state_cache = AuthStateCache()
@@ -1,13 +1,27 @@
-import random
-import re
-import base64
-import asyncio
-from pathlib import Path
-from playwright.sync_api import Page, expect, sync_playwright, Browser, BrowserContext
-from playwright.async_api import async_playwright, Page as AsyncPage, Browser as AsyncBrowser, BrowserContext as AsyncContext
-from openai import OpenAI
-from ..constants import OPENAI_API_KEY
 import re
+import time
+from playwright.sync_api import expect, sync_playwright
+from typing import Optional
+from .session import BrowserSession, session_manager
+from .llm import ProgressCallback, stream_completion, measure_messages, image_part
+from .code_cache import code_cache
+from .page_state import PageState
+from .element_context import extract_element_context
+from .element_index import query_element_index
+from .keywords import extract_ranked_terms
+from .page_summary import summarize_page
+from .screenshots import Screenshot, ScreenshotOptions, capture_screenshot, capture_within_budget
+from .code_validator import compile_generated_code, build_globals, run_compiled
+from .stability import wait_for_settled
+from .auth_state import auth_state_cache
+from .macros import Macro, MacroStep, replay_macro
+from .planner import looks_compound, plan_instruction
+from .intent_router import route_instruction
+from .selector_store import selector_store, confidence
+from .artifacts import Artifact, artifact_store
+from .resource_policy import install_resource_policy_sync, resolve_policy_name
+from ..constants import ALLOWED_DOMAIN, RETRY_IMAGE_MAX_CHARS, RETRY_IMAGE_MAX_DIM, AUTH_USER, PLANNER_ENABLED, PLAN_STEP_RETRIES, FAST_PATH_ENABLED
+from ..metrics import InstructionTimer, CODE_CACHE_LOOKUPS, RETRIES_TOTAL, FAILURES_TOTAL, FAST_PATH_TOTAL
 
 # Sync globals
 _browser = None
@@ -15,16 +29,6 @@ _context = None
 _page = None
 _playwright = None
 
-# Async globals
-_async_browser = None
-_async_context = None
-_async_page = None
-_async_playwright = None
-
-ALLOWED_DOMAIN = "farmce-dev.oraczen.xyz"
-
-client = OpenAI(api_key=OPENAI_API_KEY)  
-
 
 class PersistentPlaywright:
     """Manages a persistent Playwright browser session."""
@@ -43,8 +47,14 @@ class PersistentPlaywright:
 
         _playwright = sync_playwright().start()
         _browser = _playwright.chromium.launch(headless=headless, slow_mo=slow_mo)
-        _context = _browser.new_context(viewport={"width": 1280, "height": 800})
+        context_options = {"viewport": {"width": 1280, "height": 800}}
+        saved_state = auth_state_cache.get(AUTH_USER)
+        if saved_state:
+            context_options["storage_state"] = saved_state
+        _context = _browser.new_context(**context_options)
+        install_resource_policy_sync(_context, resolve_policy_name(headless=headless))
         _page = _context.new_page()
+        auth_state_cache.watch(_page, AUTH_USER)
         _page.goto(url)
 
         print(f"Browser opened at {url}")
@@ -69,115 +79,55 @@ class PersistentPlaywright:
         print("Browser closed.")
 
     @staticmethod
-    async def open_async(url: str, headless: bool = False, slow_mo: int = 0):
-        """Open async browser and navigate to a given URL (keeps instance alive)."""
-        global _async_browser, _async_context, _async_page, _async_playwright
-
-        if _async_browser is not None:
-            print("Async browser already open.")
-            return _async_page
-
+    async def open_async(url: str, headless: bool = False, slow_mo: int = 0, user: Optional[str] = AUTH_USER,
+                         resource_policy: Optional[str] = None) -> BrowserSession:
+        """
+        Open an isolated session on the shared browser (logged in as `user` if saved) and navigate to a given URL.
+        `resource_policy` selects which requests are blocked, stubbed or served from the asset cache.
+        """
         if ALLOWED_DOMAIN not in url:
             raise ValueError(f"Navigation outside allowed domain: {url}")
 
-        _async_playwright = await async_playwright().start()
-        _async_browser = await _async_playwright.chromium.launch(headless=headless, slow_mo=slow_mo)
-        _async_context = await _async_browser.new_context(viewport={"width": 1280, "height": 800})
-        _async_page = await _async_context.new_page()
-        await _async_page.goto(url)
-
-        print(f"Async browser opened at {url}")
-        return _async_page
+        session = await session_manager.create_session(url, headless=headless, slow_mo=slow_mo, user=user,
+                                                       resource_policy=resource_policy)
+        print(f"Async session opened at {url}")
+        return session
 
     @staticmethod
-    async def close_async():
-        """Close the async browser instance and reset globals."""
-        global _async_browser, _async_context, _async_page, _async_playwright
-
-        if _async_context:
-            await _async_context.close()
-        if _async_browser:
-            await _async_browser.close()
-        if _async_playwright:
-            await _async_playwright.stop()
-
-        _async_browser = None
-        _async_context = None
-        _async_page = None
-        _async_playwright = None
-        print("Async browser closed.")
+    async def close_async(session: BrowserSession):
+        """Close the session's context; the shared browser stays up for other clients."""
+        await session_manager.release(session)
+        print("Async session closed.")
 
     @staticmethod
-    async def get_page_state_async():
-        """Get current page state for context."""
-        global _async_page
-        if _async_page is None:
-            return {"error": "Browser not open"}
+    async def get_page_state_async(session: BrowserSession) -> PageState:
+        """Get a lazy page state; title, HTML and screenshot are captured only when requested."""
+        if session is None or session.closed:
+            return PageState(None, error="Browser not open")
         
         try:
-            url = await _async_page.url
-            title = await _async_page.title()
-            html = await _async_page.content()
-            screenshot = await _async_page.screenshot(full_page=True)
-            screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
-            
-            return {
-                "url": url,
-                "title": title,
-                "html": html[:5000],  # Limit HTML size
-                "screenshot_base64": screenshot_b64,
-                "timestamp": asyncio.get_event_loop().time()
-            }
+            return PageState(session.page)
         except Exception as e:
-            return {"error": f"Failed to get page state: {str(e)}"}
+            return PageState(None, error=f"Failed to get page state: {str(e)}")
 
     @staticmethod
-    async def get_element_context_async(search_terms: list):
+    async def get_element_context_async(session: BrowserSession, search_terms: list):
         """Get HTML context around specific elements for better selector generation."""
-        global _async_page
-        if _async_page is None:
+        if session is None or session.closed:
             return {"error": "Browser not open"}
         
         try:
-            element_contexts = []
-            
-            for term in search_terms:
-                try:
-                    # Try to find elements containing the search term
-                    elements = await _async_page.locator(f'text*="{term}"').all()
-                    
-                    for i, element in enumerate(elements[:3]):  # Limit to first 3 matches
-                        try:
-                            # Get the outer HTML of the element and its parent
-                            outer_html = await element.evaluate('el => el.outerHTML')
-                            parent_html = await element.evaluate('el => el.parentElement?.outerHTML')
-                            
-                            # Get element attributes
-                            tag_name = await element.evaluate('el => el.tagName')
-                            attributes = await element.evaluate('''el => {
-                                const attrs = {};
-                                for (let attr of el.attributes) {
-                                    attrs[attr.name] = attr.value;
-                                }
-                                return attrs;
-                            }''')
-                            
-                            element_contexts.append({
-                                "search_term": term,
-                                "element_index": i,
-                                "tag_name": tag_name,
-                                "attributes": attributes,
-                                "outer_html": outer_html[:1000],  # Limit size
-                                "parent_html": parent_html[:1000] if parent_html else None
-                            })
-                        except Exception as e:
-                            print(f"Error getting context for element {i}: {e}")
-                            continue
-                            
-                except Exception as e:
-                    print(f"Error finding elements for term '{term}': {e}")
-                    continue
-            
+            # Look up the in-page element index first. It only covers interactive elements, so
+            # terms it does not match (plain text, headings) get one DOM pass between them.
+            try:
+                element_contexts = await query_element_index(session.page, search_terms)
+                matched = {ctx["search_term"] for ctx in element_contexts}
+                missing = [term for term in search_terms if term not in matched]
+            except Exception as e:
+                print(f"Element index unavailable, scanning DOM: {e}")
+                element_contexts, missing = [], list(search_terms)
+            if missing:
+                element_contexts += await extract_element_context(session.page, missing)
             return {
                 "element_contexts": element_contexts,
                 "total_found": len(element_contexts)
@@ -192,17 +142,18 @@ class PersistentPlaywright:
         if _page is None:
             raise RuntimeError("Browser not open. Call `open()` first.")
 
-        _page.get_by_role("textbox", name="Email").fill("deepak.ramanujam@oraczen.ai")
-        _page.get_by_role("textbox", name="Enter your password").fill("Test@1234567")
-        _page.get_by_role("button", name="Login").click()
-        _page.wait_for_load_state("networkidle")
+        # A saved login lands on the dashboard directly; only fill the form on the auth page
+        if auth_state_cache.is_auth_url(_page.url) or _page.get_by_role("button", name="Login").count():
+            _page.get_by_role("textbox", name="Email").fill("deepak.ramanujam@oraczen.ai")
+            _page.get_by_role("textbox", name="Enter your password").fill("Test@1234567")
+            _page.get_by_role("button", name="Login").click()
+            _page.wait_for_load_state("networkidle")
+            auth_state_cache.save_from_sync_context(AUTH_USER, _context)
         _page.get_by_role("link", name="Get Started").first.click()
         expect(_page).to_have_url(re.compile(".*/dairy-profit-intelligence"))
 
-        random_number = random.randint(100, 999)
-        out_dir = Path(f"screenshots/file{random_number}")
-        out_dir.mkdir(parents=True, exist_ok=True)
-        _page.screenshot(path=str(out_dir / "dashboard.png"), full_page=True)
+        artifact = artifact_store.put_bytes(_page.screenshot(full_page=True), "image/png")
+        print(f"Dashboard screenshot: {artifact.url}")
 
         print("Login and dashboard test executed.")
 
@@ -211,69 +162,91 @@ class PersistentPlaywright:
         return re.sub(r"^```[a-zA-Z]*\n?|```$", "", code, flags=re.MULTILINE).strip()
     
     @staticmethod
-    async def save_screenshot_to_file(screenshot_b64: str, filename_prefix: str = "screenshot") -> str:
-        """Save base64 screenshot to a local file and return the file path."""
+    async def store_screenshot(screenshot: Screenshot, label: str = "screenshot") -> Optional[Artifact]:
+        """Put a screenshot in the artifact store (written off the event loop); None if that fails."""
         try:
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{filename_prefix}_{timestamp}.png"
-            filepath = f"screenshots/{filename}"
-            
-            # Create screenshots directory if it doesn't exist
-            Path("screenshots").mkdir(exist_ok=True)
-            
-            # Decode and save the screenshot
-            screenshot_data = base64.b64decode(screenshot_b64)
-            with open(filepath, 'wb') as f:
-                f.write(screenshot_data)
-            
-            print(f"Screenshot saved to: {filepath}")
-            return filepath
+            artifact = await artifact_store.put_screenshot(screenshot)
+            print(f"Stored {label} screenshot: {artifact.url}")
+            return artifact
         except Exception as e:
-            print(f"Failed to save screenshot: {e}")
+            print(f"Failed to store {label} screenshot: {e}")
             return None
+
+    @staticmethod
+    async def get_page_overview_async(session: BrowserSession, page_state: PageState, instruction: str) -> str:
+        """Budgeted list of interactive elements for the prompt; falls back to an HTML preview."""
+        page_summary = await summarize_page(session.page, instruction)
+        if page_summary:
+            return f"Interactive elements (role \"name\" -> selector hint, most relevant first):\n{page_summary}"
+        return f"HTML Preview: {await page_state.html(2000)}..."
+
+    @staticmethod
+    async def get_learned_selectors_async(session: BrowserSession, search_terms: list) -> str:
+        """Prompt lines for learned selectors on this page that match the search terms and still resolve."""
+        try:
+            entries = await selector_store.relevant(session.page, search_terms)
+        except Exception as e:
+            print(f"Learned selector lookup failed: {str(e)}")
+            return ""
+        return "\n".join(
+            f"- {entry['target']}{' (' + entry['action'] + ')' if entry['action'] else ''}: "
+            f"`{entry['expression']}` (worked {entry['successes']}x, confidence {confidence(entry):.2f})"
+            for entry in entries
+        )
+
     @staticmethod
-    async def execute_instruction_async(instruction: str):
+    async def build_system_prompt_async(session: BrowserSession, instruction: str,
+                                        timer: Optional[InstructionTimer] = None) -> str:
         """
-        Convert text instruction into Playwright code with OpenAI and execute
-        it safely on the global `_async_page` instance with enhanced context.
+        Build the code-generation system prompt from the session's current page.
+        `timer` gets the page_state, element_context and prompt_build stages, which do not overlap.
         """
-        global _async_page
-        if _async_page is None:
-            raise RuntimeError("Async browser not open. Call `open_async()` first.")
+        timer = timer or InstructionTimer()
 
         # Get current page state for better context
-        page_state = await PersistentPlaywright.get_page_state_async()
+        with timer.span("page_state"):
+            page_state = await PersistentPlaywright.get_page_state_async(session)
+            page_title = await page_state.title()
+            page_overview = await PersistentPlaywright.get_page_overview_async(session, page_state, instruction)
         
         # Extract key terms from instruction for element context
-        instruction_lower = instruction.lower()
-        search_terms = []
-        
-        element_context = await PersistentPlaywright.get_element_context_async(search_terms)
+        with timer.span("element_context"):
+            search_terms = await extract_ranked_terms(session.page, instruction)
+            print(f"Search terms: {search_terms}")
+            element_context = await PersistentPlaywright.get_element_context_async(session, search_terms)
+            learned_selectors = await PersistentPlaywright.get_learned_selectors_async(session, search_terms)
         
         # Build element context string
+        build_started = time.perf_counter()
         element_context_str = ""
         if "element_contexts" in element_context:
             for ctx in element_context["element_contexts"][:5]:  # Limit to 5 contexts
                 element_context_str += f"""
                 Element: {ctx['search_term']} (Index: {ctx['element_index']})
                 - Tag: {ctx['tag_name']}
+                - Suggested selector: {ctx.get('selector', 'None')}
                 - Attributes: {ctx['attributes']}
                 - HTML: {ctx['outer_html'][:500]}...
                 - Parent HTML: {ctx['parent_html'][:500] if ctx['parent_html'] else 'None'}...
                 """
         
-        # Enhanced system prompt with current page context and element details
-
-
         # Enhanced system prompt with current page context and element details
         system_prompt = f"""
         You are an expert Playwright automation code generator. Convert user instructions into robust, executable Playwright Python code.
 
         CURRENT PAGE CONTEXT:
-        - URL: {page_state.get('url', 'Unknown')}
-        - Title: {page_state.get('title', 'Unknown')}
-        - HTML Preview: {page_state.get('html', '')[:2000]}...
+        - URL: {page_state.url or 'Unknown'}
+        - Title: {page_title or 'Unknown'}
+        - {page_overview}
+
+        RELEVANT ELEMENT CONTEXT:
+        {element_context_str or 'None found'}
+
+        KNOWN WORKING SELECTORS ON THIS PAGE (verified just now; prefer these over new ones):
+        {learned_selectors or 'None'}
+
+        SESSION:
+        - {'Not logged in (this is the login page)' if auth_state_cache.is_auth_url(page_state.url) else 'Already logged in; do not log in again unless the instruction asks to'}
 
         CRITICAL RULES:
         1. Use ONLY the global `_async_page` variable (already available)
@@ -282,7 +255,7 @@ class PersistentPlaywright:
         4. Do NOT navigate (`_async_page.goto`) unless explicitly requested
         5. Generate ONLY the body code (no function defs, no classes)
         6. Use `await` for ALL async operations
-        7. Add appropriate waits after actions: `await _async_page.wait_for_load_state('networkidle')`
+        7. After actions that change the page, wait for it to settle: `await settled()` (resolves once the DOM stops changing; do not use 'networkidle')
         8. Use robust selectors in this priority order:
            - `data-testid`, `data-test`, `aria-label`, `aria-labelledby`
            - `role` attributes (button, textbox, link, etc.)
@@ -347,7 +320,7 @@ class PersistentPlaywright:
             print("  Login button clicked successfully")
             
             # Wait for page to load
-            await _async_page.wait_for_load_state('networkidle')
+            await settled()
             current_url = await _async_page.url
             print(f"  Current URL after login: {{current_url}}")
             
@@ -362,76 +335,152 @@ class PersistentPlaywright:
 
         Generate clean, readable, and robust code that handles edge cases, includes comprehensive logging, and verifies actions were successful.
         """
+        timer.record("prompt_build", time.perf_counter() - build_started)
+        return system_prompt
+
+    @staticmethod
+    async def execute_instruction_async(session: BrowserSession, instruction: str,
+                                        progress: Optional[ProgressCallback] = None, max_retries: int = 2):
+        """
+        Convert text instruction into Playwright code with OpenAI and execute
+        it safely on the session's page (exposed to the code as `_async_page`).
+        `progress` is awaited with status lines while code is being generated.
+        Failed code is regenerated and re-run up to `max_retries` times.
+        """
+        if session is None or session.closed:
+            raise RuntimeError("Async browser not open. Call `open_async()` first.")
+
+        timer = InstructionTimer()
+        start_url = session.page.url
+        started_on_auth_page = auth_state_cache.is_auth_url(start_url)
+
+        # Simple commands ("click Login", "scroll down") are resolved on the page without the LLM
+        if FAST_PATH_ENABLED:
+            routed_code = None
+            try:
+                with timer.span("route"):
+                    routed_code = await route_instruction(session.page, instruction)
+                if routed_code is not None:
+                    print("Fast path matched:\n", routed_code)
+                    with timer.span("execution"):
+                        await run_compiled(compile_generated_code(routed_code), build_globals(session.page))
+            except Exception as e:
+                print(f"Fast path failed, falling back to the LLM: {str(e)}")
+                FAST_PATH_TOTAL.inc(result="failed")
+            else:
+                FAST_PATH_TOTAL.inc(result="fallback" if routed_code is None else "routed")
+                if routed_code is not None:
+                    selector_store.learn(start_url, routed_code, session.page.url)
+                    if started_on_auth_page and not auth_state_cache.is_auth_url(session.page.url):
+                        await auth_state_cache.save_from_context(session.user, session.context)
+                    return {
+                        "executed_code": routed_code,
+                        "status": "success",
+                        "message": "Executed a simple command without the LLM",
+                        "cache_hit": False,
+                        "routed": True,
+                        "prompt_sizes": [],
+                        "timings": timer.finish("success"),
+                        "page_state": await PersistentPlaywright.get_page_state_async(session)
+                    }
+
+        # Reuse code that already worked for this instruction on a structurally identical page
+        with timer.span("cache_lookup"):
+            cache_key = await code_cache.make_key(session.page, instruction)
+            cached_code = code_cache.get(cache_key)
+        CODE_CACHE_LOOKUPS.inc(result="miss" if cached_code is None else "hit")
+        prompt_sizes = []
+
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            if cached_code is not None:
+                code = cached_code
+                print("Code cache hit, skipping generation:\n", code)
+            else:
+                system_prompt = await PersistentPlaywright.build_system_prompt_async(session, instruction, timer)
+                messages = [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Instruction: {instruction}"}
-                ],
-                temperature=0,
-            )
-            code = resp.choices[0].message.content.strip()
-            print("Generated async code:\n", code)
-            
-            # Clean code block if needed
-            code = PersistentPlaywright.clean_code_block(code)
-            print("Cleaned async code:\n", code)
+                ]
+                prompt_sizes.append({"attempt": 1, **measure_messages(messages)})
+                print(f"Prompt size (attempt 1): {prompt_sizes[-1]}")
+                code = await stream_completion(messages, progress=progress, timer=timer)
+                print("Generated async code:\n", code)
+                
+                # Clean code block if needed
+                code = PersistentPlaywright.clean_code_block(code)
+                print("Cleaned async code:\n", code)
             
-            # Security checks
-            forbidden = ["import ", "open(", "os.", "subprocess", "exec(", "eval(", "requests.", "http", "socket", "sync_playwright"]
-            if any(f in code for f in forbidden):
-                raise ValueError("Generated code contained forbidden operations.")
-            if "goto(" in code and ALLOWED_DOMAIN not in code:
-                raise ValueError("Generated code tried to navigate outside allowed domain.")
             # Execute the code with async context and retry logic
-            max_retries = 2
             for attempt in range(max_retries + 1):
                 print(f"\n === RETRY ATTEMPT {attempt + 1}/{max_retries + 1} ===")
                 print(f" Executing code (attempt {attempt + 1}):\n{code}")
+                if attempt > 0:
+                    RETRIES_TOTAL.inc()
                 
+                stage = "validation"
                 try:
-                    safe_globals = {
-                        "_async_page": _async_page, 
-                        "asyncio": asyncio,
-                        "re": re,
-                        "base64": base64
-                    }
-                    # Create async execution context
-                    exec(f"async def _temp_exec():\n{chr(10).join('    ' + line for line in code.split(chr(10)))}", safe_globals)
-                    await safe_globals["_temp_exec"]()
+                    # AST-validate and compile once per distinct code; retries and cache hits reuse it
+                    with timer.span("validation"):
+                        compiled = compile_generated_code(code)
+                    stage = "execution"
+                    with timer.span("execution"):
+                        await run_compiled(compiled, build_globals(session.page))
                     
                     print(f"  Attempt {attempt + 1} executed successfully!")
+                    code_cache.put(cache_key, code)
+                    # Remember which locators resolved their targets on this page
+                    selector_store.learn(start_url, code, session.page.url)
+                    if started_on_auth_page and not auth_state_cache.is_auth_url(session.page.url):
+                        # The instruction got us past the login page: keep the login for new sessions
+                        await auth_state_cache.save_from_context(session.user, session.context)
                     return {
                         "executed_code": code, 
                         "status": "success", 
                         "message": f"Code executed successfully on attempt {attempt + 1}",
-                        "page_state": await PersistentPlaywright.get_page_state_async()
+                        "cache_hit": code == cached_code,
+                        "prompt_sizes": prompt_sizes,
+                        "timings": timer.finish("success"),
+                        "page_state": await PersistentPlaywright.get_page_state_async(session)
                     }
                 except Exception as e:
                     print(f" Attempt {attempt + 1} failed with error: {str(e)}")
+                    FAILURES_TOTAL.inc(stage=stage)
+                    if code == cached_code:
+                        code_cache.invalidate(cache_key)
                     
-                    # If this is the first failure, take screenshot and regenerate code with better context
-                    if attempt == 0:
+                    # If this is the first failure and a retry is left, take screenshot and regenerate code with better context
+                    if attempt == 0 and attempt < max_retries:
                         try:
                             print(f"📸 Taking screenshot for retry attempt {attempt + 1}...")
-                            # Take screenshot for better context
-                            error_screenshot = await _async_page.screenshot(full_page=True)
-                            error_screenshot_b64 = base64.b64encode(error_screenshot).decode('utf-8')
-                            
-                            # Save screenshot to file
-                            screenshot_path = await PersistentPlaywright.save_screenshot_to_file(
-                                error_screenshot_b64, 
-                                f"retry_attempt_{attempt + 1}_error"
-                            )
-                            
-                            # Get current page state and element context
-                            current_state = await PersistentPlaywright.get_page_state_async()
-                            print(f"  Current page state: {current_state.get('url', 'Unknown')} - {current_state.get('title', 'Unknown')}")
+                            # Downscaled viewport image under a hard size cap, sent as a vision input
+                            with timer.span("retry.screenshot"):
+                                try:
+                                    error_screenshot = await capture_within_budget(
+                                        session.page, RETRY_IMAGE_MAX_CHARS, RETRY_IMAGE_MAX_DIM
+                                    )
+                                except Exception as screenshot_error:
+                                    print(f" Failed to capture retry screenshot: {screenshot_error}")
+                                    error_screenshot = None
+                                
+                                # Save screenshot to file
+                                screenshot_artifact = None
+                                if error_screenshot is not None:
+                                    screenshot_artifact = await PersistentPlaywright.store_screenshot(
+                                        error_screenshot,
+                                        f"retry attempt {attempt + 1}"
+                                    )
                             
-                            # Get element context for retry
-                            retry_search_terms = []
-                            retry_element_context = await PersistentPlaywright.get_element_context_async(retry_search_terms)
+                            with timer.span("retry.context"):
+                                # Get current page state and element context
+                                current_state = await PersistentPlaywright.get_page_state_async(session)
+                                current_title = await current_state.title()
+                                current_overview = await PersistentPlaywright.get_page_overview_async(session, current_state, instruction)
+                                print(f"  Current page state: {current_state.url or 'Unknown'} - {current_title or 'Unknown'}")
+                                
+                                # Get element context for retry
+                                retry_search_terms = await extract_ranked_terms(session.page, instruction)
+                                retry_element_context = await PersistentPlaywright.get_element_context_async(session, retry_search_terms)
+                                retry_learned_selectors = await PersistentPlaywright.get_learned_selectors_async(session, retry_search_terms)
                             
                             # Build retry element context string
                             retry_element_context_str = ""
@@ -440,6 +489,7 @@ class PersistentPlaywright:
                                     retry_element_context_str += f"""
                                     Element: {ctx['search_term']} (Index: {ctx['element_index']})
                                     - Tag: {ctx['tag_name']}
+                                    - Suggested selector: {ctx.get('selector', 'None')}
                                     - Attributes: {ctx['attributes']}
                                     - HTML: {ctx['outer_html'][:300]}...
                                     """
@@ -452,17 +502,20 @@ class PersistentPlaywright:
                             RETRY CONTEXT:
                             - Attempt: {attempt + 1} of {max_retries + 1}
                             - Error Type: {type(e).__name__}
-                            - Screenshot saved to: {screenshot_path if screenshot_path else 'Failed to save'}
+                            - Screenshot saved to: {screenshot_artifact.url if screenshot_artifact else 'Failed to save'}
 
                             CURRENT PAGE CONTEXT:
-                            - URL: {current_state.get('url', 'Unknown')}
-                            - Title: {current_state.get('title', 'Unknown')}
-                            - HTML Preview: {current_state.get('html', '')[:2000]}...
-                            - Error Screenshot (Base64): {error_screenshot_b64}
+                            - URL: {current_state.url or 'Unknown'}
+                            - Title: {current_title or 'Unknown'}
+                            - {current_overview}
+                            - Screenshot: {'a downscaled image of the current viewport is attached to the user message' if error_screenshot else 'unavailable'}
 
                             RELEVANT ELEMENT CONTEXT FOR RETRY:
                             {retry_element_context_str}
 
+                            KNOWN WORKING SELECTORS ON THIS PAGE:
+                            {retry_learned_selectors or 'None'}
+
                             PREVIOUS FAILED CODE:
                             {code}
 
@@ -476,7 +529,7 @@ class PersistentPlaywright:
                             7. For anchor tags, use `get_by_role("link")` or `locator('a[href*="..."]')`
                             8. For buttons, use `get_by_role("button")` with specific names
                             9. Use `.first`, `.nth(0)`, or more specific selectors to avoid strict mode violations
-                            10. Add appropriate waits: `await _async_page.wait_for_load_state('networkidle')`
+                            10. Wait for the page to settle after actions: `await settled()` (do not use 'networkidle')
 
                             SELECTOR PRIORITY FOR RETRY (based on actual HTML):
                             - Use the exact attributes from the element context above
@@ -511,55 +564,165 @@ class PersistentPlaywright:
                             
                             # Regenerate code with error context
                             print(f"Regenerating code for attempt {attempt + 2} with error context...")
-                            retry_resp = client.chat.completions.create(
-                                model="gpt-4o",
-                                messages=[
-                                    {"role": "system", "content": retry_system_prompt},
-                                    {"role": "user", "content": f"Original instruction: {instruction}\n\nPlease fix the code to handle the error: {str(e)}"}
-                                ],
-                                temperature=0,
-                            )
-                            code = retry_resp.choices[0].message.content.strip()
+                            user_content = [
+                                {"type": "text", "text": f"Original instruction: {instruction}\n\nPlease fix the code to handle the error: {str(e)}"}
+                            ]
+                            if error_screenshot is not None:
+                                user_content.append(image_part(await error_screenshot.base64(), error_screenshot.mime_type))
+                            messages = [
+                                {"role": "system", "content": retry_system_prompt},
+                                {"role": "user", "content": user_content}
+                            ]
+                            prompt_sizes.append({"attempt": attempt + 2, **measure_messages(messages)})
+                            print(f"Prompt size (attempt {attempt + 2}): {prompt_sizes[-1]}")
+                            code = await stream_completion(messages, progress=progress, timer=timer, stage="retry.llm")
                             code = PersistentPlaywright.clean_code_block(code)
                             print(f" Regenerated code for attempt {attempt + 2}:\n{code}")
                             
                         except Exception as retry_error:
                             print(f" Error during retry code generation: {str(retry_error)}")
+                            FAILURES_TOTAL.inc(stage="retry.llm")
                     
                     # If this is the last attempt, return error
                     if attempt == max_retries:
                         print(f" All {max_retries + 1} attempts failed. Taking final debug screenshot...")
                         # Try to get a screenshot for debugging
                         try:
-                            debug_screenshot = await _async_page.screenshot(full_page=True)
-                            debug_b64 = base64.b64encode(debug_screenshot).decode('utf-8')
-                            final_screenshot_path = await PersistentPlaywright.save_screenshot_to_file(
-                                debug_b64, 
-                                "final_debug_screenshot"
-                            )
-                            print(f"📸 Final debug screenshot saved to: {final_screenshot_path}")
+                            debug_screenshot = await capture_screenshot(session.page, ScreenshotOptions(full_page=True))
+                            debug_artifact = await PersistentPlaywright.store_screenshot(debug_screenshot, "final debug")
                         except Exception as screenshot_error:
                             print(f" Failed to save final debug screenshot: {screenshot_error}")
-                            debug_b64 = None
-                            final_screenshot_path = None
+                            debug_artifact = None
                         
                         return {
                             "executed_code": code, 
                             "status": "error", 
                             "message": f"Execution error after {max_retries + 1} attempts: {str(e)}",
-                            "page_state": await PersistentPlaywright.get_page_state_async(),
-                            "debug_screenshot": debug_b64,
-                            "final_screenshot_path": final_screenshot_path
+                            "page_state": await PersistentPlaywright.get_page_state_async(session),
+                            "prompt_sizes": prompt_sizes,
+                            "timings": timer.finish("error"),
+                            "debug_screenshot_id": debug_artifact.id if debug_artifact else None,
+                            "debug_screenshot_url": debug_artifact.url if debug_artifact else None,
+                            "debug_screenshot_type": debug_artifact.mime_type if debug_artifact else None,
+                            "final_screenshot_path": str(debug_artifact.path) if debug_artifact else None
                         }
                     
-                    # Wait a bit before retry
-                    print(f"⏳ Waiting 2 seconds before retry attempt {attempt + 2}...")
-                    await asyncio.sleep(2)
+                    # Let the page settle before retrying instead of sleeping a fixed time
+                    print(f"⏳ Waiting for the page to settle before retry attempt {attempt + 2}...")
+                    with timer.span("settle"):
+                        await wait_for_settled(session.page)
         except Exception as e:
             print(f" Error generating code: {str(e)}")
+            FAILURES_TOTAL.inc(stage="generation")
             return {
                 "executed_code": "", 
                 "status": "error", 
                 "message": f"Code generation error: {str(e)}",
-                "page_state": await PersistentPlaywright.get_page_state_async()
+                "prompt_sizes": prompt_sizes,
+                "timings": timer.finish("error"),
+                "page_state": await PersistentPlaywright.get_page_state_async(session)
             }
+
+    @staticmethod
+    async def execute_plan_async(session: BrowserSession, instruction: str,
+                                 progress: Optional[ProgressCallback] = None):
+        """
+        Execute an instruction that may contain several actions.
+
+        Single actions go straight to `execute_instruction_async`. Compound
+        ones are split into steps by one planning call; each step is then
+        generated, validated and run on its own, with the page settling in
+        between. Steps run without the single instruction's own retries; a
+        failed step is instead re-run by itself (up to PLAN_STEP_RETRIES
+        times) after the page settles, and stops the plan if it still fails. The result has the same
+        shape as a single instruction's, plus `plan` and per-step `steps`.
+        """
+        if not PLANNER_ENABLED or not looks_compound(instruction):
+            return await PersistentPlaywright.execute_instruction_async(session, instruction, progress=progress)
+        if session is None or session.closed:
+            raise RuntimeError("Async browser not open. Call `open_async()` first.")
+
+        timer = InstructionTimer()
+        if progress:
+            await progress("Planning steps…")
+        plan = await plan_instruction(instruction, session.page.url, timer=timer)
+        print(f"Plan for '{instruction}': {plan}")
+        if len(plan) < 2:
+            return await PersistentPlaywright.execute_instruction_async(session, plan[0] if plan else instruction, progress=progress)
+        if progress:
+            await progress("Plan: " + " → ".join(plan))
+
+        steps = []
+        result = None
+        step_timings = {}
+        for index, step in enumerate(plan):
+            label = f"Step {index + 1}/{len(plan)}"
+            step_url = session.page.url
+            for attempt in range(PLAN_STEP_RETRIES + 1):
+                if progress:
+                    await progress(f"{label}: {step}" + (f" (retry {attempt})" if attempt else ""))
+                result = await PersistentPlaywright.execute_instruction_async(session, step, progress=progress, max_retries=0)
+                if result["status"] == "success" or attempt == PLAN_STEP_RETRIES:
+                    break
+                # Retry just this step once the page has caught up; earlier steps stay done
+                await wait_for_settled(session.page)
+
+            steps.append({
+                "step": index + 1,
+                "instruction": step,
+                "url": step_url,
+                "status": result["status"],
+                "message": result["message"],
+                "executed_code": result.get("executed_code", ""),
+                "attempts": attempt + 1,
+                "cache_hit": result.get("cache_hit", False),
+                "timings": result.get("timings", {}),
+            })
+            for stage, ms in result.get("timings", {}).items():
+                if stage != "total":
+                    step_timings[stage] = step_timings.get(stage, 0.0) + ms
+            if progress:
+                await progress(f"{label} {'done' if result['status'] == 'success' else 'failed'}: {step}")
+            if result["status"] != "success":
+                break
+            if index + 1 < len(plan):
+                with timer.span("settle"):
+                    await wait_for_settled(session.page)
+        # Planning and between-step settling, plus every step's stages summed
+        timings = timer.as_dict()
+        for stage, ms in step_timings.items():
+            timings[stage] = round(timings.get(stage, 0.0) + ms, 1)
+
+        failed = steps[-1]["status"] != "success"
+        message = (f"Step {len(steps)}/{len(plan)} ({steps[-1]['instruction']}) failed: {result['message']}"
+                   if failed else f"Completed {len(plan)} steps")
+        return {
+            **result,
+            "executed_code": "\n\n".join(f"# {s['instruction']}\n{s['executed_code']}" for s in steps),
+            "status": "error" if failed else "success",
+            "message": message,
+            "cache_hit": all(s["cache_hit"] for s in steps),
+            "timings": timings,
+            "plan": plan,
+            "steps": steps,
+        }
+
+    @staticmethod
+    async def replay_macro_async(session: BrowserSession, macro: Macro, heal: bool = True,
+                                 progress: Optional[ProgressCallback] = None) -> dict:
+        """
+        Replay a recorded macro on the session's page without calling the LLM.
+        With `heal`, a step whose target element is gone is regenerated from
+        its original instruction instead of failing the replay.
+        """
+        if session is None or session.closed:
+            raise RuntimeError("Async browser not open. Call `open_async()` first.")
+
+        async def regenerate(step: MacroStep) -> dict:
+            if progress:
+                await progress(f"Regenerating step: {step.instruction}")
+            return await PersistentPlaywright.execute_instruction_async(session, step.instruction, progress=progress)
+
+        result = await replay_macro(session.page, macro, heal=regenerate if heal else None, progress=progress)
+        result["page_state"] = await PersistentPlaywright.get_page_state_async(session)
+        return result
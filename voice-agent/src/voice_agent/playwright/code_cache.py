@@ -0,0 +1,121 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page as AsyncPage
+from ..constants import CODE_CACHE_MAX_ENTRIES, CODE_CACHE_TTL
+
+# Words that do not change what the user is asking for
+_FILLER_WORDS = {"please", "can", "you", "could", "would", "kindly", "now", "just", "the", "a", "an"}
+
+# Hashes the structure of the page's interactive elements in-page, so only
+# a short digest crosses the CDP boundary.
+_FINGERPRINT_JS = """
+() => {
+    const nodes = document.querySelectorAll(
+        'a, button, input, select, textarea, [role], [contenteditable="true"]'
+    );
+    let hash = 0x811c9dc5;
+    const feed = (str) => {
+        for (let i = 0; i < str.length; i++) {
+            hash ^= str.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193) >>> 0;
+        }
+    };
+    for (const el of nodes) {
+        const label = (el.tagName === 'A' || el.tagName === 'BUTTON')
+            ? (el.innerText || '').trim().slice(0, 40) : '';
+        feed([
+            el.tagName,
+            el.getAttribute('role') || '',
+            el.getAttribute('type') || '',
+            el.id || '',
+            el.getAttribute('name') || '',
+            el.getAttribute('aria-label') || '',
+            el.getAttribute('placeholder') || '',
+            label,
+        ].join('|') + ';');
+    }
+    return nodes.length + ':' + hash.toString(16);
+}
+"""
+
+
+def normalize_instruction(instruction: str) -> str:
+    """Lower-case, strip punctuation and filler words so equivalent phrasings share a key."""
+    text = instruction.lower().strip()
+    text = re.sub(r"[^\w\s'\"@.-]", " ", text)
+    text = text.rstrip(".")
+    words = [w for w in text.split() if w not in _FILLER_WORDS]
+    return " ".join(words)
+
+
+async def page_fingerprint(page: AsyncPage) -> str:
+    """Structural fingerprint of a page: URL path plus a hash of its interactive elements."""
+    path = urlparse(page.url).path or "/"
+    try:
+        digest = await page.evaluate(_FINGERPRINT_JS)
+    except Exception as e:
+        print(f"Failed to fingerprint page: {e}")
+        digest = "unknown"
+    return f"{path}#{digest}"
+
+
+class CodeCache:
+    """LRU/TTL cache of generated code that executed successfully."""
+
+    def __init__(self, max_entries: int = CODE_CACHE_MAX_ENTRIES, ttl: float = CODE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    async def make_key(page: AsyncPage, instruction: str) -> tuple:
+        return normalize_instruction(instruction), await page_fingerprint(page)
+
+    def get(self, key: tuple) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        code, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return code
+
+    def put(self, key: tuple, code: str):
+        self._entries[key] = (code, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: tuple):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+            print(f"Invalidated cached code for: {key[0]}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+code_cache = CodeCache()
@@ -0,0 +1,213 @@
+import ast
+import asyncio
+import base64
+import builtins
+import hashlib
+import inspect
+import re
+import textwrap
+from collections import OrderedDict
+from functools import partial
+from types import CodeType
+from urllib.parse import urlparse
+from ..constants import ALLOWED_DOMAIN
+from .stability import wait_for_settled
+
+# Builtins generated code may reference
+SAFE_BUILTIN_NAMES = {
+    "print", "len", "range", "str", "int", "float", "bool", "list", "dict", "tuple", "set",
+    "enumerate", "zip", "min", "max", "sum", "any", "all", "sorted", "reversed", "round", "abs",
+    "isinstance", "Exception", "ValueError", "RuntimeError", "TimeoutError", "AssertionError",
+    "KeyError", "IndexError",
+}
+
+# Module-level names injected into the execution globals
+ALLOWED_GLOBAL_NAMES = {"_async_page", "asyncio", "re", "base64", "settled"}
+
+# Attributes that may be accessed directly on `_async_page`
+ALLOWED_PAGE_ATTRS = {
+    "locator", "get_by_role", "get_by_text", "get_by_label", "get_by_placeholder",
+    "get_by_test_id", "get_by_alt_text", "get_by_title", "frame_locator",
+    "wait_for_load_state", "wait_for_selector", "wait_for_timeout", "wait_for_url",
+    "url", "title", "content", "viewport_size",
+    "click", "dblclick", "fill", "type", "press", "hover", "check", "uncheck", "select_option",
+    "is_visible", "is_hidden", "is_enabled", "text_content", "inner_text", "input_value",
+    "query_selector", "query_selector_all",
+    "keyboard", "mouse", "screenshot", "go_back", "go_forward", "reload", "goto",
+}
+
+# Attributes that may be accessed on helper modules
+ALLOWED_MODULE_ATTRS = {
+    "asyncio": {"sleep", "wait_for", "gather", "TimeoutError"},
+    "base64": {"b64encode", "b64decode"},
+    "re": {"compile", "search", "match", "fullmatch", "findall", "sub", "escape", "IGNORECASE", "I"},
+}
+
+# Globals usable only as the direct receiver of an allow-listed attribute, so an
+# alias (`p = _async_page`, `[asyncio][0]`, `f(re)`) cannot dodge the lists above
+RECEIVER_ONLY_NAMES = {"_async_page", *ALLOWED_MODULE_ATTRS}
+
+# Introspection attributes that can reach frames or globals without dunder names
+DENIED_ATTRS = {
+    "format", "format_map", "cr_frame", "gi_frame", "ag_frame", "f_globals", "f_locals",
+    "f_builtins", "f_back", "tb_frame", "tb_next", "with_traceback",
+}
+
+# Playwright attributes denied on any receiver (locators, element handles, frames, ...):
+# they climb back to the page/context/browser, run script in the page, intercept
+# traffic, make raw HTTP requests or read and write local files
+DENIED_PLAYWRIGHT_ATTRS = {
+    "page", "context", "browser", "browser_type", "frames", "main_frame", "frame", "owner_frame",
+    "content_frame", "opener", "request",
+    "evaluate", "evaluate_all", "evaluate_handle", "eval_on_selector", "eval_on_selector_all",
+    "wait_for_function", "add_init_script", "add_script_tag", "add_style_tag", "set_content",
+    "expose_function", "expose_binding",
+    "route", "route_from_har", "route_web_socket", "unroute", "unroute_all",
+    "set_extra_http_headers", "set_input_files", "save_as", "pdf",
+}
+
+# Compiled code objects memoized by source hash
+MAX_COMPILED_ENTRIES = 256
+_compiled: "OrderedDict[str, CodeType]" = OrderedDict()
+
+
+class UnsafeCodeError(ValueError):
+    """Raised when generated code fails static validation."""
+
+
+class _Validator(ast.NodeVisitor):
+    def __init__(self, allowed_names: set):
+        self.allowed_names = allowed_names
+        self.assigned = set()
+        # `.goto` attribute nodes whose call target has been checked
+        self.checked_gotos = set()
+        # Receiver-only name nodes that appear as `<name>.<allowed attribute>`
+        self.checked_receivers = set()
+
+    def fail(self, node: ast.AST, reason: str):
+        raise UnsafeCodeError(f"line {getattr(node, 'lineno', '?')}: {reason}")
+
+    def visit_Import(self, node):
+        self.fail(node, "imports are not allowed")
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Global(self, node):
+        self.fail(node, "global/nonlocal statements are not allowed")
+
+    visit_Nonlocal = visit_Global
+
+    def visit_FunctionDef(self, node):
+        self.fail(node, "function definitions are not allowed")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.fail(node, "class definitions are not allowed")
+
+    def visit_Name(self, node: ast.Name):
+        if node.id.startswith("__"):
+            self.fail(node, f"dunder name '{node.id}' is not allowed")
+        if isinstance(node.ctx, ast.Load) and node.id not in self.allowed_names and node.id not in self.assigned:
+            self.fail(node, f"name '{node.id}' is not allowed")
+        if node.id in ALLOWED_GLOBAL_NAMES and not isinstance(node.ctx, ast.Load):
+            self.fail(node, f"'{node.id}' may not be reassigned")
+        if node.id in RECEIVER_ONLY_NAMES and id(node) not in self.checked_receivers:
+            self.fail(node, f"'{node.id}' may only be used as '{node.id}.<attribute>'")
+
+    def visit_Attribute(self, node: ast.Attribute):
+        if node.attr.startswith("_"):
+            self.fail(node, f"private attribute '{node.attr}' is not allowed")
+        if node.attr in DENIED_ATTRS or node.attr in DENIED_PLAYWRIGHT_ATTRS:
+            self.fail(node, f"attribute '{node.attr}' is not allowed")
+        if node.attr == "goto" and id(node) not in self.checked_gotos:
+            self.fail(node, "goto must be called directly with a literal URL")
+        if isinstance(node.value, ast.Name):
+            owner = node.value.id
+            if owner == "_async_page" and node.attr not in ALLOWED_PAGE_ATTRS:
+                self.fail(node, f"'_async_page.{node.attr}' is not allowed")
+            if owner in ALLOWED_MODULE_ATTRS and node.attr not in ALLOWED_MODULE_ATTRS[owner]:
+                self.fail(node, f"'{owner}.{node.attr}' is not allowed")
+            self.checked_receivers.add(id(node.value))
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr == "goto":
+            self._check_goto(node)
+            self.checked_gotos.add(id(func))
+        self.generic_visit(node)
+
+    def _check_goto(self, node: ast.Call):
+        target = node.args[0] if node.args else next((k.value for k in node.keywords if k.arg == "url"), None)
+        if not (isinstance(target, ast.Constant) and isinstance(target.value, str)):
+            self.fail(node, "goto() target must be a string literal")
+        # Absolute http(s) URLs on the allowed host only: no file:, javascript:, data: or relative URLs
+        parsed = urlparse(target.value)
+        if parsed.scheme not in ("http", "https") or parsed.hostname != ALLOWED_DOMAIN:
+            self.fail(node, f"navigation outside allowed domain: {target.value}")
+
+
+def _collect_assigned_names(tree: ast.AST) -> set:
+    """Names bound anywhere in the code (assignments, loop targets, except/with aliases)."""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+    return names
+
+
+def validate_generated_code(code: str, allowed_names: set = frozenset()) -> ast.Module:
+    """Parse and statically validate generated code. Raises UnsafeCodeError on violations."""
+    try:
+        tree = compile(textwrap.dedent(code), "<generated>", "exec",
+                       flags=ast.PyCF_ONLY_AST | ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+    except SyntaxError as e:
+        raise UnsafeCodeError(f"syntax error on line {e.lineno}: {e.msg}")
+
+    validator = _Validator(SAFE_BUILTIN_NAMES | ALLOWED_GLOBAL_NAMES | set(allowed_names))
+    validator.assigned = _collect_assigned_names(tree) - ALLOWED_GLOBAL_NAMES
+    validator.visit(tree)
+    return tree
+
+
+def compile_generated_code(code: str, allowed_names: set = frozenset()) -> CodeType:
+    """Validate and compile generated code once; later calls with the same source reuse the code object."""
+    key = hashlib.sha256((code + "\0" + ",".join(sorted(allowed_names))).encode("utf-8")).hexdigest()
+    compiled = _compiled.get(key)
+    if compiled is not None:
+        _compiled.move_to_end(key)
+        return compiled
+
+    tree = validate_generated_code(code, allowed_names)
+    compiled = compile(tree, "<generated>", "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+    _compiled[key] = compiled
+    while len(_compiled) > MAX_COMPILED_ENTRIES:
+        _compiled.popitem(last=False)
+    return compiled
+
+
+def build_globals(page, extra: dict = None) -> dict:
+    """Fresh execution globals with a restricted set of builtins."""
+    safe_globals = {
+        "__builtins__": {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES},
+        "_async_page": page,
+        "asyncio": asyncio,
+        "re": re,
+        "base64": base64,
+        # `await settled()` waits for the DOM to stop changing
+        "settled": partial(wait_for_settled, page),
+    }
+    if extra:
+        safe_globals.update(extra)
+    return safe_globals
+
+
+async def run_compiled(compiled: CodeType, safe_globals: dict):
+    """Run a compiled code object, awaiting it when it contains top-level `await`."""
+    result = eval(compiled, safe_globals)
+    if inspect.iscoroutine(result):
+        await result
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from playwright.async_api import Browser as AsyncBrowser, BrowserContext as AsyncContext, Page as AsyncPage
+from ..constants import CONTEXT_POOL_SIZE, CONTEXT_POOL_MAX_IDLE
+from .element_index import install_element_index
+from .resource_policy import install_resource_policy
+
+DEFAULT_VIEWPORT = {"width": 1280, "height": 800}
+
+
+class WarmContext:
+    """A fresh context with a page already navigated to the pool's URL."""
+
+    def __init__(self, context: AsyncContext, page: AsyncPage):
+        self.context = context
+        self.page = page
+        self.created_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class ContextPool:
+    """
+    Keeps `size` browser contexts open and already navigated to `url`.
+
+    Contexts are never reused between clients: a checked-out context belongs
+    to that session until it is closed, and replacements are created in the
+    background so the next connect finds a warm one waiting.
+    """
+
+    def __init__(self, get_browser: Callable[[], Awaitable[AsyncBrowser]], url: str,
+                 size: int = CONTEXT_POOL_SIZE, max_idle: float = CONTEXT_POOL_MAX_IDLE,
+                 storage_state: Optional[Callable[[], Optional[dict]]] = None, resource_policy: str = "off"):
+        self.get_browser = get_browser
+        self.url = url
+        self.storage_state = storage_state
+        self.resource_policy = resource_policy
+        self.size = size
+        self.max_idle = max_idle
+        self._ready: list[WarmContext] = []
+        self._pending = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._stopped = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> int:
+        return len(self._ready)
+
+    async def _create(self) -> WarmContext:
+        browser = await self.get_browser()
+        options = {"viewport": DEFAULT_VIEWPORT}
+        state = self.storage_state() if self.storage_state else None
+        if state:
+            options["storage_state"] = state
+        context = await browser.new_context(**options)
+        try:
+            await install_element_index(context)
+            await install_resource_policy(context, self.resource_policy)
+            page = await context.new_page()
+            await page.goto(self.url)
+        except Exception:
+            await context.close()
+            raise
+        return WarmContext(context, page)
+
+    async def _fill_one(self):
+        try:
+            warm = await self._create()
+        except Exception as e:
+            print(f"Failed to warm a browser context: {e}")
+            return
+        finally:
+            self._pending -= 1
+
+        if self._stopped:
+            await warm.context.close()
+        else:
+            self._ready.append(warm)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def top_up(self):
+        """Start background creation of contexts until the pool is back at `size`."""
+        while not self._stopped and len(self._ready) + self._pending < self.size:
+            self._pending += 1
+            self._spawn(self._fill_one())
+
+    def flush(self):
+        """Replace every idle context, e.g. after the login state they were created with changed."""
+        stale, self._ready = self._ready, []
+        for warm in stale:
+            self._spawn(self._discard(warm))
+        self.top_up()
+
+    async def start(self):
+        """Launch the browser and wait until the pool is full."""
+        await self.get_browser()
+        self.top_up()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        print(f"Context pool ready ({self.available}/{self.size} warm at {self.url})")
+
+    async def checkout(self) -> Optional[WarmContext]:
+        """Take a warm context, or None if none is usable. Always schedules a replacement."""
+        warm = None
+        while self._ready:
+            candidate = self._ready.pop(0)
+            if candidate.age <= self.max_idle and not candidate.page.is_closed():
+                warm = candidate
+                break
+            # Stale or crashed: drop it and look at the next one
+            await self._discard(candidate)
+
+        if warm is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.top_up()
+        return warm
+
+    async def _discard(self, warm: WarmContext):
+        try:
+            await warm.context.close()
+        except Exception as e:
+            print(f"Error closing pooled context: {e}")
+
+    async def stop(self):
+        """Cancel pending warm-ups and close idle contexts."""
+        self._stopped = True
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        while self._ready:
+            await self._discard(self._ready.pop())
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "available": self.available,
+            "pending": self._pending,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,55 @@
+from playwright.async_api import Page as AsyncPage
+
+# Finds the deepest elements whose text contains each term and serializes
+# everything the prompt needs in a single evaluate() round trip.
+ELEMENT_CONTEXT_JS = """
+({terms, perTerm, htmlLimit}) => {
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'HEAD']);
+    const all = Array.from(document.body ? document.body.querySelectorAll('*') : [])
+        .filter(el => !SKIP.has(el.tagName));
+    const lowered = new Map(all.map(el => [el, (el.textContent || '').toLowerCase()]));
+
+    const contexts = [];
+    for (const term of terms) {
+        const needle = String(term).toLowerCase();
+        if (!needle) continue;
+        let index = 0;
+        for (const el of all) {
+            if (index >= perTerm) break;
+            if (!lowered.get(el).includes(needle)) continue;
+            // Keep only the deepest match, like Playwright's text selectors
+            const childMatches = Array.from(el.children).some(
+                child => (lowered.get(child) || '').includes(needle)
+            );
+            if (childMatches) continue;
+
+            const attributes = {};
+            for (const attr of el.attributes) attributes[attr.name] = attr.value;
+            const rect = el.getBoundingClientRect();
+            const parent = el.parentElement;
+            contexts.push({
+                search_term: term,
+                element_index: index,
+                tag_name: el.tagName,
+                attributes,
+                outer_html: el.outerHTML.slice(0, htmlLimit),
+                parent_html: parent ? parent.outerHTML.slice(0, htmlLimit) : null,
+                bounding_box: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+            });
+            index++;
+        }
+    }
+    return contexts;
+}
+"""
+
+
+async def extract_element_context(page: AsyncPage, search_terms: list, per_term: int = 3,
+                                  html_limit: int = 1000) -> list:
+    """Return context for up to `per_term` matches of every term in one CDP round trip."""
+    if not search_terms:
+        return []
+    return await page.evaluate(
+        ELEMENT_CONTEXT_JS,
+        {"terms": list(search_terms), "perTerm": per_term, "htmlLimit": html_limit},
+    )
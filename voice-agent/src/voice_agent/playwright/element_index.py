@@ -0,0 +1,292 @@
+from typing import Union
+from playwright.async_api import Page as AsyncPage, BrowserContext as AsyncContext
+
+# Init script that keeps a compact index of interactive elements in
+# `window.__vaIndex`. A MutationObserver marks changed subtrees dirty and the
+# index re-scans only those subtrees on the next query, so lookups never walk
+# the whole DOM once the first scan is done.
+ELEMENT_INDEX_JS = r"""
+(() => {
+    if (window.__vaIndex) return;
+
+    const INTERACTIVE = [
+        'a[href]', 'button', 'input:not([type=hidden])', 'select', 'textarea', 'summary',
+        '[role=button]', '[role=link]', '[role=tab]', '[role=menuitem]', '[role=checkbox]',
+        '[role=radio]', '[role=switch]', '[role=option]', '[role=combobox]', '[role=textbox]',
+        '[onclick]', '[contenteditable=""]', '[contenteditable=true]',
+    ].join(',');
+    const KEY_ATTRS = ['id', 'name', 'type', 'href', 'placeholder', 'aria-label', 'data-testid', 'data-test', 'title'];
+    const MAX_DIRTY = 500;
+
+    const entries = new Map();  // element -> entry
+    const tokens = new Map();   // token -> Set<element>
+    const dirty = new Set();
+    let fullScan = true;
+    let needsPurge = false;
+
+    const tokenize = (text) => text.toLowerCase().split(/[^\p{L}\p{N}@._-]+/u).filter(Boolean);
+    const squash = (text) => (text || '').replace(/\s+/g, ' ').trim();
+
+    const implicitRole = (el) => {
+        const explicit = el.getAttribute('role');
+        if (explicit) return explicit.split(' ')[0];
+        const tag = el.tagName;
+        if (tag === 'A') return 'link';
+        if (tag === 'BUTTON' || tag === 'SUMMARY') return 'button';
+        if (tag === 'SELECT') return el.multiple ? 'listbox' : 'combobox';
+        if (tag === 'TEXTAREA') return 'textbox';
+        if (tag === 'INPUT') {
+            const type = (el.getAttribute('type') || 'text').toLowerCase();
+            if (type === 'checkbox' || type === 'radio') return type;
+            if (['button', 'submit', 'reset', 'image'].includes(type)) return 'button';
+            if (type === 'search') return 'searchbox';
+            if (type === 'range') return 'slider';
+            return 'textbox';
+        }
+        return 'generic';
+    };
+
+    const accessibleName = (el) => {
+        const label = el.getAttribute('aria-label');
+        if (label) return squash(label);
+        const labelledBy = el.getAttribute('aria-labelledby');
+        if (labelledBy) {
+            const text = labelledBy.split(/\s+/)
+                .map(id => document.getElementById(id)?.textContent || '').join(' ');
+            if (squash(text)) return squash(text);
+        }
+        if (el.labels && el.labels.length) return squash(el.labels[0].textContent);
+        if (el.tagName === 'INPUT' || el.tagName === 'TEXTAREA') {
+            const hint = el.getAttribute('placeholder') || el.getAttribute('title');
+            if (hint) return squash(hint);
+            if (['button', 'submit', 'reset'].includes(el.type)) return squash(el.value);
+        }
+        const text = squash(el.textContent).slice(0, 80);
+        return text || squash(el.getAttribute('title') || el.getAttribute('alt') || '');
+    };
+
+    // Escapes a value for a double-quoted selector attribute
+    const quoted = (value) => `"${value.replace(/\\/g, '\\\\').replace(/"/g, '\\"')}"`;
+
+    const stableSelector = (el, role, name) => {
+        for (const attr of ['data-testid', 'data-test']) {
+            const testId = el.getAttribute(attr);
+            if (testId) return `[${attr}=${quoted(testId)}]`;
+        }
+        if (el.id && !/\d{4,}/.test(el.id)) return `#${CSS.escape(el.id)}`;
+        const nameAttr = el.getAttribute('name');
+        if (nameAttr) return `${el.tagName.toLowerCase()}[name=${quoted(nameAttr)}]`;
+        if (name && role !== 'generic') return `role=${role}[name=${quoted(name)}]`;
+        if (name) return `text=${name}`;
+        return el.tagName.toLowerCase();
+    };
+
+    const remove = (el) => {
+        const entry = entries.get(el);
+        if (!entry) return;
+        for (const token of entry.tokens) {
+            const set = tokens.get(token);
+            if (!set) continue;
+            set.delete(el);
+            if (!set.size) tokens.delete(token);
+        }
+        entries.delete(el);
+    };
+
+    const add = (el) => {
+        remove(el);
+        if (!el.isConnected || !el.matches(INTERACTIVE)) return;
+        const role = implicitRole(el);
+        const name = accessibleName(el);
+        const attributes = {};
+        for (const key of KEY_ATTRS) {
+            const value = el.getAttribute(key);
+            if (value) attributes[key] = value;
+        }
+        const search = [name, ...Object.values(attributes)].join(' ').toLowerCase();
+        const entry = {
+            tag: el.tagName,
+            role,
+            name,
+            attributes,
+            selector: stableSelector(el, role, name),
+            search,
+            tokens: new Set(tokenize(search)),
+        };
+        entries.set(el, entry);
+        for (const token of entry.tokens) {
+            if (!tokens.has(token)) tokens.set(token, new Set());
+            tokens.get(token).add(el);
+        }
+    };
+
+    const indexSubtree = (root) => {
+        if (!root || root.nodeType !== 1) return;
+        add(root);
+        root.querySelectorAll(INTERACTIVE).forEach(add);
+    };
+
+    const flush = () => {
+        if (fullScan) {
+            entries.clear();
+            tokens.clear();
+            indexSubtree(document.body);
+            fullScan = false;
+        } else {
+            if (needsPurge) {
+                for (const el of Array.from(entries.keys())) {
+                    if (!el.isConnected) remove(el);
+                }
+            }
+            for (const node of dirty) {
+                if (node.isConnected) indexSubtree(node);
+            }
+        }
+        dirty.clear();
+        needsPurge = false;
+    };
+
+    const markDirty = (el) => {
+        if (fullScan || !el) return;
+        dirty.add(el);
+        if (dirty.size > MAX_DIRTY) {
+            fullScan = true;
+            dirty.clear();
+        }
+    };
+
+    // Text or child changes inside an interactive element can change its name
+    const markOwner = (node) => {
+        const el = node.nodeType === 1 ? node : node.parentElement;
+        markDirty(el && el.closest(INTERACTIVE));
+    };
+
+    const observer = new MutationObserver((mutations) => {
+        for (const m of mutations) {
+            if (m.type === 'childList') {
+                markOwner(m.target);
+                m.addedNodes.forEach(n => n.nodeType === 1 && markDirty(n));
+                if (m.removedNodes.length) needsPurge = true;
+            } else if (m.type === 'attributes') {
+                markDirty(m.target);
+            } else {
+                markOwner(m.target);
+            }
+        }
+    });
+    observer.observe(document, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: ['role', 'aria-label', 'aria-labelledby', 'name', 'id',
+                                            'placeholder', 'href', 'type', 'data-testid', 'disabled'],
+    });
+
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+
+    const describe = (el, entry, extra) => {
+        const rect = el.getBoundingClientRect();
+        return Object.assign({
+            tag_name: entry.tag,
+            role: entry.role,
+            name: entry.name,
+            selector: entry.selector,
+            attributes: entry.attributes,
+            visible: rect.width > 0 && rect.height > 0,
+            bounding_box: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+        }, extra || {});
+    };
+
+    window.__vaIndex = {
+        size() {
+            flush();
+            return entries.size;
+        },
+
+        // Matches for each term, looked up through the token index
+        query(terms, perTerm, htmlLimit) {
+            flush();
+            const results = [];
+            for (const term of terms) {
+                const needle = String(term).toLowerCase().trim();
+                const termTokens = tokenize(needle);
+                if (!termTokens.length) continue;
+                let candidates = null;
+                for (const token of termTokens) {
+                    const set = tokens.get(token) || new Set();
+                    if (!candidates || set.size < candidates.size) candidates = set;
+                }
+                let index = 0;
+                for (const el of candidates) {
+                    if (index >= perTerm) break;
+                    if (!el.isConnected) { remove(el); continue; }
+                    const entry = entries.get(el);
+                    if (!entry.search.includes(needle)) continue;
+                    const parent = el.parentElement;
+                    const attributes = {};
+                    for (const attr of el.attributes) attributes[attr.name] = attr.value;
+                    results.push(describe(el, entry, {
+                        search_term: term,
+                        element_index: index,
+                        attributes,
+                        outer_html: el.outerHTML.slice(0, htmlLimit),
+                        parent_html: parent ? parent.outerHTML.slice(0, htmlLimit) : null,
+                    }));
+                    index++;
+                }
+            }
+            return results;
+        },
+
+        // Every indexed element, visible ones first
+        snapshot(limit) {
+            flush();
+            const visible = [];
+            const hidden = [];
+            for (const [el, entry] of entries) {
+                if (!el.isConnected) continue;
+                (isVisible(el) ? visible : hidden).push([el, entry]);
+            }
+            return visible.concat(hidden).slice(0, limit).map(([el, entry]) => describe(el, entry));
+        },
+    };
+})();
+"""
+
+# Both return null when the init script did not run on this document
+# (e.g. pages opened before injection); callers then install it and retry.
+_QUERY_JS = """
+([terms, perTerm, htmlLimit]) => window.__vaIndex ? window.__vaIndex.query(terms, perTerm, htmlLimit) : null
+"""
+
+_SNAPSHOT_JS = """
+(limit) => window.__vaIndex ? window.__vaIndex.snapshot(limit) : null
+"""
+
+
+async def install_element_index(target: Union[AsyncContext, AsyncPage]):
+    """Inject the element index into every document loaded by a context or page."""
+    await target.add_init_script(script=ELEMENT_INDEX_JS)
+
+
+async def query_element_index(page: AsyncPage, search_terms: list, per_term: int = 3,
+                              html_limit: int = 1000) -> list:
+    """Look up indexed interactive elements whose name or key attributes contain each term."""
+    if not search_terms:
+        return []
+    args = [list(search_terms), per_term, html_limit]
+    results = await page.evaluate(_QUERY_JS, args)
+    if results is None:
+        await page.evaluate(ELEMENT_INDEX_JS)
+        results = await page.evaluate(_QUERY_JS, args)
+    return results or []
+
+
+async def snapshot_element_index(page: AsyncPage, limit: int = 200) -> list:
+    """Return up to `limit` indexed elements (role, name, selector, attributes), visible first."""
+    results = await page.evaluate(_SNAPSHOT_JS, limit)
+    if results is None:
+        await page.evaluate(ELEMENT_INDEX_JS)
+        results = await page.evaluate(_SNAPSHOT_JS, limit)
+    return results or []
@@ -0,0 +1,231 @@
+import re
+from typing import Optional
+from playwright.async_api import Page as AsyncPage, Locator as AsyncLocator
+from .selector_store import selector_store
+
+# Roles tried, in order, for "click X" when the user does not say what X is
+CLICKABLE_ROLES = ("button", "link", "tab", "menuitem", "option", "checkbox", "radio")
+# "click the X button" / "open the X tab" name the role directly
+ROLE_WORDS = {"button": "button", "link": "link", "tab": "tab", "menu item": "menuitem", "option": "option",
+              "checkbox": "checkbox", "radio button": "radio"}
+# Roles that can take typed text; "set X to Y" only routes when X is one of these
+INPUT_ROLES = ("textbox", "searchbox", "combobox", "spinbutton")
+KEY_NAMES = {"enter": "Enter", "return": "Enter", "tab": "Tab", "escape": "Escape", "esc": "Escape",
+             "space": "Space", "backspace": "Backspace", "page down": "PageDown", "page up": "PageUp"}
+SCROLL_PIXELS = 600
+
+_FILLER = re.compile(r"^(?:please\s+|can you\s+|could you\s+|now\s+|just\s+)+", re.IGNORECASE)
+_ROLE_SUFFIX = re.compile(rf"\s+({'|'.join(sorted(ROLE_WORDS, key=len, reverse=True))})$", re.IGNORECASE)
+_FIELD_SUFFIX = re.compile(r"\s+(?:field|box|input|textbox|text box)$", re.IGNORECASE)
+_DETERMINERS = re.compile(r"^(?:(?:the|a|an|my|our|your|this|that|these|those)\s+)+", re.IGNORECASE)
+# Browser actions that read like "open X" but have no element to click
+_NOT_TARGETS = re.compile(r"^new\s+(?:tab|window|page)\b|^(?:tab|window)$", re.IGNORECASE)
+
+_RULES = [
+    ("scroll", re.compile(r"^scroll\s+(?P<direction>up|down)(?:\s+(?:a\s+bit|a\s+little|more|the\s+page))?$", re.I)),
+    ("scroll", re.compile(r"^scroll\s+(?:to\s+)?(?:the\s+)?(?P<direction>top|bottom)(?:\s+of\s+the\s+page)?$", re.I)),
+    ("back", re.compile(r"^(?:go\s+)?back$", re.I)),
+    ("forward", re.compile(r"^(?:go\s+)?forward$", re.I)),
+    ("reload", re.compile(r"^(?:refresh|reload)(?:\s+the\s+page)?$", re.I)),
+    ("key", re.compile(rf"^(?:press|hit)\s+(?:the\s+)?(?P<key>{'|'.join(KEY_NAMES)})(?:\s+key)?$", re.I)),
+    ("fill", re.compile(r"^(?:type|enter|input|put|write)\s+(?P<value>.+?)\s+(?:into|in)\s+(?:the\s+)?(?P<field>.+)$", re.I)),
+    ("fill", re.compile(r"^(?:fill\s+in|fill\s+out|fill)\s+(?:the\s+)?(?P<field>.+?)\s+with\s+(?P<value>.+)$", re.I)),
+    # "set the date to tomorrow" is often not a text field at all; resolved against input roles only
+    ("set", re.compile(r"^set\s+(?:the\s+)?(?P<field>.+?)\s+to\s+(?P<value>.+)$", re.I)),
+    # Only with an explicit box, so "check the status of my order" is left to the LLM
+    ("check", re.compile(r"^(?P<verb>check|uncheck|tick|untick)\s+(?:the\s+)?(?P<target>.+?)\s+(?:check\s*box|box)$", re.I)),
+    ("click", re.compile(r"^(?:click|press|tap|hit|select|choose|open)\s+(?:on\s+)?(?:the\s+)?(?P<target>.+)$", re.I)),
+]
+
+
+class Command:
+    """A parsed fast-path command: `action` plus its target/value, before it is resolved on the page."""
+
+    def __init__(self, action: str, **fields):
+        self.action = action
+        self.fields = fields
+
+    def __getitem__(self, name):
+        return self.fields.get(name)
+
+    def __repr__(self):
+        return f"Command({self.action!r}, {self.fields!r})"
+
+
+def _unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    return text
+
+
+def _strip_determiners(text: str) -> str:
+    return _DETERMINERS.sub("", text.strip())
+
+
+def parse_command(instruction: str) -> Optional[Command]:
+    """Match an instruction against the fast-path grammar; None means "ask the LLM"."""
+    text = _FILLER.sub("", " ".join(instruction.split())).rstrip(".!?")
+    for action, pattern in _RULES:
+        match = pattern.match(text)
+        if not match:
+            continue
+        fields = {k: v for k, v in match.groupdict().items() if v is not None}
+        if action in ("fill", "set"):
+            value = _unquote(fields["value"])
+            # "type my password into Password" needs the credentials the LLM prompt carries
+            if re.match(r"^(?:my|the|our|a|an|some)\s", value, re.I):
+                return None
+            field = _unquote(_strip_determiners(_FIELD_SUFFIX.sub("", fields["field"])))
+            if not field:
+                return None
+            return Command("fill", value=value, field=field, inputs_only=action == "set")
+        if action in ("click", "check"):
+            target = _strip_determiners(fields["target"])
+            if _NOT_TARGETS.search(target):
+                return None
+            role = None
+            suffix = _ROLE_SUFFIX.search(target)
+            if suffix:
+                role = ROLE_WORDS[suffix.group(1).lower()]
+                target = target[:suffix.start()]
+            target = _unquote(target)
+            # Long or conjoined targets are more likely a description than a label
+            if not target or len(target.split()) > 6 or re.search(r"\b(?:and|then|if|which|that)\b", target, re.I):
+                return None
+            if action == "check":
+                return Command("check", target=target, checked=fields["verb"].lower() in ("check", "tick"))
+            return Command("click", target=target, role=role)
+        return Command(action, **{k: v.lower() for k, v in fields.items()})
+    return None
+
+
+async def _unique_visible(locator: AsyncLocator) -> Optional[bool]:
+    """True if the locator matches exactly one visible element, False if none, None if several."""
+    count = await locator.count()
+    if count == 0:
+        return False
+    if count > 1:
+        return None
+    return await locator.is_visible()
+
+
+async def _resolve(candidates: list) -> Optional[str]:
+    """
+    First candidate (expression, locator) that matches a single visible
+    element. Stops at the first ambiguous match rather than guessing.
+    """
+    if not candidates:
+        return None
+    # One round trip for the usual miss instead of a count() per candidate
+    combined = candidates[0][1]
+    for _, locator in candidates[1:]:
+        combined = combined.or_(locator)
+    if await combined.count() == 0:
+        return None
+    for expression, locator in candidates:
+        unique = await _unique_visible(locator)
+        if unique is None:
+            print(f"Fast path: {expression} is ambiguous")
+            return None
+        if unique:
+            return expression
+    return None
+
+
+async def _learned(page: AsyncPage, target: str, action: str, role: Optional[str] = None) -> Optional[str]:
+    """A learned selector for the target on this page that still resolves to a single visible element."""
+    for entry in selector_store.find(page.url, target=target, action=action):
+        if role and entry["method"] == "get_by_role" and entry["args"][:1] != [role]:
+            continue
+        if await selector_store.verify(page, entry) and await _unique_visible(selector_store.build_locator(page, entry)):
+            return entry["expression"]
+    return None
+
+
+def _locator_candidates(page: AsyncPage, method: str, variants: list) -> list:
+    """(source expression, locator) pairs for `_async_page.<method>(*args, **kwargs)` variants."""
+    candidates = []
+    for args, kwargs in variants:
+        rendered = ", ".join([repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()])
+        candidates.append((f"_async_page.{method}({rendered})", getattr(page, method)(*args, **kwargs)))
+    return candidates
+
+
+async def route_instruction(page: AsyncPage, instruction: str) -> Optional[str]:
+    """
+    Translate a simple command into Playwright code without the LLM.
+
+    Targets are looked up in the learned selector store first, then by role,
+    label, placeholder and text. The code uses the same `_async_page` API as
+    generated code, so it goes through the same validator, cache and macro
+    recording. Returns None when the command does not match the grammar or
+    its target is missing or ambiguous on the current page.
+    """
+    command = parse_command(instruction)
+    if command is None:
+        return None
+
+    if command.action == "scroll":
+        direction = command["direction"]
+        if direction in ("top", "bottom"):
+            return f"await _async_page.keyboard.press({'Home' if direction == 'top' else 'End'!r})"
+        return f"await _async_page.mouse.wheel(0, {SCROLL_PIXELS if direction == 'down' else -SCROLL_PIXELS})"
+    if command.action == "back":
+        return "await _async_page.go_back()"
+    if command.action == "forward":
+        return "await _async_page.go_forward()"
+    if command.action == "reload":
+        return "await _async_page.reload()"
+    if command.action == "key":
+        return f"await _async_page.keyboard.press({KEY_NAMES[command['key']]!r})"
+
+    if command.action == "fill":
+        field = command["field"]
+        learned = await _learned(page, field, "fill")
+        if learned:
+            return f"await {learned}.fill({command['value']!r})"
+        exact = [((field,), {"exact": True})]
+        if command["inputs_only"]:
+            candidates = (
+                _locator_candidates(page, "get_by_role", [((role,), {"name": field, "exact": True}) for role in INPUT_ROLES])
+                + _locator_candidates(page, "get_by_placeholder", exact)
+            )
+            expression = await _resolve(candidates)
+            return f"await {expression}.fill({command['value']!r})" if expression else None
+        candidates = (
+            _locator_candidates(page, "get_by_label", exact)
+            + _locator_candidates(page, "get_by_placeholder", exact)
+            + _locator_candidates(page, "get_by_role", [(("textbox",), {"name": field, "exact": True})])
+            + _locator_candidates(page, "get_by_label", [((field,), {})])
+            + _locator_candidates(page, "get_by_placeholder", [((field,), {})])
+        )
+        expression = await _resolve(candidates)
+        return f"await {expression}.fill({command['value']!r})" if expression else None
+
+    if command.action == "check":
+        target = command["target"]
+        action = "check" if command["checked"] else "uncheck"
+        learned = await _learned(page, target, action)
+        if learned:
+            return f"await {learned}.{action}()"
+        candidates = (
+            _locator_candidates(page, "get_by_label", [((target,), {"exact": True})])
+            + _locator_candidates(page, "get_by_role", [((role,), {"name": target, "exact": True}) for role in ("checkbox", "radio")])
+        )
+        expression = await _resolve(candidates)
+        return f"await {expression}.{action}()" if expression else None
+
+    target = command["target"]
+    learned = await _learned(page, target, "click", command["role"])
+    if learned:
+        return f"await {learned}.click()"
+    roles = [command["role"]] if command["role"] else list(CLICKABLE_ROLES)
+    candidates = (
+        _locator_candidates(page, "get_by_role", [((role,), {"name": target, "exact": True}) for role in roles])
+        + _locator_candidates(page, "get_by_role", [((role,), {"name": target}) for role in roles])
+    )
+    if not command["role"]:
+        candidates += _locator_candidates(page, "get_by_text", [((target,), {"exact": True})])
+    expression = await _resolve(candidates)
+    return f"await {expression}.click()" if expression else None
@@ -0,0 +1,121 @@
+import re
+from playwright.async_api import Page as AsyncPage
+
+# Verbs whose object is usually the element the user means
+ACTION_VERBS = {
+    "click", "press", "tap", "hit", "select", "choose", "open", "fill", "type", "enter",
+    "check", "uncheck", "toggle", "hover", "expand", "collapse", "show", "find", "search",
+    "go", "navigate", "visit", "submit",
+}
+
+# Words that describe movement rather than an element
+NON_TARGET_WORDS = {"scroll", "down", "up", "back", "forward", "wait", "reload", "refresh", "top", "bottom"}
+
+# Prepositions that introduce the target field ("type X into Email")
+TARGET_PREPOSITIONS = {"into", "in", "on", "to", "under", "inside"}
+
+STOP_WORDS = {
+    "the", "a", "an", "this", "that", "my", "our", "your", "please", "then", "and", "now",
+    "button", "link", "field", "box", "tab", "page", "section", "menu", "option",
+    "with", "for", "of", "at", "it", "me", "us", "again", "there", "here",
+} | TARGET_PREPOSITIONS
+
+_QUOTED_RE = re.compile(r"\"([^\"]{2,60})\"|“([^”]{2,60})”|‘([^’]{2,60})’|(?<!\w)'([^']{2,60})'(?!\w)")
+_WORD_RE = re.compile(r"[\w@.&'-]+")
+
+# Counts how often each term appears in the rendered (visible) text,
+# so only the counts cross the CDP boundary.
+_RANK_JS = """
+(terms) => {
+    const text = (document.body ? document.body.innerText : '').toLowerCase();
+    return terms.map(term => {
+        const needle = term.toLowerCase();
+        let count = 0, from = 0, at;
+        while ((at = text.indexOf(needle, from)) !== -1 && count < 50) { count++; from = at + needle.length; }
+        return count;
+    });
+}
+"""
+
+
+def _add(terms: list, term: str):
+    term = term.strip(" .,!?;:")
+    if len(term) < 2 or term.lower() in STOP_WORDS:
+        return
+    if term.lower() not in (t.lower() for t in terms):
+        terms.append(term)
+
+
+def _object_phrase(words: list, start: int, max_words: int = 3) -> str:
+    """Collect up to `max_words` words after `start`, stopping at stop words."""
+    phrase = []
+    for word in words[start:start + max_words + 2]:
+        if word.lower() in STOP_WORDS:
+            if phrase:
+                break
+            continue
+        phrase.append(word)
+        if len(phrase) >= max_words:
+            break
+    return " ".join(phrase)
+
+
+def extract_search_terms(instruction: str) -> list:
+    """
+    Pull likely element labels out of an instruction, most specific first:
+    quoted strings, Capitalized Phrases, then objects of action verbs and the
+    field after "into"/"in".
+    """
+    terms = []
+
+    for groups in _QUOTED_RE.findall(instruction):
+        _add(terms, "".join(groups))
+    unquoted = _QUOTED_RE.sub(" ", instruction)
+
+    words = _WORD_RE.findall(unquoted)
+    lowered = [w.lower() for w in words]
+
+    # Capitalized phrases, skipping a leading verb ("Click Get Started" -> "Get Started")
+    phrase = []
+    for i, word in enumerate(words + [""]):
+        is_cap = word[:1].isupper() and not (i == 0 and lowered[0] in ACTION_VERBS)
+        if is_cap and word.lower() not in STOP_WORDS:
+            phrase.append(word)
+            continue
+        if phrase:
+            _add(terms, " ".join(phrase))
+            phrase = []
+
+    for i, word in enumerate(lowered):
+        if word in TARGET_PREPOSITIONS and i > 0:
+            _add(terms, _object_phrase(words, i + 1))
+        elif word in ACTION_VERBS:
+            _add(terms, _object_phrase(words, i + 1))
+
+    # Bare commands like "login": fall back to the content words themselves
+    if not terms:
+        for word in words:
+            if word.lower() not in ACTION_VERBS and word.lower() not in NON_TARGET_WORDS:
+                _add(terms, word)
+
+    return terms
+
+
+async def rank_terms_on_page(page: AsyncPage, terms: list, limit: int = 5) -> list:
+    """Order terms by whether they appear in the page's visible text, dropping extras beyond `limit`."""
+    if not terms:
+        return []
+    try:
+        counts = await page.evaluate(_RANK_JS, terms)
+    except Exception as e:
+        print(f"Failed to rank search terms: {e}")
+        return terms[:limit]
+
+    # Present terms first (rarer is more specific), then absent ones in extraction order
+    ranked = sorted(range(len(terms)), key=lambda i: (counts[i] == 0, counts[i] or 0, i))
+    return [terms[i] for i in ranked][:limit]
+
+
+async def extract_ranked_terms(page: AsyncPage, instruction: str, limit: int = 5) -> list:
+    """Extract search terms from an instruction and rank them against the page."""
+    return await rank_terms_on_page(page, extract_search_terms(instruction), limit)
@@ -0,0 +1,112 @@
+import time
+from typing import Awaitable, Callable, Optional
+import httpx
+from openai import AsyncOpenAI
+from ..constants import OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL, LLM_TIMEOUT, LLM_MAX_CONNECTIONS
+from ..metrics import InstructionTimer
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+# How often (seconds) streaming progress is pushed to the caller
+PROGRESS_INTERVAL = 0.25
+
+# Rough chars-per-token ratio for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+_http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+    timeout=httpx.Timeout(LLM_TIMEOUT, connect=5.0),
+)
+
+async_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    base_url=OPENAI_BASE_URL,
+    http_client=_http_client,
+    max_retries=1,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def image_part(b64: str, mime_type: str = "image/jpeg", detail: str = "low") -> dict:
+    """Chat content part carrying an inline image for vision models."""
+    return {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{b64}", "detail": detail}}
+
+
+def measure_messages(messages: list) -> dict:
+    """Text size, estimated text tokens and inline image payload of a chat request."""
+    text_chars = 0
+    image_chars = 0
+    images = 0
+    for message in messages:
+        content = message["content"]
+        parts = [{"type": "text", "text": content}] if isinstance(content, str) else content
+        for part in parts:
+            if part["type"] == "text":
+                text_chars += len(part["text"])
+            elif part["type"] == "image_url":
+                images += 1
+                image_chars += len(part["image_url"]["url"])
+    return {
+        "text_chars": text_chars,
+        "estimated_text_tokens": text_chars // CHARS_PER_TOKEN,
+        "images": images,
+        "image_chars": image_chars,
+    }
+
+
+async def stream_completion(messages: list, progress: Optional[ProgressCallback] = None,
+                            model: str = LLM_MODEL, timeout: float = LLM_TIMEOUT,
+                            timer: Optional[InstructionTimer] = None, stage: str = "llm") -> str:
+    """
+    Stream a chat completion without blocking the event loop.
+
+    Tokens are accumulated into the returned string; `progress` (if given) is
+    awaited with a short status line at most every PROGRESS_INTERVAL seconds.
+    `timer` records `<stage>_ttft` (until the first token) and `<stage>_stream`
+    (the rest), which add up to the call's duration.
+    """
+    started = time.perf_counter()
+    first_token = None
+    last_progress = 0.0
+    chunks = []
+
+    stream = await async_client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0,
+        stream=True,
+        timeout=timeout,
+    )
+    async for event in stream:
+        if not event.choices:
+            continue
+        delta = event.choices[0].delta.content
+        if not delta:
+            continue
+        if first_token is None:
+            first_token = time.perf_counter()
+            if timer:
+                timer.record(f"{stage}_ttft", first_token - started)
+        chunks.append(delta)
+
+        now = time.perf_counter()
+        if progress and now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            await progress(f"Generating… {len(chunks)} tokens ({now - started:.1f}s)")
+
+    if timer:
+        if first_token is None:
+            timer.record(f"{stage}_ttft", time.perf_counter() - started)
+        else:
+            timer.record(f"{stage}_stream", time.perf_counter() - first_token)
+    if progress:
+        await progress(f"Generated {len(chunks)} tokens in {time.perf_counter() - started:.1f}s")
+    return "".join(chunks).strip()
+
+
+async def aclose():
+    """Close pooled HTTP connections."""
+    await async_client.close()
@@ -0,0 +1,231 @@
+import ast
+import asyncio
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page as AsyncPage
+from ..constants import ALLOWED_DOMAIN, MACRO_DIR, REPLAY_HEALTH_TIMEOUT
+from .code_validator import compile_generated_code, build_globals, run_compiled
+from .stability import wait_for_settled
+
+# Page methods whose literal arguments identify an element
+LOCATOR_METHODS = {
+    "locator", "get_by_role", "get_by_text", "get_by_label", "get_by_placeholder",
+    "get_by_test_id", "get_by_alt_text", "get_by_title",
+}
+
+_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def normalize_macro_name(name: str) -> str:
+    normalized = re.sub(r"[^a-z0-9_-]+", "-", name.strip().lower()).strip("-")
+    if not _NAME_RE.match(normalized):
+        raise ValueError(f"Invalid macro name: {name!r}")
+    return normalized
+
+
+@dataclass
+class MacroStep:
+    """One successful instruction: its validated code and the URL it started from."""
+    instruction: str
+    code: str
+    url: str
+
+
+@dataclass
+class Macro:
+    name: str
+    steps: list[MacroStep] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Macro":
+        return cls(
+            name=data["name"],
+            steps=[MacroStep(**step) for step in data.get("steps", [])],
+            created_at=data.get("created_at", time.time()),
+        )
+
+
+class MacroStore:
+    """Macros saved as one JSON file each under `directory`."""
+
+    def __init__(self, directory: str = MACRO_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{normalize_macro_name(name)}.json"
+
+    def save(self, macro: Macro) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(macro.name)
+        path.write_text(json.dumps(asdict(macro), indent=2), encoding="utf-8")
+        return str(path)
+
+    def load(self, name: str) -> Optional[Macro]:
+        try:
+            return Macro.from_dict(json.loads(self._path(name).read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, name: str) -> bool:
+        try:
+            self._path(name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list(self) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        macros = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable macro {path}: {e}")
+                continue
+            macros.append({"name": data["name"], "steps": len(data.get("steps", [])), "created_at": data.get("created_at")})
+        return macros
+
+
+class MacroRecorder:
+    """Collects successful steps for one session between `start` and `finish`."""
+
+    def __init__(self, store: "MacroStore"):
+        self.store = store
+        self.macro: Optional[Macro] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.macro is not None
+
+    def start(self, name: str):
+        self.macro = Macro(name=normalize_macro_name(name))
+
+    def add(self, instruction: str, code: str, url: str):
+        if self.macro is not None and code:
+            self.macro.steps.append(MacroStep(instruction=instruction, code=code, url=url))
+
+    def finish(self) -> Optional[Macro]:
+        """Save the recording (if it has steps) and stop recording."""
+        macro, self.macro = self.macro, None
+        if macro is not None and macro.steps:
+            self.store.save(macro)
+        return macro
+
+    def discard(self):
+        self.macro = None
+
+
+def leading_locator(code: str) -> Optional[tuple[str, list, dict]]:
+    """
+    The first element the code looks up, as (method, args, kwargs), when it is
+    built from literals and comes before any navigation. Later locators may
+    only exist after this step's own actions, so only the first is checked.
+    """
+    calls = [
+        node for node in ast.walk(ast.parse(code))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+        and isinstance(node.func.value, ast.Name) and node.func.value.id == "_async_page"
+    ]
+    calls.sort(key=lambda node: (node.lineno, node.col_offset))
+    for node in calls:
+        if node.func.attr == "goto":
+            return None
+        if node.func.attr not in LOCATOR_METHODS:
+            continue
+        try:
+            args = [ast.literal_eval(arg) for arg in node.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords if kw.arg}
+        except ValueError:
+            return None
+        return node.func.attr, args, kwargs
+    return None
+
+
+async def check_step_health(page: AsyncPage, step: MacroStep, timeout: float = REPLAY_HEALTH_TIMEOUT) -> Optional[str]:
+    """Return None if the step's first target is on the page (waiting up to `timeout`), else a reason."""
+    target = leading_locator(step.code)
+    if target is None:
+        return None
+    method, args, kwargs = target
+    locator = getattr(page, method)(*args, **kwargs)
+    deadline = time.monotonic() + timeout
+    while True:
+        if await locator.count() > 0:
+            return None
+        if time.monotonic() >= deadline:
+            described = ", ".join([repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()])
+            return f"element not found: {method}({described})"
+        await asyncio.sleep(0.1)
+
+
+def _same_page(a: str, b: str) -> bool:
+    return urlparse(a).path.rstrip("/") == urlparse(b).path.rstrip("/")
+
+
+async def replay_macro(page: AsyncPage, macro: Macro,
+                       heal: Optional[Callable[[MacroStep], Awaitable[dict]]] = None,
+                       progress: Optional[Callable[[str], Awaitable[None]]] = None) -> dict:
+    """
+    Run a macro's recorded code step by step without the LLM.
+
+    Before each step the page must be on the step's recorded URL path (the
+    first step navigates there if needed) and its first target element must
+    exist. A step that fails either check or raises is handed to `heal` (e.g.
+    regenerate from its instruction) when given; otherwise replay stops.
+    """
+    started = time.perf_counter()
+    steps = []
+    for index, step in enumerate(macro.steps):
+        step_started = time.perf_counter()
+        if progress:
+            await progress(f"Replaying step {index + 1}/{len(macro.steps)}: {step.instruction}")
+
+        if index == 0 and not _same_page(page.url, step.url) and urlparse(step.url).hostname == ALLOWED_DOMAIN:
+            await page.goto(step.url)
+            await wait_for_settled(page)
+        problem = None if _same_page(page.url, step.url) else f"expected {step.url}, page is at {page.url}"
+        if problem is None:
+            problem = await check_step_health(page, step)
+
+        if problem is None:
+            try:
+                await run_compiled(compile_generated_code(step.code), build_globals(page))
+                await wait_for_settled(page)
+            except Exception as e:
+                problem = f"execution failed: {str(e)}"
+
+        outcome = {"step": index + 1, "instruction": step.instruction, "status": "replayed"}
+        if problem is not None:
+            print(f"Macro {macro.name} step {index + 1} unhealthy: {problem}")
+            outcome["problem"] = problem
+            healed = await heal(step) if heal else None
+            if not healed or healed.get("status") != "success":
+                outcome["status"] = "failed"
+                steps.append({**outcome, "ms": round((time.perf_counter() - step_started) * 1000, 1)})
+                return {
+                    "macro": macro.name,
+                    "status": "error",
+                    "message": f"Step {index + 1} ({step.instruction}) failed: {problem}",
+                    "steps": steps,
+                    "ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+            outcome["status"] = "healed"
+        steps.append({**outcome, "ms": round((time.perf_counter() - step_started) * 1000, 1)})
+
+    return {
+        "macro": macro.name,
+        "status": "success",
+        "message": f"Replayed {len(macro.steps)} steps",
+        "steps": steps,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+macro_store = MacroStore()
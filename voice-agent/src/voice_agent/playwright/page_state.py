@@ -0,0 +1,55 @@
+import time
+from typing import Optional
+from playwright.async_api import Page as AsyncPage
+
+# Default number of HTML characters returned to consumers
+HTML_PREVIEW_LIMIT = 5000
+
+# Truncates the serialized document inside the page so the full HTML never crosses CDP
+_TRUNCATED_HTML_JS = "(limit) => document.documentElement.outerHTML.slice(0, limit)"
+
+
+class PageState:
+    """
+    Lazy view of a page's state.
+
+    The URL is read eagerly (it is a local property). Title and HTML are
+    fetched on first request and memoized, so callers that only need the
+    URL never pay for a document dump. Screenshots go through
+    `capture_screenshot` and the artifact store instead.
+    """
+
+    def __init__(self, page: Optional[AsyncPage], error: Optional[str] = None):
+        self.page = page
+        self.error = error
+        self.url = page.url if page is not None and error is None else None
+        self.timestamp = time.time()
+        self._title: Optional[str] = None
+        self._html: dict[int, str] = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    async def title(self) -> Optional[str]:
+        if self._title is None and self.ok:
+            try:
+                self._title = await self.page.title()
+            except Exception as e:
+                self.error = f"Failed to get page title: {str(e)}"
+        return self._title
+
+    async def html(self, limit: int = HTML_PREVIEW_LIMIT) -> str:
+        if limit not in self._html and self.ok:
+            try:
+                self._html[limit] = await self.page.evaluate(_TRUNCATED_HTML_JS, limit)
+            except Exception as e:
+                self.error = f"Failed to get page HTML: {str(e)}"
+        return self._html.get(limit, "")
+
+    async def describe(self) -> str:
+        """Short 'title at url' line for status messages."""
+        return f"{await self.title() or 'Unknown'} at {self.url or 'Unknown'}"
+
+    def __repr__(self):
+        return f"PageState(url={self.url!r}, error={self.error!r})"
@@ -0,0 +1,72 @@
+import re
+from playwright.async_api import Page as AsyncPage
+from ..constants import PROMPT_TOKEN_BUDGET
+from .element_index import snapshot_element_index
+from .keywords import extract_search_terms
+from .llm import estimate_tokens
+
+# Upper bound on elements pulled from the page before ranking
+MAX_CANDIDATES = 400
+
+_TOKEN_RE = re.compile(r"[\w@.-]+")
+
+
+def _words(text: str) -> set:
+    return {w for w in _TOKEN_RE.findall(text.lower()) if len(w) > 1}
+
+
+def score_element(element: dict, terms: list, instruction_words: set) -> float:
+    """Relevance of an indexed element to the instruction; higher is better."""
+    name = (element.get("name") or "").lower()
+    haystack = " ".join([name, *map(str, element.get("attributes", {}).values())]).lower()
+    score = 0.0
+    for rank, term in enumerate(terms):
+        needle = term.lower()
+        if needle == name:
+            score += 10 - rank
+        elif needle in haystack:
+            score += 5 - min(rank, 4)
+    score += len(instruction_words & _words(haystack))
+    if element.get("visible"):
+        score += 0.5
+    return score
+
+
+def format_element(element: dict) -> str:
+    name = (element.get("name") or "").replace("\n", " ")[:60]
+    return f'- {element.get("role", "generic")} "{name}" -> {element.get("selector", "")}'
+
+
+def build_summary(elements: list, instruction: str, token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Dense list of interactive elements, most relevant first, cut to fit `token_budget`."""
+    terms = extract_search_terms(instruction)
+    instruction_words = _words(instruction)
+    ranked = sorted(
+        enumerate(elements),
+        key=lambda item: (-score_element(item[1], terms, instruction_words), item[0]),
+    )
+
+    lines = []
+    used = 0
+    for _, element in ranked:
+        line = format_element(element)
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+
+    omitted = len(elements) - len(lines)
+    if omitted > 0:
+        lines.append(f"- ... {omitted} less relevant elements omitted")
+    return "\n".join(lines)
+
+
+async def summarize_page(page: AsyncPage, instruction: str, token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """Summarize the page's interactive elements (role, name, selector hint) for a prompt."""
+    try:
+        elements = await snapshot_element_index(page, limit=MAX_CANDIDATES)
+    except Exception as e:
+        print(f"Failed to summarize page: {e}")
+        return ""
+    return build_summary(elements, instruction, token_budget)
@@ -0,0 +1,76 @@
+import json
+import re
+from typing import Optional
+from .llm import ProgressCallback, stream_completion
+from ..constants import PLANNER_MAX_STEPS
+from ..metrics import InstructionTimer
+
+# Verbs that usually start a separate browser action in a spoken instruction
+ACTION_VERBS = (
+    "log in", "login", "sign in", "log out", "logout", "sign out", "open", "go to", "go back", "navigate",
+    "click", "press", "tap", "select", "choose", "fill", "type", "enter", "search", "scroll",
+    "take", "capture", "download", "upload", "submit", "close", "check", "uncheck", "show", "switch",
+)
+
+_VERB_PATTERN = "|".join(re.escape(verb) for verb in sorted(ACTION_VERBS, key=len, reverse=True))
+# A separator ("," ";" "then" "and" "and then" "after that") followed by an action verb
+_STEP_BOUNDARY = re.compile(
+    rf"\s*(?:[,;]\s*(?:and\s+)?(?:then\s+)?|\s+(?:and\s+then|then|and|after\s+that)\s+)(?=(?:{_VERB_PATTERN})\b)",
+    re.IGNORECASE,
+)
+
+PLANNER_PROMPT = """You split a spoken browser-automation request into the ordered steps a Playwright agent should perform.
+
+RULES:
+- Each step is one short imperative instruction that can be done on the page reached by the previous step.
+- Keep the user's wording for names of pages, buttons and fields; do not invent steps the user did not ask for.
+- Do not split a single action (e.g. "select milk and cheese" is one step).
+- At most {max_steps} steps.
+
+CURRENT PAGE: {url}
+
+Respond with only a JSON array of strings, e.g. ["log in", "open dairy profit intelligence", "take a screenshot"]."""
+
+
+def split_compound(instruction: str) -> list[str]:
+    """Heuristic split on "and", "then" and commas that are followed by an action verb."""
+    return [part.strip(" .,;") for part in _STEP_BOUNDARY.split(instruction.strip()) if part.strip(" .,;")]
+
+
+def looks_compound(instruction: str) -> bool:
+    """Cheap check used to decide whether an utterance is worth a planning call."""
+    return len(split_compound(instruction)) > 1
+
+
+def parse_plan(text: str) -> Optional[list[str]]:
+    """The model's JSON array of steps, or None if it is not one."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-z]*\s*|\s*```$", "", text)
+    try:
+        steps = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(steps, list) or not all(isinstance(step, str) for step in steps):
+        return None
+    return [step.strip() for step in steps if step.strip()] or None
+
+
+async def plan_instruction(instruction: str, url: str, progress: Optional[ProgressCallback] = None,
+                           timer: Optional[InstructionTimer] = None, max_steps: int = PLANNER_MAX_STEPS) -> list[str]:
+    """
+    Break a compound instruction into ordered steps with one model call.
+    Falls back to the heuristic split if the call fails or returns something unusable.
+    """
+    messages = [
+        {"role": "system", "content": PLANNER_PROMPT.format(max_steps=max_steps, url=url)},
+        {"role": "user", "content": instruction},
+    ]
+    try:
+        steps = parse_plan(await stream_completion(messages, progress=progress, timer=timer, stage="plan"))
+    except Exception as e:
+        print(f"Planning call failed, splitting heuristically: {e}")
+        steps = None
+    if steps is None:
+        steps = split_compound(instruction)
+    return steps[:max_steps]
@@ -1,27 +1,13 @@
-import random
 import re
 from playwright.sync_api import Page, expect, sync_playwright, Browser, BrowserContext
-import base64
-from pathlib import Path
 import time
 from contextlib import contextmanager
 from typing import Generator, Optional
+from .auth_state import auth_state_cache
+from .resource_policy import install_resource_policy_sync, resolve_policy_name
+from .artifacts import artifact_store
+from ..constants import AUTH_USER
 
-def save_screenshot_and_base64(page: Page, out_dir: str, name_prefix: str = "image"):
-    out = Path(out_dir)
-    out.mkdir(parents=True, exist_ok=True)
-
-    png_path = out / f"{name_prefix}.png"
-    b64_path = out / f"{name_prefix}.b64"
-
-    # Capture full page screenshot (also writes PNG file)
-    png_bytes = page.screenshot(path=str(png_path), full_page=True)
-
-    # Write base64 alongside
-    b64 = base64.b64encode(png_bytes).decode("utf-8")
-    b64_path.write_text(b64, encoding="utf-8")
-
-    return str(png_path), str(b64_path)
 def add_cursor_overlay(page: Page):
     page.add_init_script("""
         (() => {
@@ -62,7 +48,9 @@ class PlaywrightManager:
     def browser_context(self, 
                        browser_type: str = "chromium",
                        viewport: Optional[dict] = None,
-                       user_agent: Optional[str] = None) -> Generator[tuple[Browser, BrowserContext, Page], None, None]:
+                       user_agent: Optional[str] = None,
+                       user: Optional[str] = AUTH_USER,
+                       resource_policy: Optional[str] = None) -> Generator[tuple[Browser, BrowserContext, Page], None, None]:
         """
         Context manager for browser automation.
         
@@ -70,6 +58,8 @@ class PlaywrightManager:
             browser_type: Type of browser to launch ("chromium", "firefox", "webkit")
             viewport: Browser viewport settings {"width": 1920, "height": 1080}
             user_agent: Custom user agent string
+            user: Saved login to start from (see `auth_state_cache`); None starts logged out
+            resource_policy: Request interception policy (off, lean, strict, auto); defaults to RESOURCE_POLICY
             
         Yields:
             Tuple of (browser, context, page) for automation tasks
@@ -102,9 +92,14 @@ class PlaywrightManager:
                 context_options["viewport"] = viewport
             if user_agent:
                 context_options["user_agent"] = user_agent
+            saved_state = auth_state_cache.get(user)
+            if saved_state:
+                context_options["storage_state"] = saved_state
                 
             self._context = self._browser.new_context(**context_options)
+            install_resource_policy_sync(self._context, resolve_policy_name(resource_policy, headless=self.headless))
             page = self._context.new_page()
+            auth_state_cache.watch(page, user)
             
             yield self._browser, self._context, page
             
@@ -116,10 +111,22 @@ class PlaywrightManager:
             if self._playwright:
                 self._playwright.stop()
 
-def test_login_and_dashboard(page: Page):
+def test_login_and_dashboard(page: Page, user: Optional[str] = AUTH_USER):
     """Test function for login and dashboard automation."""
     add_cursor_overlay(page)
     page.goto("https://farmce-dev.oraczen.xyz/auth")
+    page.wait_for_load_state("domcontentloaded")
+    if auth_state_cache.is_auth_url(page.url):
+        login_with_form(page)
+        auth_state_cache.save_from_sync_context(user, page.context)
+    page.get_by_role("link", name="Get Started").first.click()
+    expect(page).to_have_url(re.compile(".*/dairy-profit-intelligence"))
+    artifact = artifact_store.put_bytes(page.screenshot(full_page=True), "image/png")
+    print(f"Dashboard screenshot: {artifact.url}")
+
+
+def login_with_form(page: Page):
+    """Fill and submit the login form with human-like typing."""
     email_box = page.get_by_role("textbox", name="Email")
     email_box_bounds = email_box.bounding_box()
     page.mouse.move(
@@ -144,10 +151,6 @@ def test_login_and_dashboard(page: Page):
     page.keyboard.type("Test@1234567", delay=100)
     page.get_by_role("button", name="Login").click()
     page.wait_for_load_state("networkidle")
-    page.get_by_role("link", name="Get Started").first.click()
-    expect(page).to_have_url(re.compile(".*/dairy-profit-intelligence"))
-    random_number = random.randint(100, 999)
-    save_screenshot_and_base64(page, out_dir=f"screenshots/file{random_number}", name_prefix="dashboard")
 
 
 
@@ -0,0 +1,277 @@
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+from playwright.async_api import BrowserContext as AsyncContext, Route as AsyncRoute
+from playwright.sync_api import BrowserContext, Route
+from ..constants import (
+    RESOURCE_POLICY,
+    RESOURCE_BLOCK_TYPES,
+    RESOURCE_ALLOW_DOMAINS,
+    RESOURCE_DENY_DOMAINS,
+    RESOURCE_CACHE_DIR,
+    RESOURCE_CACHE_MAX_BYTES,
+    RESOURCE_CACHE_TTL,
+)
+from ..metrics import RESOURCE_REQUESTS
+
+# Analytics, ads, session recording and map tiles: never needed to drive the app
+DEFAULT_DENY_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "segment.io", "segment.com", "mixpanel.com", "hotjar.com", "fullstory.com", "clarity.ms",
+    "facebook.net", "connect.facebook.net", "intercom.io", "sentry.io",
+    "tile.openstreetmap.org", "api.mapbox.com", "tiles.mapbox.com", "maps.googleapis.com", "maps.gstatic.com",
+)
+
+# Resource types blocked by each policy; "strict" also drops every host outside the allow list
+POLICY_BLOCK_TYPES = {
+    "lean": {"media", "font"},
+    "strict": {"media", "font", "image"},
+}
+# Static assets worth keeping on disk between sessions
+CACHEABLE_TYPES = {"script", "stylesheet", "font", "image"}
+
+# 1x1 transparent GIF so blocked images do not fire onerror handlers
+_PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+_STUBS = {
+    "script": (200, "application/javascript", b""),
+    "stylesheet": (200, "text/css", b""),
+    "image": (200, "image/gif", _PIXEL_GIF),
+    "xhr": (204, "text/plain", b""),
+    "fetch": (204, "text/plain", b""),
+    "ping": (204, "text/plain", b""),
+}
+
+CONTINUE = "continue"
+ABORT = "abort"
+STUB = "stub"
+CACHE = "cache"
+
+
+def _matches(host: str, domains) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class ResourceCache:
+    """
+    Static responses on disk, keyed by URL, shared by every context in the process.
+
+    Only successful GET responses that do not forbid storage are kept. Entries
+    expire after `ttl`; the oldest files are removed once the directory grows
+    past `max_bytes`. Methods are called from worker threads (and the sync
+    API's dispatcher), so the size and counters are guarded by a lock.
+    """
+
+    def __init__(self, directory: str = RESOURCE_CACHE_DIR, max_bytes: int = RESOURCE_CACHE_MAX_BYTES,
+                 ttl: float = RESOURCE_CACHE_TTL):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json", self.directory / f"{digest}.body"
+
+    def get(self, url: str) -> Optional[tuple[dict, bytes]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            expired = time.time() - meta["stored_at"] > self.ttl
+            body = None if expired else body_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            body = None
+        with self._lock:
+            if body is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return meta, body
+
+    @staticmethod
+    def storable(status: int, headers: dict) -> bool:
+        cache_control = headers.get("cache-control", "").lower()
+        return status == 200 and "no-store" not in cache_control and "private" not in cache_control
+
+    def put(self, url: str, status: int, headers: dict, body: bytes):
+        if len(body) > self.max_bytes // 10:
+            return
+        meta_path, body_path = self._paths(url)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            body_path.write_bytes(body)
+            meta_path.write_text(json.dumps({
+                "url": url,
+                "status": status,
+                "content_type": headers.get("content-type", "application/octet-stream"),
+                "stored_at": time.time(),
+            }), encoding="utf-8")
+        except OSError as e:
+            print(f"Failed to cache {url}: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self.directory.glob("*.body"))
+            else:
+                self._size += len(body)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove the oldest bodies until the cache is at 80% of `max_bytes`. Called with the lock held."""
+        bodies = sorted(self.directory.glob("*.body"), key=lambda p: p.stat().st_mtime)
+        for body_path in bodies:
+            if self._size <= self.max_bytes * 0.8:
+                break
+            try:
+                self._size -= body_path.stat().st_size
+                body_path.unlink()
+                body_path.with_suffix(".json").unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+class ResourcePolicy:
+    """
+    Decides, per request, whether a context loads, stubs, aborts or serves it from cache.
+
+    Denied domains are always stubbed or aborted. Blocked resource types are
+    stubbed (scripts, styles, images) or aborted (fonts, media). Static assets
+    from allowed hosts are served from the on-disk cache. With `third_party`
+    false, hosts outside the allow list are blocked as well.
+    """
+
+    def __init__(self, name: str, block_types=frozenset(), allow_domains=(), deny_domains=(),
+                 third_party: bool = True, cache: Optional[ResourceCache] = None):
+        self.name = name
+        self.block_types = set(block_types)
+        self.allow_domains = tuple(allow_domains)
+        self.deny_domains = tuple(deny_domains)
+        self.third_party = third_party
+        self.cache = cache
+
+    def decide(self, url: str, resource_type: str, method: str) -> str:
+        host = urlparse(url).hostname or ""
+        if not url.startswith("http"):
+            return CONTINUE
+        allowed = _matches(host, self.allow_domains)
+        if _matches(host, self.deny_domains) and not allowed:
+            return STUB if resource_type in _STUBS else ABORT
+        if not allowed and not self.third_party:
+            return STUB if resource_type in _STUBS else ABORT
+        if resource_type in self.block_types:
+            return STUB if resource_type in _STUBS else ABORT
+        if self.cache is not None and allowed and method == "GET" and resource_type in CACHEABLE_TYPES:
+            return CACHE
+        return CONTINUE
+
+    async def handle(self, route: AsyncRoute):
+        request = route.request
+        action = self.decide(request.url, request.resource_type, request.method)
+        RESOURCE_REQUESTS.inc(action=action)
+        try:
+            if action == ABORT:
+                await route.abort("blockedbyclient")
+            elif action == STUB:
+                status, content_type, body = _STUBS[request.resource_type]
+                await route.fulfill(status=status, content_type=content_type, body=body)
+            elif action == CACHE:
+                await self._serve_cached(route)
+            else:
+                await route.continue_()
+        except Exception as e:
+            # The page may have navigated away or closed while the request was pending
+            print(f"Resource route for {request.url[:120]} failed: {e}")
+
+    async def _serve_cached(self, route: AsyncRoute):
+        url = route.request.url
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached is not None:
+            meta, body = cached
+            await route.fulfill(status=meta["status"], content_type=meta["content_type"], body=body)
+            return
+        response = await route.fetch()
+        body = await response.body()
+        if self.cache.storable(response.status, response.headers):
+            await asyncio.to_thread(self.cache.put, url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    def handle_sync(self, route: Route):
+        request = route.request
+        action = self.decide(request.url, request.resource_type, request.method)
+        RESOURCE_REQUESTS.inc(action=action)
+        try:
+            if action == ABORT:
+                route.abort("blockedbyclient")
+            elif action == STUB:
+                status, content_type, body = _STUBS[request.resource_type]
+                route.fulfill(status=status, content_type=content_type, body=body)
+            elif action == CACHE:
+                cached = self.cache.get(request.url)
+                if cached is not None:
+                    meta, body = cached
+                    route.fulfill(status=meta["status"], content_type=meta["content_type"], body=body)
+                    return
+                response = route.fetch()
+                body = response.body()
+                if self.cache.storable(response.status, response.headers):
+                    self.cache.put(request.url, response.status, response.headers, body)
+                route.fulfill(response=response, body=body)
+            else:
+                route.continue_()
+        except Exception as e:
+            print(f"Resource route for {request.url[:120]} failed: {e}")
+
+
+resource_cache = ResourceCache()
+
+
+def resolve_policy_name(name: Optional[str] = None, headless: bool = True) -> str:
+    """`auto` means lean when nobody is watching the browser and off otherwise."""
+    name = (name or RESOURCE_POLICY).lower()
+    if name == "auto":
+        return "lean" if headless else "off"
+    if name not in ("off", *POLICY_BLOCK_TYPES):
+        raise ValueError(f"Unknown resource policy: {name} (expected off, lean, strict or auto)")
+    return name
+
+
+def build_policy(name: str) -> Optional[ResourcePolicy]:
+    """The policy for a resolved name, or None for `off`. RESOURCE_BLOCK_TYPES overrides the preset types."""
+    if name == "off":
+        return None
+    return ResourcePolicy(
+        name,
+        block_types=RESOURCE_BLOCK_TYPES if RESOURCE_BLOCK_TYPES is not None else POLICY_BLOCK_TYPES[name],
+        allow_domains=RESOURCE_ALLOW_DOMAINS,
+        deny_domains=DEFAULT_DENY_DOMAINS + RESOURCE_DENY_DOMAINS,
+        third_party=name != "strict",
+        cache=resource_cache if RESOURCE_CACHE_MAX_BYTES > 0 else None,
+    )
+
+
+async def install_resource_policy(context: AsyncContext, name: str) -> Optional[ResourcePolicy]:
+    """Route every request of the context through the named policy (resolved already; see `resolve_policy_name`)."""
+    policy = build_policy(name)
+    if policy is not None:
+        await context.route("**/*", policy.handle)
+    return policy
+
+
+def install_resource_policy_sync(context: BrowserContext, name: str) -> Optional[ResourcePolicy]:
+    policy = build_policy(name)
+    if policy is not None:
+        context.route("**/*", policy.handle_sync)
+    return policy
@@ -0,0 +1,139 @@
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Optional
+from playwright.async_api import Page as AsyncPage
+from ..constants import (
+    SCREENSHOT_FORMAT,
+    SCREENSHOT_QUALITY,
+    SCREENSHOT_FULL_PAGE,
+    SCREENSHOT_MAX_WIDTH,
+    SCREENSHOT_MAX_HEIGHT,
+    SCREENSHOT_WORKERS,
+)
+
+# Encoding and file writes run here so large captures never stall the event loop
+_executor = ThreadPoolExecutor(max_workers=SCREENSHOT_WORKERS, thread_name_prefix="screenshot")
+
+
+async def run_off_loop(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+@dataclass
+class ScreenshotOptions:
+    """How a screenshot is captured. `clip` is in page (CSS pixel) coordinates."""
+    format: str = SCREENSHOT_FORMAT
+    quality: int = SCREENSHOT_QUALITY
+    full_page: bool = SCREENSHOT_FULL_PAGE
+    clip: Optional[dict] = None
+    max_width: Optional[int] = SCREENSHOT_MAX_WIDTH
+    max_height: Optional[int] = SCREENSHOT_MAX_HEIGHT
+
+    def with_changes(self, **changes) -> "ScreenshotOptions":
+        return replace(self, **changes)
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "jpeg" else "png"
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format}"
+
+
+class Screenshot:
+    """Captured image held as raw bytes or base64; the other form is derived off-loop on demand."""
+
+    def __init__(self, options: ScreenshotOptions, data: Optional[bytes] = None, b64: Optional[str] = None):
+        self.options = options
+        self._data = data
+        self._b64 = b64
+
+    @property
+    def mime_type(self) -> str:
+        return self.options.mime_type
+
+    async def bytes(self) -> bytes:
+        if self._data is None:
+            self._data = await run_off_loop(base64.b64decode, self._b64)
+        return self._data
+
+    async def base64(self) -> str:
+        if self._b64 is None:
+            self._b64 = await run_off_loop(lambda data: base64.b64encode(data).decode("utf-8"), self._data)
+        return self._b64
+
+
+def _scale_for(width: float, height: float, options: ScreenshotOptions) -> float:
+    scale = 1.0
+    if options.max_width and width > options.max_width:
+        scale = min(scale, options.max_width / width)
+    if options.max_height and height > options.max_height:
+        scale = min(scale, options.max_height / height)
+    return scale
+
+
+async def _capture_with_cdp(page: AsyncPage, options: ScreenshotOptions) -> Optional[Screenshot]:
+    """Capture through CDP so Chromium downscales the image before it leaves the browser."""
+    cdp = await page.context.new_cdp_session(page)
+    try:
+        metrics = await cdp.send("Page.getLayoutMetrics")
+        if options.clip:
+            region = dict(options.clip)
+        elif options.full_page:
+            size = metrics["cssContentSize"]
+            region = {"x": 0, "y": 0, "width": size["width"], "height": size["height"]}
+        else:
+            view = metrics["cssVisualViewport"]
+            region = {"x": view["pageX"], "y": view["pageY"], "width": view["clientWidth"], "height": view["clientHeight"]}
+
+        scale = _scale_for(region["width"], region["height"], options)
+        params = {
+            "format": options.format,
+            "clip": {**region, "scale": scale},
+            "captureBeyondViewport": options.full_page,
+        }
+        if options.format == "jpeg":
+            params["quality"] = options.quality
+        result = await cdp.send("Page.captureScreenshot", params)
+        return Screenshot(options, b64=result["data"])
+    finally:
+        await cdp.detach()
+
+
+async def capture_screenshot(page: AsyncPage, options: Optional[ScreenshotOptions] = None) -> Screenshot:
+    """Capture a screenshot honouring format, quality, clip/viewport mode and max dimensions."""
+    options = options or ScreenshotOptions()
+
+    viewport = page.viewport_size
+    needs_downscale = options.full_page or options.clip or (
+        viewport and _scale_for(viewport["width"], viewport["height"], options) < 1
+    )
+    if needs_downscale and (options.max_width or options.max_height):
+        try:
+            return await _capture_with_cdp(page, options)
+        except Exception as e:
+            # Non-Chromium browsers have no CDP; capture at full size instead
+            print(f"CDP screenshot unavailable, capturing without downscale: {e}")
+
+    kwargs = {"type": options.format, "full_page": options.full_page}
+    if options.format == "jpeg":
+        kwargs["quality"] = options.quality
+    if options.clip:
+        kwargs["clip"] = options.clip
+    return Screenshot(options, data=await page.screenshot(**kwargs))
+
+
+async def capture_within_budget(page: AsyncPage, max_b64_chars: int, max_dim: int) -> Optional[Screenshot]:
+    """
+    Capture a downscaled viewport JPEG whose base64 form fits `max_b64_chars`,
+    stepping quality and size down as needed. Returns None if nothing fits.
+    """
+    for quality, dim in ((60, max_dim), (45, max_dim * 3 // 4), (35, max_dim // 2)):
+        options = ScreenshotOptions(format="jpeg", quality=quality, full_page=False, max_width=dim, max_height=dim)
+        screenshot = await capture_screenshot(page, options)
+        if len(await screenshot.base64()) <= max_b64_chars:
+            return screenshot
+    return None
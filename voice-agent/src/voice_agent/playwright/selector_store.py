@@ -0,0 +1,308 @@
+import ast
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page as AsyncPage, Locator as AsyncLocator
+from ..constants import SELECTOR_STORE_PATH, SELECTOR_MAX_MISSES, SELECTOR_PROMPT_LIMIT, SELECTOR_SAVE_DELAY
+from ..metrics import SELECTOR_LOOKUPS
+
+# Page methods that build a locator, and the argument that names the target
+LOCATOR_LABELS = {
+    "get_by_role": "name", "get_by_text": 0, "get_by_label": 0, "get_by_placeholder": 0,
+    "get_by_test_id": 0, "get_by_alt_text": 0, "get_by_title": 0, "locator": 0,
+}
+# Locator refinements kept as part of a learned selector (`.first`, `.nth(2)`)
+CHAIN_PROPERTIES = {"first", "last"}
+CHAIN_METHODS = {"nth"}
+# Page calls that leave the current document; locators after them are on another page
+NAVIGATION_METHODS = {"goto", "go_back", "go_forward"}
+# Actions that can trigger a navigation (link clicks, form submits)
+NAVIGATING_ACTIONS = {"click", "dblclick", "tap", "press", "check", "uncheck", "select_option"}
+
+# Path segments that identify a record rather than a page (ids, hashes, UUIDs)
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$", re.I)
+# Labels that can be read out of CSS/text selectors passed to `locator()`
+_SELECTOR_TEXT = re.compile(r"""(?:^text=|:has-text\(|:text\(|:text-is\(|\[aria-label=|\[placeholder=|\[name=)["']?([^"'\])]+)""")
+
+
+def url_pattern(url: str) -> str:
+    """Host and path with id-like segments replaced by `*`, so /farms/12 and /farms/40 share entries."""
+    parsed = urlparse(url or "")
+    segments = ["*" if _ID_SEGMENT.match(segment) else segment for segment in parsed.path.split("/") if segment]
+    return f"{parsed.hostname or ''}/{'/'.join(segments)}"
+
+
+def normalize_target(label: str) -> str:
+    return " ".join(re.sub(r"[^\w\s@.-]", " ", label.lower()).split())
+
+
+def _target_label(method: str, args: list, kwargs: dict) -> Optional[str]:
+    where = LOCATOR_LABELS[method]
+    label = kwargs.get(where) if isinstance(where, str) else (args[where] if len(args) > where else None)
+    if method == "locator" and isinstance(label, str):
+        match = _SELECTOR_TEXT.search(label)
+        label = match.group(1) if match else None
+    return normalize_target(label) if isinstance(label, str) and label.strip() else None
+
+
+def render_selector(method: str, args: list, kwargs: dict, chain: list) -> str:
+    rendered = ", ".join([repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()])
+    expression = f"_async_page.{method}({rendered})"
+    for step in chain:
+        expression += f".{step[0]}" if len(step) == 1 else f".{step[0]}({step[1]!r})"
+    return expression
+
+
+def _page_call(node: ast.AST, methods) -> bool:
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == "_async_page"
+            and node.func.attr in methods)
+
+
+def _position(node: ast.AST) -> tuple:
+    return node.lineno, node.col_offset
+
+
+def extract_selectors(code: str, before_navigation: bool = False) -> list[dict]:
+    """
+    Locators built from literals in `code`, in source order, with the `.first`/`.nth()`
+    refinement and the action applied to them, e.g. get_by_role('button', name='Login').first.click().
+    With `before_navigation`, only locators that come before the first goto/go_back/go_forward.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    cutoff = None
+    if before_navigation:
+        navigations = [_position(node) for node in ast.walk(tree) if _page_call(node, NAVIGATION_METHODS)]
+        cutoff = min(navigations, default=None)
+    found = []
+    for node in ast.walk(tree):
+        if not _page_call(node, LOCATOR_LABELS):
+            continue
+        if cutoff is not None and _position(node) > cutoff:
+            continue
+        try:
+            args = [ast.literal_eval(arg) for arg in node.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords if kw.arg}
+        except ValueError:
+            continue
+        label = _target_label(node.func.attr, args, kwargs)
+        if label is None:
+            continue
+
+        # Walk outwards through refinements to the action, if the locator is used directly
+        chain, current, action = [], node, None
+        while isinstance(parents.get(current), ast.Attribute):
+            attribute = parents[current]
+            call = parents.get(attribute)
+            if attribute.attr in CHAIN_PROPERTIES:
+                chain.append([attribute.attr])
+                current = attribute
+            elif attribute.attr in CHAIN_METHODS and isinstance(call, ast.Call) and call.args and isinstance(call.args[0], ast.Constant):
+                chain.append([attribute.attr, call.args[0].value])
+                current = call
+            else:
+                action = attribute.attr if isinstance(call, ast.Call) else None
+                break
+
+        found.append((_position(node), {
+            "target": label,
+            "action": action,
+            "method": node.func.attr,
+            "args": args,
+            "kwargs": kwargs,
+            "chain": chain,
+            "expression": render_selector(node.func.attr, args, kwargs, chain),
+        }))
+    return [selector for _, selector in sorted(found, key=lambda item: item[0])]
+
+
+def confidence(entry: dict) -> float:
+    """Laplace-smoothed success rate."""
+    return (entry["successes"] + 1) / (entry["successes"] + entry["failures"] + 2)
+
+
+class SelectorStore:
+    """
+    Locators that resolved a named target on a page, learned from code that ran successfully.
+
+    Entries are keyed by URL pattern and target label (e.g. "login") and count
+    successes and failures. An entry is dropped after `max_misses` consecutive
+    checks where it matched nothing on a page of its pattern, so selectors that
+    break when the app changes age out on their own. The store is a JSON file;
+    with several worker processes each keeps its own copy in memory and the
+    last write wins. Changes made on the event loop are batched for
+    `save_delay` seconds and written in a thread; `flush()` writes them now.
+    """
+
+    def __init__(self, path: str = SELECTOR_STORE_PATH, max_misses: int = SELECTOR_MAX_MISSES,
+                 save_delay: float = SELECTOR_SAVE_DELAY):
+        self.path = Path(path)
+        self.max_misses = max_misses
+        self.save_delay = save_delay
+        self._entries: dict[str, list[dict]] = {}
+        self._loaded = False
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        self._write_lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable selector store {self.path}: {e}")
+            self._entries = {}
+
+    def _write(self, data: str):
+        with self._write_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(data, encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Failed to save selector store: {e}")
+
+    def _snapshot(self) -> str:
+        # Serialized on the caller's thread so the writer never sees entries mid-update
+        self._dirty = False
+        return json.dumps(self._entries, indent=1)
+
+    def _save(self):
+        """Mark the store changed; written after `save_delay`, or right away outside an event loop."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        while self._dirty:
+            await asyncio.sleep(self.save_delay)
+            if self._dirty:
+                await asyncio.to_thread(self._write, self._snapshot())
+
+    def flush(self):
+        """Write pending changes now (blocking)."""
+        if self._dirty:
+            self._write(self._snapshot())
+
+    def learn(self, url: str, code: str, final_url: Optional[str] = None):
+        """
+        Record the literal locators that code which just ran successfully used on `url`.
+
+        Locators after an explicit navigation are skipped. When the code ended
+        on a different page (`final_url`), learning also stops at the first
+        action that may have navigated there, since later locators ran elsewhere.
+        """
+        selectors = extract_selectors(code, before_navigation=True)
+        if final_url is not None and url_pattern(final_url) != url_pattern(url):
+            for index, selector in enumerate(selectors):
+                if selector["action"] in NAVIGATING_ACTIONS:
+                    selectors = selectors[:index + 1]
+                    break
+        if not selectors:
+            return
+        self._load()
+        entries = self._entries.setdefault(url_pattern(url), [])
+        for selector in selectors:
+            entry = next((e for e in entries if e["expression"] == selector["expression"]), None)
+            if entry is None:
+                entry = {**selector, "successes": 0, "failures": 0, "misses": 0}
+                entries.append(entry)
+            entry["action"] = selector["action"] or entry["action"]
+            entry["successes"] += 1
+            entry["misses"] = 0
+            entry["last_success"] = time.time()
+        self._save()
+
+    def find(self, url: str, target: Optional[str] = None, action: Optional[str] = None,
+             terms: Optional[list] = None) -> list[dict]:
+        """
+        Entries for the page, best first. `target` must match the label exactly;
+        `terms` keeps entries whose label shares a word with them.
+        """
+        self._load()
+        entries = self._entries.get(url_pattern(url), [])
+        if target is not None:
+            entries = [e for e in entries if e["target"] == normalize_target(target)]
+        if action is not None:
+            entries = [e for e in entries if e["action"] in (None, action)]
+        if terms is not None:
+            words = {w for term in terms for w in normalize_target(str(term)).split()}
+            entries = [e for e in entries if words & set(e["target"].split())]
+        return sorted(entries, key=lambda e: (confidence(e), e["successes"]), reverse=True)
+
+    def build_locator(self, page: AsyncPage, entry: dict) -> AsyncLocator:
+        locator = getattr(page, entry["method"])(*entry["args"], **entry["kwargs"])
+        for step in entry["chain"]:
+            locator = getattr(locator, step[0]) if len(step) == 1 else getattr(locator, step[0])(step[1])
+        return locator
+
+    async def verify(self, page: AsyncPage, entry: dict) -> bool:
+        """Whether the entry still matches something on the page; repeated misses drop it."""
+        try:
+            matched = await self.build_locator(page, entry).count() > 0
+        except Exception as e:
+            print(f"Learned selector {entry['expression']} failed to resolve: {e}")
+            matched = False
+        SELECTOR_LOOKUPS.inc(result="hit" if matched else "stale")
+        if matched:
+            if entry["misses"]:
+                entry["misses"] = 0
+                self._save()
+            return True
+        entry["failures"] += 1
+        entry["misses"] += 1
+        if entry["misses"] >= self.max_misses:
+            self.invalidate(page.url, entry["expression"])
+        else:
+            self._save()
+        return False
+
+    def invalidate(self, url: str, expression: str):
+        self._load()
+        pattern = url_pattern(url)
+        entries = self._entries.get(pattern, [])
+        remaining = [e for e in entries if e["expression"] != expression]
+        if len(remaining) != len(entries):
+            print(f"Dropped learned selector {expression} for {pattern}")
+            if remaining:
+                self._entries[pattern] = remaining
+            else:
+                self._entries.pop(pattern, None)
+            self._save()
+
+    async def relevant(self, page: AsyncPage, terms: list, limit: int = SELECTOR_PROMPT_LIMIT) -> list[dict]:
+        """Verified entries on the current page whose labels overlap `terms`, for the prompt."""
+        found = []
+        for entry in self.find(page.url, terms=terms):
+            if len(found) >= limit:
+                break
+            if await self.verify(page, entry):
+                found.append(entry)
+        return found
+
+    def stats(self) -> dict:
+        self._load()
+        return {"patterns": len(self._entries), "entries": sum(len(e) for e in self._entries.values())}
+
+
+selector_store = SelectorStore()
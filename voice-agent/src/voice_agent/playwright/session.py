@@ -0,0 +1,195 @@
+import asyncio
+import time
+import uuid
+from typing import Optional
+from playwright.async_api import async_playwright, Playwright as AsyncPlaywright, Browser as AsyncBrowser, BrowserContext as AsyncContext, Page as AsyncPage
+from ..constants import (
+    MAX_BROWSER_SESSIONS,
+    SESSION_ACQUIRE_TIMEOUT,
+    START_URL,
+    BROWSER_HEADLESS,
+    BROWSER_SLOW_MO,
+    CONTEXT_POOL_SIZE,
+    AUTH_USER,
+)
+from .element_index import install_element_index
+from .context_pool import ContextPool, DEFAULT_VIEWPORT
+from .auth_state import auth_state_cache
+from .resource_policy import install_resource_policy, resolve_policy_name
+
+
+class BrowserSession:
+    """
+    An isolated browser context and page owned by a single client connection.
+
+    `lock` serializes work that drives the page, so a REST replay cannot
+    interleave with an instruction the WebSocket scheduler is running.
+    """
+
+    def __init__(self, context: AsyncContext, page: AsyncPage, user: Optional[str] = None, resource_policy: str = "off"):
+        self.session_id = uuid.uuid4().hex
+        self.context = context
+        self.page = page
+        self.user = user
+        self.resource_policy = resource_policy
+        self.created_at = time.time()
+        self.closed = False
+        self.lock = asyncio.Lock()
+
+    def __repr__(self):
+        return f"BrowserSession(id={self.session_id[:8]}, closed={self.closed})"
+
+
+class SessionManager:
+    """
+    Multiplexes isolated browser sessions over one shared Chromium process.
+
+    The browser is launched lazily on the first session (or eagerly by
+    `start()`) and kept alive until `shutdown()` is called. Each session gets
+    its own `BrowserContext`, so cookies, storage and pages never leak between
+    clients. With a context pool, sessions opened at the pool's URL take a
+    context that is already loaded instead of creating one. Contexts start
+    with the user's saved login state when there is one.
+    """
+
+    def __init__(self, max_sessions: int = MAX_BROWSER_SESSIONS, acquire_timeout: float = SESSION_ACQUIRE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.acquire_timeout = acquire_timeout
+        self._playwright: Optional[AsyncPlaywright] = None
+        self._browser: Optional[AsyncBrowser] = None
+        self._launch_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._sessions: dict[str, BrowserSession] = {}
+        self.pool: Optional[ContextPool] = None
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Optional[BrowserSession]:
+        return self._sessions.get(session_id)
+
+    async def get_browser(self, headless: bool = False, slow_mo: int = 0) -> AsyncBrowser:
+        """Return the shared browser, launching it on first use."""
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=headless, slow_mo=slow_mo)
+            print(f"Shared browser launched (headless={headless})")
+            return self._browser
+
+    async def start(self, url: str = START_URL, pool_size: int = CONTEXT_POOL_SIZE,
+                    headless: bool = BROWSER_HEADLESS, slow_mo: int = BROWSER_SLOW_MO):
+        """Launch the browser at startup and fill the warm context pool for `url`; no-op when the pool is disabled."""
+        if pool_size <= 0:
+            return
+        self.pool = ContextPool(
+            lambda: self.get_browser(headless=headless, slow_mo=slow_mo), url, size=pool_size,
+            storage_state=lambda: auth_state_cache.get(AUTH_USER),
+            resource_policy=resolve_policy_name(headless=headless),
+        )
+        auth_state_cache.subscribe(self._on_auth_state_changed)
+        try:
+            await self.pool.start()
+        except Exception as e:
+            # Keep serving; sessions fall back to cold starts and the pool refills on use
+            print(f"Browser warm-up failed, sessions will start cold: {e}")
+
+    def _on_auth_state_changed(self, user: str):
+        # Pooled contexts carry the default user's old cookies; rebuild them on the event loop
+        if self.pool is None or user != AUTH_USER:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.pool.flush()
+
+    async def create_session(self, url: str, headless: bool = False, slow_mo: int = 0,
+                             viewport: Optional[dict] = None, user: Optional[str] = AUTH_USER,
+                             resource_policy: Optional[str] = None) -> BrowserSession:
+        """
+        Reserve a session slot, create an isolated context for `user` and navigate to `url`.
+        `resource_policy` (off/lean/strict/auto, default RESOURCE_POLICY) controls request interception.
+        """
+        resource_policy = resolve_policy_name(resource_policy, headless=headless)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"Session limit reached ({self.max_sessions} active sessions)")
+
+        warm = None
+        if self.pool is not None and url == self.pool.url and viewport in (None, DEFAULT_VIEWPORT) and user == AUTH_USER \
+                and resource_policy == self.pool.resource_policy:
+            warm = await self.pool.checkout()
+        if warm is not None:
+            auth_state_cache.watch(warm.page, user)
+            session = BrowserSession(warm.context, warm.page, user, resource_policy)
+            self._sessions[session.session_id] = session
+            print(f"Session {session.session_id[:8]} took a warm context at {url} ({self.active_sessions}/{self.max_sessions})")
+            return session
+
+        context = None
+        try:
+            browser = await self.get_browser(headless=headless, slow_mo=slow_mo)
+            options = {"viewport": viewport or DEFAULT_VIEWPORT}
+            state = auth_state_cache.get(user)
+            if state:
+                options["storage_state"] = state
+            context = await browser.new_context(**options)
+            await install_element_index(context)
+            await install_resource_policy(context, resource_policy)
+            page = await context.new_page()
+            auth_state_cache.watch(page, user)
+            await page.goto(url)
+        except Exception:
+            if context is not None:
+                await context.close()
+            self._slots.release()
+            raise
+
+        session = BrowserSession(context, page, user, resource_policy)
+        self._sessions[session.session_id] = session
+        print(f"Session {session.session_id[:8]} opened at {url} ({self.active_sessions}/{self.max_sessions})")
+        return session
+
+    async def release(self, session: BrowserSession):
+        """Close a session's context and free its slot. Safe to call more than once."""
+        if session.closed:
+            return
+        session.closed = True
+        self._sessions.pop(session.session_id, None)
+        try:
+            await session.context.close()
+        finally:
+            self._slots.release()
+            if self.pool is not None:
+                self.pool.top_up()
+        print(f"Session {session.session_id[:8]} closed ({self.active_sessions}/{self.max_sessions})")
+
+    async def shutdown(self):
+        """Close every open session, the context pool and the shared browser."""
+        if self.pool is not None:
+            await self.pool.stop()
+            self.pool = None
+
+        for session in list(self._sessions.values()):
+            try:
+                await self.release(session)
+            except Exception as e:
+                print(f"Error closing session {session.session_id[:8]}: {e}")
+
+        async with self._launch_lock:
+            if self._browser:
+                await self._browser.close()
+            if self._playwright:
+                await self._playwright.stop()
+            self._browser = None
+            self._playwright = None
+        print("Shared browser closed.")
+
+
+session_manager = SessionManager()
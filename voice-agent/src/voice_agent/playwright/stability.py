@@ -0,0 +1,52 @@
+import time
+from playwright.async_api import Page as AsyncPage
+from ..constants import SETTLE_QUIET_MS, SETTLE_TIMEOUT_MS
+
+# Resolves once the document is loaded and a MutationObserver has seen no
+# changes for `quietMs`, or with settled=false once `timeoutMs` elapses.
+SETTLE_JS = """
+({quietMs, timeoutMs}) => new Promise(resolve => {
+    const start = performance.now();
+    let lastChange = start;
+    const observer = new MutationObserver(() => { lastChange = performance.now(); });
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    const finish = (settled) => {
+        observer.disconnect();
+        resolve({settled, elapsed: performance.now() - start});
+    };
+    const tick = () => {
+        const now = performance.now();
+        if (document.readyState === 'complete' && now - lastChange >= quietMs) return finish(true);
+        if (now - start >= timeoutMs) return finish(false);
+        setTimeout(tick, Math.min(50, quietMs));
+    };
+    tick();
+})
+"""
+
+_NAVIGATION_ERRORS = ("execution context was destroyed", "navigat", "target closed")
+
+
+async def wait_for_settled(page: AsyncPage, quiet_ms: int = SETTLE_QUIET_MS, timeout_ms: int = SETTLE_TIMEOUT_MS) -> bool:
+    """
+    Wait until the DOM stops changing for `quiet_ms` and no navigation is pending.
+
+    Unlike `networkidle`, background polling does not keep this from resolving.
+    Returns False if the page did not settle within `timeout_ms`.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        remaining = int((deadline - time.monotonic()) * 1000)
+        if remaining <= 0:
+            return False
+        try:
+            result = await page.evaluate(SETTLE_JS, {"quietMs": quiet_ms, "timeoutMs": remaining})
+            return result["settled"]
+        except Exception as e:
+            if not any(marker in str(e).lower() for marker in _NAVIGATION_ERRORS):
+                raise
+            # A navigation replaced the document; wait for the new one and keep watching
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=max(remaining, 1))
+            except Exception:
+                return False
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import struct
+from typing import Optional
+from fastapi import WebSocket
+
+# Clients opt into JSON envelopes with this subprotocol or with ?protocol=json
+JSON_SUBPROTOCOL = "voice-agent.json"
+
+# Binary frames: 4-byte big-endian header length, UTF-8 JSON header, then the payload
+BINARY_HEADER = struct.Struct(">I")
+
+
+def negotiate(websocket: WebSocket) -> tuple[bool, Optional[str]]:
+    """Return (structured, subprotocol to accept) for an incoming connection."""
+    if JSON_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        return True, JSON_SUBPROTOCOL
+    return websocket.query_params.get("protocol") == "json", None
+
+
+def parse_client_message(raw: str) -> tuple[str, Optional[object]]:
+    """Split a client message into (text, request id). JSON clients may send {"text": ..., "id": ...}."""
+    if raw.startswith("{"):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return raw, None
+        if isinstance(message, dict) and isinstance(message.get("text"), str):
+            return message["text"], message.get("id")
+    return raw, None
+
+
+def pack_binary(header: dict, payload: bytes) -> bytes:
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return BINARY_HEADER.pack(len(encoded)) + encoded + payload
+
+
+def unpack_binary(frame: bytes) -> tuple[dict, bytes]:
+    (length,) = BINARY_HEADER.unpack_from(frame)
+    start = BINARY_HEADER.size
+    return json.loads(frame[start:start + length]), frame[start + length:]
+
+
+class Channel:
+    """
+    Output side of one /playwright/ws connection.
+
+    In text mode every call sends the human-readable line it was given, as the
+    endpoint always has. In structured mode log lines are dropped and clients
+    get typed JSON envelopes (`progress`, `state`, `result`, `error`, ...) plus
+    binary frames for images.
+    """
+
+    def __init__(self, websocket: WebSocket, structured: bool = False):
+        self.websocket = websocket
+        self.structured = structured
+        # The socket reader and the instruction task both send; keep frames whole and ordered
+        self._lock = asyncio.Lock()
+
+    async def _send_text(self, text: str):
+        async with self._lock:
+            await self.websocket.send_text(text)
+
+    async def send(self, envelope: dict):
+        await self._send_text(json.dumps(envelope, separators=(",", ":"), default=str))
+
+    async def log(self, text: str):
+        """Human-readable status line; text mode only."""
+        if not self.structured:
+            await self._send_text(text)
+
+    async def event(self, text: str, type: str, **fields):
+        """Send `text` in text mode, or `{"type": type, **fields}` in structured mode."""
+        if self.structured:
+            await self.send({"type": type, **fields})
+        else:
+            await self._send_text(text)
+
+    async def progress(self, text: str):
+        await self.event(text, "progress", message=text)
+
+    async def image(self, header: dict, data: bytes):
+        """Binary image frame; structured mode only."""
+        if self.structured:
+            frame = pack_binary({"type": "screenshot", **header}, data)
+            async with self._lock:
+                await self.websocket.send_bytes(frame)
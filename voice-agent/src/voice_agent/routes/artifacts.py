@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from ..playwright.artifacts import artifact_store
+router = APIRouter()
+
+
+# serve a stored screenshot; ids are content hashes, so a URL never changes what it points to
+@router.get("/artifacts/{artifact_id}")
+def get_artifact(artifact_id: str):
+    artifact = artifact_store.get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found or expired")
+    return FileResponse(
+        artifact.path,
+        media_type=artifact.mime_type,
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+# artifact count and disk usage
+@router.get("/artifacts")
+def artifact_stats():
+    return artifact_store.stats()
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, WebSocket
+from typing import Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from ..playwright.automation_class import PersistentPlaywright
+from ..playwright.screenshots import capture_screenshot, run_off_loop
+from ..playwright.artifacts import artifact_store
+from ..playwright.macros import MacroRecorder, macro_store
+from ..workers import worker_pool
+from ..protocol import Channel, negotiate, parse_client_message
+from ..scheduler import InstructionScheduler, Job, is_stop_phrase
+from ..constants import BROWSER_HEADLESS, BROWSER_SLOW_MO, START_URL, AUTH_USER, SCHEDULER_POLICY
 router = APIRouter()
 
 # open browser
 @router.get("/playwright/open")
 def open_browser():
-    PersistentPlaywright.open("https://farmce-dev.oraczen.xyz/", headless=False, slow_mo=200)
+    PersistentPlaywright.open(START_URL, headless=BROWSER_HEADLESS, slow_mo=BROWSER_SLOW_MO)
     return {"status": "browser opened"}
 
 
@@ -18,112 +26,320 @@ def close_browser():
 
 @router.websocket("/playwright/ws")
 async def playwright_ws(websocket: WebSocket):
-    await websocket.accept()
-    await websocket.send_text("Connected to Playwright WebSocket")
+    # Text lines by default; JSON envelopes and binary screenshots when the client asks
+    structured, subprotocol = negotiate(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    if worker_pool.enabled:
+        # Browser sessions live in worker processes; relay this connection to one of them
+        try:
+            # `client` is a placement hint only; the login loaded is always AUTH_USER's
+            await worker_pool.proxy(websocket, key=websocket.query_params.get("client"), structured=structured)
+        except Exception as e:
+            print(f"Worker relay error: {str(e)}")
+            try:
+                message = f"Failed to reach a browser worker: {str(e)}"
+                await Channel(websocket, structured).event(message, "error", message=message)
+            except Exception:
+                pass
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+        return
+
+    channel = Channel(websocket, structured)
+    await channel.log("Connected to Playwright WebSocket")
     
-    # Open async browser for WebSocket operations
+    # Open an isolated browser session for this WebSocket
     try:
-        await PersistentPlaywright.open_async("https://farmce-dev.oraczen.xyz/", headless=False, slow_mo=200)
-        await websocket.send_text("Async browser opened and ready!")
+        # Sessions start from the configured account's saved login, if any. Clients are not
+        # authenticated, so they cannot pick whose cookies to load.
+        # ?resources=off|lean|strict overrides the request interception policy for this session
+        session = await PersistentPlaywright.open_async(START_URL, headless=BROWSER_HEADLESS, slow_mo=BROWSER_SLOW_MO, user=AUTH_USER,
+                                                        resource_policy=websocket.query_params.get("resources"))
         
         # Send initial page state
-        initial_state = await PersistentPlaywright.get_page_state_async()
-        if "error" not in initial_state:
-            await websocket.send_text(f"Current page: {initial_state.get('title', 'Unknown')} at {initial_state.get('url', 'Unknown')}")
+        initial_state = await PersistentPlaywright.get_page_state_async(session)
+        await channel.event("Async browser opened and ready!", "ready", session_id=session.session_id,
+                            page=await page_info(initial_state))
+        if initial_state.ok:
+            await channel.log(f"Current page: {await initial_state.describe()}")
         
     except Exception as e:
-        await websocket.send_text(f"Failed to open browser: {str(e)}")
+        await channel.event(f"Failed to open browser: {str(e)}", "error", message=f"Failed to open browser: {str(e)}")
         await websocket.close()
         return
     
+    # Instructions run in a background task so "stop" or a correction can interrupt them
+    scheduler = None
+    recorder = MacroRecorder(macro_store)
+
+    async def run_job(job: Job):
+        # Holds the page against REST replays of the same session
+        async with session.lock:
+            if job.kind == "replay":
+                await run_replay(channel, session, job)
+            else:
+                await run_instruction(channel, session, job, recorder)
+
     try:
+        scheduler = InstructionScheduler(
+            run_job,
+            on_cancelled=lambda job: channel.event(f"Cancelled instruction: '{job.text}'", "cancelled", id=job.request_id, instruction=job.text),
+            on_dropped=lambda job: channel.event(f"Dropped stale instruction: '{job.text}'", "dropped", id=job.request_id, instruction=job.text),
+            policy=websocket.query_params.get("policy", SCHEDULER_POLICY),
+        )
+        scheduler.start()
+
         while True:
+            request_id = None
             try:
-                msg = await websocket.receive_text()
+                msg, request_id = parse_client_message(await websocket.receive_text())
                 print(f"Received message: {msg}")
                 
                 # Handle special commands
                 if msg.lower() in {"quit", "exit", "close"}:
-                    await websocket.send_text("Closing WebSocket session...")
+                    await channel.log("Closing WebSocket session...")
                     break
-                elif msg.lower() in {"status", "state"}:
-                    state = await PersistentPlaywright.get_page_state_async()
-                    if "error" not in state:
-                        await websocket.send_text(f"Current state: {state.get('title', 'Unknown')} at {state.get('url', 'Unknown')}")
+                elif msg.lower().startswith("record "):
+                    # "record <name>": save each successful instruction from here on as a macro step
+                    recorder.start(msg[7:])
+                    text = f"Recording macro '{recorder.macro.name}'. Say 'end recording' to save it."
+                    await channel.event(text, "recording", id=request_id, macro=recorder.macro.name, recording=True)
+                    continue
+                elif msg.lower() in {"end recording", "stop recording", "save macro"}:
+                    macro = recorder.finish()
+                    if macro is None:
+                        text = "Not recording"
+                    elif not macro.steps:
+                        text = f"Macro '{macro.name}' had no successful steps; nothing saved"
                     else:
-                        await websocket.send_text(f"State error: {state.get('error')}")
+                        text = f"Saved macro '{macro.name}' with {len(macro.steps)} steps"
+                    await channel.event(text, "recording", id=request_id, recording=False,
+                                        macro=macro.name if macro else None, steps=len(macro.steps) if macro else 0)
+                    continue
+                elif msg.lower() in {"macros", "list macros"}:
+                    macros = macro_store.list()
+                    text = "Macros: " + (", ".join(f"{m['name']} ({m['steps']} steps)" for m in macros) or "none")
+                    await channel.event(text, "macros", id=request_id, macros=macros)
+                    continue
+                elif msg.lower().startswith("replay "):
+                    # Runs like an instruction, so "stop" and barge-in cancel it too
+                    await scheduler.submit(Job(msg[7:].strip(), request_id, kind="replay"))
+                    continue
+                elif is_stop_phrase(msg):
+                    stopped = await scheduler.stop()
+                    text = "Stopped the current instruction" if stopped else "Nothing to stop"
+                    await channel.event(text, "stopped", id=request_id, stopped=stopped)
+                    continue
+                elif msg.lower() in {"status", "state"}:
+                    state = await PersistentPlaywright.get_page_state_async(session)
+                    text = f"Current state: {await state.describe()}" if state.ok else f"State error: {state.error}"
+                    await channel.event(text, "state", id=request_id, page=await page_info(state), busy=scheduler.busy, queued=scheduler.pending)
                     continue
                 elif msg.lower() in {"screenshot", "snap"}:
-                    state = await PersistentPlaywright.get_page_state_async()
-                    if "error" not in state and "screenshot_base64" in state:
-                        await websocket.send_text(f"Screenshot captured (base64 length: {len(state['screenshot_base64'])})")
-                    else:
-                        await websocket.send_text("Failed to capture screenshot")
+                    await send_screenshot(channel, session, request_id)
                     continue
                 elif msg.lower().startswith("context "):
                     # Extract search terms from "context get started" or "context dairy"
                     search_terms = msg[8:].split()  # Remove "context " prefix
-                    element_context = await PersistentPlaywright.get_element_context_async(search_terms)
-                    if "error" not in element_context:
-                        await websocket.send_text(f" Found {element_context.get('total_found', 0)} elements for: {', '.join(search_terms)}")
+                    element_context = await PersistentPlaywright.get_element_context_async(session, search_terms)
+                    if channel.structured:
+                        await channel.send({"type": "context", "id": request_id, "terms": search_terms, **element_context})
+                    elif "error" not in element_context:
+                        await channel.log(f" Found {element_context.get('total_found', 0)} elements for: {', '.join(search_terms)}")
                         for ctx in element_context.get("element_contexts", [])[:3]:
-                            await websocket.send_text(f"Element: {ctx['search_term']} - Tag: {ctx['tag_name']} - Attrs: {list(ctx['attributes'].keys())}")
+                            await channel.log(f"Element: {ctx['search_term']} - Tag: {ctx['tag_name']} - Attrs: {list(ctx['attributes'].keys())}")
                     else:
-                        await websocket.send_text(f"Context error: {element_context.get('error')}")
+                        await channel.log(f"Context error: {element_context.get('error')}")
                     continue
                 
-                # Process automation instruction
-                await websocket.send_text(f"Processing instruction: '{msg}'")
-                await websocket.send_text(" Generating Playwright code...")
-                
-                # Execute the instruction using async method
-                result = await PersistentPlaywright.execute_instruction_async(msg)
-                
-                # Check if there was a retry and inform the user
-                if "attempt" in str(result.get("message", "")) and "attempts" in str(result.get("message", "")):
-                    await websocket.send_text("Code was retried with enhanced context after initial failure")
-                
-                # Send detailed response with enhanced formatting
-                if result["status"] == "success":
-                    await websocket.send_text("Code executed successfully!")
-                    await websocket.send_text(f"Generated Code:\n```python\n{result['executed_code']}\n```")
-                    await websocket.send_text(f" Message: {result['message']}")
-                    
-                    # Send updated page state
-                    if "page_state" in result and "error" not in result["page_state"]:
-                        page_state = result["page_state"]
-                        await websocket.send_text(f"Updated page: {page_state.get('title', 'Unknown')} at {page_state.get('url', 'Unknown')}")
-                        
-                        # Send screenshot info if available
-                        if "screenshot_base64" in page_state:
-                            await websocket.send_text(f"Screenshot captured (base64 length: {len(page_state['screenshot_base64'])})")
-                else:
-                    await websocket.send_text("Execution failed!")
-                    await websocket.send_text(f"Generated Code:\n```python\n{result['executed_code']}\n```")
-                    await websocket.send_text(f" Error: {result['message']}")
-                    
-                    # Still send page state even on error
-                    if "page_state" in result and "error" not in result["page_state"]:
-                        page_state = result["page_state"]
-                        await websocket.send_text(f"Current page: {page_state.get('title', 'Unknown')} at {page_state.get('url', 'Unknown')}")
-                        
-                        # Send screenshot info if available
-                        if "screenshot_base64" in page_state:
-                            await websocket.send_text(f"Screenshot captured (base64 length: {len(page_state['screenshot_base64'])})")
+                # Automation instruction: the scheduler's policy decides what happens to earlier ones
+                await scheduler.submit(Job(msg, request_id))
 
+            except WebSocketDisconnect:
+                print("WebSocket client disconnected")
+                break
             except Exception as e:
-                await websocket.send_text(f"Processing Error: {str(e)}")
+                await channel.event(f"Processing Error: {str(e)}", "error", id=request_id, message=str(e))
                 print(f"WebSocket processing error: {str(e)}")
                 
     except Exception as e:
-        await websocket.send_text(f"WebSocket Error: {str(e)}")
         print(f"WebSocket error: {str(e)}")
+        try:
+            await channel.event(f"WebSocket Error: {str(e)}", "error", message=str(e))
+        except Exception:
+            pass
     finally:
+        # Release the context and session slot before talking to the client, which may already be gone
         try:
-            await websocket.send_text("🧹 Cleaning up browser session...")
-            await PersistentPlaywright.close_async()
-            await websocket.send_text("Browser closed successfully")
+            if scheduler is not None:
+                await scheduler.close()
         except Exception as e:
-            await websocket.send_text(f" Error during cleanup: {str(e)}")
+            print(f"Error stopping the instruction scheduler: {str(e)}")
         finally:
+            try:
+                await PersistentPlaywright.close_async(session)
+            except Exception as e:
+                print(f"Error closing browser session: {str(e)}")
+        try:
+            await channel.log("🧹 Browser session cleaned up")
+            await channel.event("Browser closed successfully", "closed")
             await websocket.close()
+        except Exception:
+            pass
+
+
+async def run_instruction(channel: Channel, session, job: Job, recorder: Optional[MacroRecorder] = None):
+    """Generate and execute one instruction, then report the result. Runs as a cancellable task."""
+    msg, request_id = job.text, job.request_id
+    try:
+        start_url = session.page.url
+        # Process automation instruction
+        await channel.log(f"Processing instruction: '{msg}'")
+        await channel.log(" Generating Playwright code...")
+        
+        # Execute the instruction, streaming generation progress to the client
+        # Compound instructions are planned into steps and run one by one
+        result = await PersistentPlaywright.execute_plan_async(session, msg, progress=channel.progress)
+        retried = "attempt" in str(result.get("message", "")) and "attempts" in str(result.get("message", ""))
+        if recorder is not None and recorder.recording:
+            # Record each planned step separately so replay can check and heal them one at a time
+            for step in result.get("steps", [{**result, "instruction": msg, "url": start_url}]):
+                if step["status"] == "success":
+                    recorder.add(step["instruction"], step["executed_code"], step["url"])
+        
+        if channel.structured:
+            await send_result(channel, result, msg, request_id, retried)
+            return
+        
+        if result.get("plan"):
+            await channel.log("Planned steps: " + " → ".join(result["plan"]))
+            for step in result["steps"]:
+                await channel.log(f"Step {step['step']} {step['status']} after {step['attempts']} run(s): {step['instruction']}")
+        if result.get("routed"):
+            await channel.log("Matched a simple command on the page (no LLM call)")
+        if result.get("cache_hit"):
+            await channel.log("Reused cached code for this page (no LLM call)")
+        if result.get("timings"):
+            timings = ", ".join(f"{stage}={ms:.0f}ms" for stage, ms in result["timings"].items())
+            await channel.log(f"Timings: {timings}")
+        
+        # Check if there was a retry and inform the user
+        if retried:
+            await channel.log("Code was retried with enhanced context after initial failure")
+        
+        # Send detailed response with enhanced formatting
+        if result["status"] == "success":
+            await channel.log("Code executed successfully!")
+            await channel.log(f"Generated Code:\n```python\n{result['executed_code']}\n```")
+            await channel.log(f" Message: {result['message']}")
+            
+            # Send updated page state
+            if "page_state" in result and result["page_state"].ok:
+                page_state = result["page_state"]
+                await channel.log(f"Updated page: {await page_state.describe()}")
+        else:
+            await channel.log("Execution failed!")
+            await channel.log(f"Generated Code:\n```python\n{result['executed_code']}\n```")
+            await channel.log(f" Error: {result['message']}")
+            if result.get("debug_screenshot_url"):
+                await channel.log(f"Debug screenshot: {result['debug_screenshot_url']}")
+            
+            # Still send page state even on error
+            if "page_state" in result and result["page_state"].ok:
+                page_state = result["page_state"]
+                await channel.log(f"Current page: {await page_state.describe()}")
+    except Exception as e:
+        await channel.event(f"Processing Error: {str(e)}", "error", id=request_id, message=str(e))
+        print(f"Instruction processing error: {str(e)}")
+
+
+async def run_replay(channel: Channel, session, job: Job):
+    """Replay a saved macro (job.text is its name) and report the outcome. Runs as a cancellable task."""
+    request_id = job.request_id
+    try:
+        macro = macro_store.load(job.text)
+        if macro is None:
+            await channel.event(f"No macro named '{job.text}'", "error", id=request_id, message=f"No macro named '{job.text}'")
+            return
+
+        await channel.log(f"Replaying macro '{macro.name}' ({len(macro.steps)} steps)")
+        result = await PersistentPlaywright.replay_macro_async(session, macro, progress=channel.progress)
+        page_state = result.pop("page_state")
+        if channel.structured:
+            await channel.send({"type": "replay", "id": request_id, **result, "page": await page_info(page_state)})
+            return
+
+        for step in result["steps"]:
+            note = f" ({step['problem']})" if "problem" in step else ""
+            await channel.log(f"Step {step['step']} {step['status']} in {step['ms']:.0f}ms: {step['instruction']}{note}")
+        await channel.log(("Replay finished: " if result["status"] == "success" else "Replay failed: ") + result["message"])
+        if page_state.ok:
+            await channel.log(f"Current page: {await page_state.describe()}")
+    except Exception as e:
+        await channel.event(f"Replay Error: {str(e)}", "error", id=request_id, message=str(e))
+        print(f"Macro replay error: {str(e)}")
+
+
+async def page_info(state) -> dict:
+    """Page state fields for structured messages."""
+    if not state.ok:
+        return {"ok": False, "error": state.error}
+    return {"ok": True, "url": state.url, "title": await state.title()}
+
+
+async def send_screenshot(channel: Channel, session, request_id=None):
+    if channel.structured:
+        # Raw image bytes in a binary frame instead of base64 text
+        try:
+            screenshot = await capture_screenshot(session.page)
+            data = await screenshot.bytes()
+        except Exception as e:
+            await channel.send({"type": "error", "id": request_id, "message": f"Failed to capture screenshot: {str(e)}"})
+            return
+        await channel.image({"id": request_id, "mime_type": screenshot.mime_type, "url": session.page.url}, data)
+        return
+
+    # Text clients get a link to the stored image rather than inline base64
+    try:
+        artifact = await artifact_store.put_screenshot(await capture_screenshot(session.page))
+    except Exception as e:
+        await channel.log(f"Failed to capture screenshot: {str(e)}")
+        return
+    await channel.log(f"Screenshot captured: {artifact.url}")
+
+
+async def send_result(channel: Channel, result: dict, instruction: str, request_id=None, retried: bool = False):
+    """
+    One typed result message per instruction. A failure's debug screenshot is linked by its
+    artifact URL and follows as a binary frame.
+    """
+    page_state = result.get("page_state")
+    artifact = artifact_store.get(result["debug_screenshot_id"]) if result.get("debug_screenshot_id") else None
+    await channel.send({
+        "type": "result",
+        "id": request_id,
+        "instruction": instruction,
+        "status": result["status"],
+        "message": result["message"],
+        "code": result.get("executed_code", ""),
+        "cache_hit": result.get("cache_hit", False),
+        "routed": result.get("routed", False),
+        "retried": retried,
+        "timings": result.get("timings", {}),
+        "prompt_sizes": result.get("prompt_sizes", []),
+        "plan": result.get("plan"),
+        "steps": result.get("steps"),
+        "page": await page_info(page_state) if page_state is not None else None,
+        "has_screenshot": artifact is not None,
+        "screenshot_url": artifact.url if artifact else None,
+    })
+    if artifact is not None:
+        try:
+            data = await run_off_loop(artifact.path.read_bytes)
+        except OSError as e:
+            # Evicted in the meantime; the URL in the result now returns 404
+            print(f"Debug screenshot {artifact.id} unavailable: {e}")
+            return
+        await channel.image({"id": request_id, "mime_type": artifact.mime_type, "artifact_url": artifact.url, "debug": True}, data)
\ No newline at end of file
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from ..playwright.automation_class import PersistentPlaywright
+from ..playwright.macros import macro_store
+from ..playwright.session import session_manager
+from ..workers import worker_pool
+router = APIRouter()
+
+
+def load_macro(name: str):
+    try:
+        macro = macro_store.load(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if macro is None:
+        raise HTTPException(status_code=404, detail=f"No macro named '{name}'")
+    return macro
+
+
+# list saved macros
+@router.get("/macros")
+def list_macros():
+    return {"macros": macro_store.list()}
+
+
+# show one macro's steps
+@router.get("/macros/{name}")
+def get_macro(name: str):
+    macro = load_macro(name)
+    return {"name": macro.name, "created_at": macro.created_at, "steps": [step.__dict__ for step in macro.steps]}
+
+
+# delete a macro
+@router.delete("/macros/{name}")
+def delete_macro(name: str):
+    load_macro(name)
+    macro_store.delete(name)
+    return {"status": "deleted", "name": name}
+
+
+# replay a macro on an open WebSocket session's page
+@router.post("/macros/{name}/replay")
+async def replay_macro(name: str, session_id: str, heal: bool = True):
+    macro = load_macro(name)
+    if worker_pool.enabled:
+        # The session lives in one of the workers; ask each until one knows it
+        response = await worker_pool.forward("POST", f"/macros/{macro.name}/replay",
+                                             params={"session_id": session_id, "heal": heal})
+        if response is None:
+            raise HTTPException(status_code=404, detail=f"No open session {session_id}")
+        return JSONResponse(response.json(), status_code=response.status_code)
+
+    session = session_manager.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"No open session {session_id}")
+    # Waits for any instruction the session's WebSocket is running
+    async with session.lock:
+        result = await PersistentPlaywright.replay_macro_async(session, macro, heal=heal)
+    page_state = result.pop("page_state")
+    result["page"] = {"url": page_state.url} if page_state.ok else {"error": page_state.error}
+    return result
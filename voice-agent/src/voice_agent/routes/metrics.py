@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..metrics import REGISTRY, ACTIVE_SESSIONS, CODE_CACHE_ENTRIES, WARM_CONTEXTS, WORKER_CONNECTIONS, ARTIFACT_STORE_BYTES
+from ..playwright.session import session_manager
+from ..playwright.code_cache import code_cache
+from ..playwright.artifacts import artifact_store
+from ..workers import worker_pool
+router = APIRouter()
+
+
+# Prometheus scrape endpoint
+@router.get("/metrics")
+def metrics():
+    ACTIVE_SESSIONS.set(session_manager.active_sessions)
+    CODE_CACHE_ENTRIES.set(code_cache.stats()["entries"])
+    WARM_CONTEXTS.set(session_manager.pool.available if session_manager.pool else 0)
+    ARTIFACT_STORE_BYTES.set(artifact_store.stats()["bytes"])
+    # Workers expose their own session and stage metrics on their ports
+    for worker in worker_pool.workers if worker_pool.enabled else []:
+        WORKER_CONNECTIONS.set(worker.connections, worker=worker.index)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
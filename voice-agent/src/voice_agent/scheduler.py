@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+from .constants import SCHEDULER_POLICY, SCHEDULER_MAX_QUEUE
+from .metrics import INSTRUCTIONS_TOTAL
+
+# Utterances that only cancel what is running and waiting
+STOP_PHRASES = {"stop", "cancel", "never mind", "nevermind", "abort", "wait", "hold on"}
+
+# A new instruction cancels the running one and drops anything queued
+BARGE_IN = "barge_in"
+# The running instruction finishes; only the newest queued instruction is kept
+LATEST = "latest"
+# First in, first out; the oldest queued instructions are dropped past the queue limit
+QUEUE = "queue"
+POLICIES = {BARGE_IN, LATEST, QUEUE}
+
+
+def is_stop_phrase(text: str) -> bool:
+    return text.strip().lower().rstrip(".!") in STOP_PHRASES
+
+
+class Job:
+    """One queued instruction. `kind` lets the handler tell plain instructions from other work (e.g. "replay")."""
+
+    def __init__(self, text: str, request_id=None, kind: str = "instruction"):
+        self.text = text
+        self.request_id = request_id
+        self.kind = kind
+        self.submitted_at = time.perf_counter()
+
+    @property
+    def age(self) -> float:
+        return time.perf_counter() - self.submitted_at
+
+    def __repr__(self):
+        return f"Job({self.text!r}, id={self.request_id!r}, kind={self.kind!r})"
+
+
+class InstructionScheduler:
+    """
+    Runs a session's instructions in a background task, decoupled from the socket reader.
+
+    `handler(job)` does the work for one instruction. `on_cancelled(job)` and
+    `on_dropped(job)` let the caller tell the client what happened to
+    instructions that were interrupted or discarded under the policy.
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[None]],
+                 on_cancelled: Optional[Callable[[Job], Awaitable[None]]] = None,
+                 on_dropped: Optional[Callable[[Job], Awaitable[None]]] = None,
+                 policy: str = SCHEDULER_POLICY, max_queue: int = SCHEDULER_MAX_QUEUE):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduler policy: {policy} (expected one of {sorted(POLICIES)})")
+        self.handler = handler
+        self.on_cancelled = on_cancelled
+        self.on_dropped = on_dropped
+        self.policy = policy
+        self.max_queue = max(1, max_queue)
+        self._queue: deque[Job] = deque()
+        self._wakeup = asyncio.Event()
+        self._current: Optional[Job] = None
+        self._current_task: Optional[asyncio.Task] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        self._runner = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closed:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            job = self._queue.popleft()
+            self._current = job
+            self._current_task = asyncio.create_task(self.handler(job))
+            try:
+                await self._current_task
+            except asyncio.CancelledError:
+                if self._closed or asyncio.current_task().cancelling():
+                    raise
+                # Only the job was cancelled (barge-in or stop); keep serving
+                INSTRUCTIONS_TOTAL.inc(status="cancelled")
+                await self._notify(self.on_cancelled, job)
+            except Exception as e:
+                print(f"Instruction {job!r} failed in scheduler: {e}")
+            finally:
+                self._current = None
+                self._current_task = None
+
+    async def _notify(self, callback, job: Job):
+        if callback is None:
+            return
+        try:
+            await callback(job)
+        except Exception as e:
+            print(f"Scheduler callback failed for {job!r}: {e}")
+
+    async def _drop_queued(self, keep: int = 0):
+        while len(self._queue) > keep:
+            await self._notify(self.on_dropped, self._queue.popleft())
+
+    def cancel_current(self) -> bool:
+        if self._current_task is not None and not self._current_task.done():
+            self._current_task.cancel()
+            return True
+        return False
+
+    async def stop(self) -> bool:
+        """Cancel the running instruction and drop everything queued. Returns whether anything was stopped."""
+        stopped = bool(self._queue) or self.busy
+        await self._drop_queued()
+        self.cancel_current()
+        return stopped
+
+    async def submit(self, job: Job):
+        """Queue an instruction, applying the policy to what is already running or waiting."""
+        if self.policy == BARGE_IN:
+            await self._drop_queued()
+            self.cancel_current()
+        elif self.policy == LATEST:
+            await self._drop_queued()
+        elif self.policy == QUEUE:
+            await self._drop_queued(keep=self.max_queue - 1)
+        self._queue.append(job)
+        self._wakeup.set()
+
+    async def close(self):
+        """Cancel everything and stop the background task."""
+        self._closed = True
+        self._queue.clear()
+        self.cancel_current()
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
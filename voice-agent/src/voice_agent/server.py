@@ -1,5 +1,8 @@
 from .main import app
 from .routes.interaction import router
+from .routes.metrics import router as metrics_router
+from .routes.macros import router as macros_router
+from .routes.artifacts import router as artifacts_router
 from fastapi.middleware.cors import CORSMiddleware
 import logging 
 
@@ -14,11 +17,15 @@ app.add_middleware(
 )
 app.get("/")(lambda: {"message": "Hello, World!"})
 app.include_router(router, tags=["automate"])
+app.include_router(metrics_router, tags=["metrics"])
+app.include_router(macros_router, tags=["macros"])
+app.include_router(artifacts_router, tags=["artifacts"])
 
 def main():
     import uvicorn
     logger.info("Starting server")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # permessage-deflate is offered to every WebSocket client; JSON envelopes compress well
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
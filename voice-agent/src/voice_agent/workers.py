@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import math
+import os
+import sys
+from typing import Optional
+import httpx
+import websockets
+from fastapi import WebSocket
+from .constants import (
+    WORKER_PROCESSES,
+    WORKER_BASE_PORT,
+    WORKER_STICKY_SLACK,
+    IS_WORKER,
+    MAX_BROWSER_SESSIONS,
+    CONTEXT_POOL_SIZE,
+)
+
+# How long a freshly spawned worker may take to launch its browser and fill its pool
+WORKER_START_TIMEOUT = 60.0
+WORKER_MONITOR_INTERVAL = 1.0
+
+
+class Worker:
+    """One uvicorn process running this app with its own event loop and browser."""
+
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.connections = 0
+        self.ready = False
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def __repr__(self):
+        return f"Worker({self.index}, port={self.port}, connections={self.connections}, ready={self.ready})"
+
+
+class WorkerPool:
+    """
+    Runs browser sessions in `size` worker processes and routes each WebSocket to one.
+
+    A connection stays on the worker it was placed on for its whole life (its
+    browser context lives there). A connection with a placement key (the
+    client's `client` query parameter) goes to that key's home worker, chosen
+    by rendezvous hashing so a reconnecting client keeps hitting the same
+    in-memory code cache, unless that worker carries more than `sticky_slack`
+    sessions above the least-loaded one; other connections go to the
+    least-loaded worker. The key only picks a process, never login state.
+    Crashed workers are restarted.
+    """
+
+    def __init__(self, size: int = WORKER_PROCESSES, base_port: int = WORKER_BASE_PORT,
+                 sticky_slack: int = WORKER_STICKY_SLACK):
+        self.size = size
+        self.sticky_slack = sticky_slack
+        self.workers = [Worker(i, base_port + i) for i in range(size)]
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and not IS_WORKER
+
+    def _worker_env(self) -> dict:
+        env = dict(os.environ)
+        env["VOICE_AGENT_WORKER"] = "true"
+        # Split the global limits so the whole node keeps the configured totals
+        env["MAX_BROWSER_SESSIONS"] = str(max(1, math.ceil(MAX_BROWSER_SESSIONS / self.size)))
+        if CONTEXT_POOL_SIZE > 0:
+            env["CONTEXT_POOL_SIZE"] = str(max(1, math.ceil(CONTEXT_POOL_SIZE / self.size)))
+        return env
+
+    async def _spawn(self, worker: Worker):
+        worker.ready = False
+        worker.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "uvicorn", f"{__package__}.server:app",
+            "--host", "127.0.0.1", "--port", str(worker.port),
+            env=self._worker_env(),
+        )
+        await self._wait_ready(worker)
+
+    async def _wait_ready(self, worker: Worker):
+        deadline = asyncio.get_running_loop().time() + WORKER_START_TIMEOUT
+        async with httpx.AsyncClient(timeout=1.0) as client:
+            while asyncio.get_running_loop().time() < deadline:
+                if not worker.alive:
+                    raise RuntimeError(f"Worker {worker.index} exited with code {worker.process.returncode}")
+                try:
+                    await client.get(worker.url + "/")
+                    worker.ready = True
+                    print(f"Worker {worker.index} ready on port {worker.port} (pid {worker.process.pid})")
+                    return
+                except httpx.TransportError:
+                    await asyncio.sleep(0.2)
+        raise RuntimeError(f"Worker {worker.index} did not start within {WORKER_START_TIMEOUT}s")
+
+    async def start(self):
+        """Spawn every worker and wait until they accept connections."""
+        results = await asyncio.gather(*(self._spawn(w) for w in self.workers), return_exceptions=True)
+        for worker, result in zip(self.workers, results):
+            if isinstance(result, Exception):
+                print(f"Worker {worker.index} failed to start: {result}")
+        self._monitor = asyncio.create_task(self._watch())
+        print(f"Worker pool started ({sum(w.ready for w in self.workers)}/{self.size} ready)")
+
+    async def _watch(self):
+        while not self._stopping:
+            await asyncio.sleep(WORKER_MONITOR_INTERVAL)
+            for worker in self.workers:
+                if worker.process is not None and not worker.alive and not self._stopping:
+                    print(f"Worker {worker.index} exited with code {worker.process.returncode}, restarting")
+                    try:
+                        await self._spawn(worker)
+                    except Exception as e:
+                        print(f"Worker {worker.index} restart failed: {e}")
+
+    def _home(self, key: str, candidates: list) -> Worker:
+        # Rendezvous hashing: adding or losing a worker only moves that worker's keys
+        return max(candidates, key=lambda w: hashlib.sha256(f"{key}:{w.index}".encode("utf-8")).digest())
+
+    def choose(self, key: Optional[str] = None) -> Worker:
+        """Pick a worker for a new connection: the key's home worker unless it is noticeably busier."""
+        candidates = [w for w in self.workers if w.ready and w.alive]
+        if not candidates:
+            raise RuntimeError("No browser workers available")
+        least_loaded = min(candidates, key=lambda w: w.connections)
+        if key:
+            home = self._home(key, candidates)
+            if home.connections <= least_loaded.connections + self.sticky_slack:
+                return home
+        return least_loaded
+
+    async def proxy(self, websocket: WebSocket, key: Optional[str] = None, structured: bool = False):
+        """Relay an accepted client WebSocket to a worker's /playwright/ws until either side closes."""
+        worker = self.choose(key)
+        worker.connections += 1
+        query = websocket.url.query
+        if structured and "protocol=json" not in query:
+            # The client negotiated JSON via subprotocol; carry it to the worker as a query flag
+            query = "&".join(filter(None, [query, "protocol=json"]))
+        upstream_url = f"ws://127.0.0.1:{worker.port}/playwright/ws" + (f"?{query}" if query else "")
+        try:
+            async with websockets.connect(upstream_url, max_size=None) as upstream:
+                async def client_to_worker():
+                    while True:
+                        message = await websocket.receive()
+                        if message["type"] == "websocket.disconnect":
+                            return
+                        if message.get("text") is not None:
+                            await upstream.send(message["text"])
+                        elif message.get("bytes") is not None:
+                            await upstream.send(message["bytes"])
+
+                async def worker_to_client():
+                    async for message in upstream:
+                        if isinstance(message, str):
+                            await websocket.send_text(message)
+                        else:
+                            await websocket.send_bytes(message)
+
+                tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                for task in done:
+                    if task.exception() and not isinstance(task.exception(), websockets.ConnectionClosed):
+                        print(f"Worker {worker.index} relay error: {task.exception()}")
+        finally:
+            worker.connections -= 1
+
+    async def forward(self, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """
+        Send an HTTP request to each ready worker until one answers with something
+        other than 404, e.g. to reach the worker that owns a session id.
+        """
+        async with httpx.AsyncClient(timeout=None) as client:
+            for worker in self.workers:
+                if not (worker.ready and worker.alive):
+                    continue
+                response = await client.request(method, worker.url + path, **kwargs)
+                if response.status_code != 404:
+                    return response
+        return None
+
+    async def shutdown(self):
+        """Stop the monitor and terminate every worker."""
+        self._stopping = True
+        if self._monitor:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            try:
+                await asyncio.wait_for(worker.process.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                worker.process.kill()
+        print("Worker pool stopped.")
+
+    def stats(self) -> list:
+        return [
+            {"worker": w.index, "port": w.port, "ready": w.ready, "alive": w.alive, "connections": w.connections}
+            for w in self.workers
+        ]
+
+
+worker_pool = WorkerPool()
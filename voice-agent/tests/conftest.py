@@ -0,0 +1,4 @@
+import os
+
+# The LLM client is created at import time and only needs a key to exist
+os.environ.setdefault("OPENAI_API_KEY", "test")
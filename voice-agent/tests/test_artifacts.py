@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+
+from voice_agent.playwright.artifacts import ArtifactStore
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"a" * 92
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10_000, max_age=3600)
+    first = store.put_bytes(PNG, "image/png")
+    second = asyncio.run(store.put(PNG, "image/png"))
+
+    assert first.id == second.id and first.id.endswith(".png")
+    assert first.path == tmp_path / first.id[:2] / first.id
+    assert first.path.read_bytes() == PNG
+    assert first.url.endswith(f"/artifacts/{first.id}")
+    assert store.stats() == {"artifacts": 1, "bytes": len(PNG), "max_bytes": 10_000}
+
+
+def test_get(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10_000, max_age=3600)
+    artifact = store.put_bytes(b"gif", "image/gif")
+
+    found = store.get(artifact.id)
+    assert (found.path, found.size, found.mime_type) == (artifact.path, 3, "image/gif")
+    assert store.get("../../etc/passwd") is None
+    assert store.get("0" * 64 + ".png") is None
+
+    artifact.path.unlink()
+    assert store.get(artifact.id) is None
+    assert store.stats()["artifacts"] == 0
+
+
+def test_least_recently_used_are_evicted_past_max_bytes(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=250, max_age=3600)
+    a = store.put_bytes(b"a" * 100, "image/png")
+    b = store.put_bytes(b"b" * 100, "image/png")
+    store.get(a.id)
+    c = store.put_bytes(b"c" * 100, "image/png")
+
+    assert store.get(b.id) is None
+    assert store.get(a.id) is not None and store.get(c.id) is not None
+    assert store.stats()["bytes"] == 200
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    artifact = ArtifactStore(str(tmp_path)).put_bytes(PNG, "image/png")
+    (tmp_path / artifact.id[:2] / f".{artifact.id}.1.tmp").write_bytes(b"partial")
+
+    reopened = ArtifactStore(str(tmp_path))
+    assert reopened.stats()["artifacts"] == 1
+    assert reopened.get(artifact.id).size == len(PNG)
+
+
+def test_unused_artifacts_expire(tmp_path):
+    old = ArtifactStore(str(tmp_path)).put_bytes(b"old", "image/png")
+    stale = time.time() - 7200
+    os.utime(old.path, (stale, stale))
+
+    store = ArtifactStore(str(tmp_path), max_age=3600)
+    fresh = store.put_bytes(b"fresh", "image/png")
+    assert not old.path.exists()
+    assert store.get(old.id) is None
+    assert store.get(fresh.id) is not None
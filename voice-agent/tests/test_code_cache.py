@@ -0,0 +1,54 @@
+from voice_agent.playwright import code_cache as code_cache_module
+from voice_agent.playwright.code_cache import CodeCache, normalize_instruction
+
+
+def test_normalize_instruction_drops_filler_and_punctuation():
+    assert normalize_instruction("Please click the Get Started button!") == "click get started button"
+    assert normalize_instruction("click get started button.") == "click get started button"
+    assert normalize_instruction("Can you just CLICK Get Started, now?") == "click get started"
+
+
+def test_normalize_instruction_keeps_values():
+    assert normalize_instruction("type a@b.com into Email") == "type a@b.com into email"
+    assert normalize_instruction("type 'x-1' into Name") == "type 'x-1' into name"
+
+
+def test_get_and_put_count_hits_and_misses():
+    cache = CodeCache(max_entries=10, ttl=60)
+    key = ("click login", "/auth#3:abc")
+    assert cache.get(key) is None
+    cache.put(key, "await _async_page.click('x')")
+    assert cache.get(key) == "await _async_page.click('x')"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "invalidations": 0, "hit_rate": 0.5}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = CodeCache(max_entries=2, ttl=60)
+    cache.put(("a", "/"), "a")
+    cache.put(("b", "/"), "b")
+    assert cache.get(("a", "/")) == "a"
+    cache.put(("c", "/"), "c")
+    assert cache.get(("b", "/")) is None
+    assert cache.get(("a", "/")) == "a"
+    assert cache.get(("c", "/")) == "c"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(code_cache_module.time, "monotonic", lambda: now[0])
+    cache = CodeCache(max_entries=10, ttl=60)
+    cache.put(("a", "/"), "a")
+    now[0] += 59
+    assert cache.get(("a", "/")) == "a"
+    now[0] += 2
+    assert cache.get(("a", "/")) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_removes_entry_once():
+    cache = CodeCache(max_entries=10, ttl=60)
+    cache.put(("a", "/"), "a")
+    cache.invalidate(("a", "/"))
+    cache.invalidate(("a", "/"))
+    assert cache.get(("a", "/")) is None
+    assert cache.stats()["invalidations"] == 1
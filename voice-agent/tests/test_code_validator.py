@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from voice_agent.constants import ALLOWED_DOMAIN
+from voice_agent.playwright.code_validator import (
+    UnsafeCodeError,
+    build_globals,
+    compile_generated_code,
+    run_compiled,
+    validate_generated_code,
+)
+
+
+@pytest.mark.parametrize("code", [
+    "await _async_page.get_by_role('button', name='Get Started').click()",
+    "await _async_page.locator('#email').fill('a@b.com')\nawait _async_page.keyboard.press('Enter')",
+    "rows = await _async_page.locator('tr').count()\nprint(rows)",
+    "await _async_page.get_by_text('Dairy').first.click()\nawait settled()",
+    "for i in range(3):\n    await _async_page.mouse.wheel(0, 200)\n    await asyncio.sleep(0.1)",
+    "try:\n    await _async_page.click('text=Save')\nexcept Exception as e:\n    print(e)",
+    f"await _async_page.goto('https://{ALLOWED_DOMAIN}/dairy-profit-intelligence')",
+    f"await _async_page.goto(url='http://{ALLOWED_DOMAIN}/auth')",
+    "print(await _async_page.content())",
+])
+def test_allows_ordinary_automation_code(code):
+    validate_generated_code(code)
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "javascript:alert(document.cookie)",
+    "data:text/html,<script>1</script>",
+    "/dairy-profit-intelligence",
+    "dairy-profit-intelligence",
+    "https://example.com/",
+    f"https://{ALLOWED_DOMAIN}.evil.com/",
+    f"ftp://{ALLOWED_DOMAIN}/",
+])
+def test_goto_requires_http_url_on_allowed_domain(url):
+    with pytest.raises(UnsafeCodeError, match="navigation outside allowed domain"):
+        validate_generated_code(f"await _async_page.goto({url!r})")
+
+
+@pytest.mark.parametrize("code", [
+    "url = 'file:///etc/passwd'\nawait _async_page.goto(url)",
+    "await _async_page.goto(f'https://{host}/')",
+    "await _async_page.goto()",
+])
+def test_goto_requires_literal_url(code):
+    with pytest.raises(UnsafeCodeError):
+        validate_generated_code(code, allowed_names={"host"})
+
+
+def test_goto_cannot_be_aliased():
+    with pytest.raises(UnsafeCodeError, match="goto must be called directly"):
+        validate_generated_code("go = _async_page.goto\nawait go('file:///etc/passwd')")
+
+
+@pytest.mark.parametrize("code", [
+    "await _async_page.locator('a').page.context.new_page()",
+    "await _async_page.locator('a').evaluate('el => el.ownerDocument.cookie')",
+    "await _async_page.locator('a').evaluate_all('els => els.length')",
+    "handle = await _async_page.query_selector('a')\nframe = await handle.owner_frame()",
+    "handle = await _async_page.query_selector('a')\nawait handle.evaluate('1')",
+    "await _async_page.get_by_role('button').first.page.route('**/*', print)",
+    "await _async_page.locator('input').set_input_files('/etc/passwd')",
+    "await _async_page.frame_locator('iframe').locator('a').page.expose_function('f', print)",
+    "await _async_page.evaluate('1')",
+    "await _async_page.context.browser.close()",
+    "await _async_page.locator('a').wait_for_function('1')",
+])
+def test_denies_escape_attributes_on_any_receiver(code):
+    with pytest.raises(UnsafeCodeError):
+        validate_generated_code(code)
+
+
+@pytest.mark.parametrize("code", [
+    "import os",
+    "open('/etc/passwd').read()",
+    "__import__('os')",
+    "_async_page.__class__",
+    "_async_page._impl_obj",
+    "asyncio.subprocess",
+    "'{0.__class__}'.format(1)",
+    "f = lambda: 1",
+    "_async_page = None",
+    "await _async_page.set_default_timeout(1)",
+    # Aliases of the page and helper modules would skip their allow-lists
+    "a = asyncio\np = await a.create_subprocess_shell('echo PWNED')\nawait p.wait()",
+    "await [asyncio][0].create_subprocess_shell('echo PWNED')",
+    "r = re\nr.sys",
+    "modules = {'b': base64}",
+    "p = _async_page\nawait p.close()",
+    "pages = (_async_page,)",
+    "print(_async_page)",
+    "await asyncio.gather(_async_page)",
+    "await (_async_page if True else None).close()",
+])
+def test_rejects_unsafe_constructs(code):
+    with pytest.raises(UnsafeCodeError):
+        validate_generated_code(code)
+
+
+def test_compiled_code_is_memoized_and_runs():
+    code = "values.append(len('abc'))"
+    compiled = compile_generated_code(code, allowed_names={"values"})
+    assert compile_generated_code(code, allowed_names={"values"}) is compiled
+    values = []
+    asyncio.run(run_compiled(compiled, build_globals(page=None, extra={"values": values})))
+    assert values == [3]
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from voice_agent.playwright import intent_router
+from voice_agent.playwright.intent_router import parse_command, route_instruction
+from voice_agent.playwright.selector_store import SelectorStore
+
+
+@pytest.mark.parametrize("instruction, action, fields", [
+    ("scroll down a bit", "scroll", {"direction": "down"}),
+    ("Please go back.", "back", {}),
+    ("press the enter key", "key", {"key": "enter"}),
+    ("click the Login button", "click", {"target": "Login", "role": "button"}),
+    ("open a Reports tab", "click", {"target": "Reports", "role": "tab"}),
+    ("tap on my Profile", "click", {"target": "Profile", "role": None}),
+    ("select 'Dairy Profit'", "click", {"target": "Dairy Profit", "role": None}),
+    ("check the remember me checkbox", "check", {"target": "remember me", "checked": True}),
+    ("untick the newsletter box", "check", {"target": "newsletter", "checked": False}),
+    ("type admin@example.com into the Email field", "fill", {"value": "admin@example.com", "field": "Email", "inputs_only": False}),
+    ("fill in the search box with milk", "fill", {"value": "milk", "field": "search", "inputs_only": False}),
+    ("set the quantity to 3", "fill", {"value": "3", "field": "quantity", "inputs_only": True}),
+])
+def test_parse_command_routes_simple_commands(instruction, action, fields):
+    command = parse_command(instruction)
+    assert command is not None and command.action == action
+    assert command.fields == fields
+
+
+@pytest.mark.parametrize("instruction", [
+    "check the status of my order",
+    "open a new tab",
+    "open a new window",
+    "go to the dashboard",
+    "type my password into Password",
+    "click the button that says save and then submit",
+    "log in as the admin user",
+    "what is on this page",
+])
+def test_parse_command_leaves_everything_else_to_the_llm(instruction):
+    assert parse_command(instruction) is None
+
+
+class _FakeLocator:
+    def __init__(self, page, count):
+        self.page = page
+        self._count = count
+
+    def or_(self, other):
+        return _FakeLocator(self.page, self._count + other._count)
+
+    async def count(self):
+        self.page.counts += 1
+        return self._count
+
+    async def is_visible(self):
+        return True
+
+
+class _FakePage:
+    url = "https://example.com/orders"
+
+    def __init__(self, matches=None):
+        # (method, first arg, name) -> number of elements
+        self.matches = matches or {}
+        self.counts = 0
+
+    def _locator(self, method, *args, **kwargs):
+        return _FakeLocator(self, self.matches.get((method, args[0], kwargs.get("name")), 0))
+
+    def get_by_role(self, *args, **kwargs):
+        return self._locator("get_by_role", *args, **kwargs)
+
+    def get_by_label(self, *args, **kwargs):
+        return self._locator("get_by_label", *args, **kwargs)
+
+    def get_by_placeholder(self, *args, **kwargs):
+        return self._locator("get_by_placeholder", *args, **kwargs)
+
+    def get_by_text(self, *args, **kwargs):
+        return self._locator("get_by_text", *args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def empty_selector_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(intent_router, "selector_store", SelectorStore(str(tmp_path / "selectors.json")))
+
+
+def test_missing_target_costs_one_round_trip():
+    page = _FakePage()
+    assert asyncio.run(route_instruction(page, "click Export")) is None
+    assert page.counts == 1
+
+
+def test_click_resolves_the_first_unique_candidate():
+    page = _FakePage({("get_by_role", "link", "Export"): 1})
+    code = asyncio.run(route_instruction(page, "click Export"))
+    assert code == "await _async_page.get_by_role('link', name='Export', exact=True).click()"
+
+
+def test_ambiguous_target_is_left_to_the_llm():
+    page = _FakePage({("get_by_role", "button", "Save"): 2})
+    assert asyncio.run(route_instruction(page, "click Save")) is None
+
+
+def test_set_only_fills_inputs():
+    page = _FakePage({("get_by_label", "date", None): 1, ("get_by_text", "date", None): 1})
+    assert asyncio.run(route_instruction(page, "set the date to tomorrow")) is None
+
+    page = _FakePage({("get_by_role", "spinbutton", "quantity"): 1})
+    code = asyncio.run(route_instruction(page, "set the quantity to 3"))
+    assert code == "await _async_page.get_by_role('spinbutton', name='quantity', exact=True).fill('3')"
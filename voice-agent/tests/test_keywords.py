@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from voice_agent.playwright.keywords import extract_search_terms, rank_terms_on_page
+
+
+@pytest.mark.parametrize("instruction, terms", [
+    ("Click Get Started", ["Get Started"]),
+    ('click the "Save changes" button', ["Save changes"]),
+    ("click on get started", ["get started"]),
+    ("type hello into the email field", ["hello", "email"]),
+    ("open dairy profit intelligence", ["dairy profit intelligence"]),
+    ("select Monthly under Reports tab", ["Monthly", "Reports"]),
+    ("login", ["login"]),
+])
+def test_extract_search_terms(instruction, terms):
+    assert extract_search_terms(instruction) == terms
+
+
+def test_movement_commands_have_no_terms():
+    assert extract_search_terms("scroll down") == []
+    assert extract_search_terms("wait") == []
+
+
+def test_terms_are_deduplicated_case_insensitively():
+    assert extract_search_terms("Click Reports, then click reports") == ["Reports"]
+
+
+class _CountingPage:
+    def __init__(self, counts):
+        self.counts = counts
+
+    async def evaluate(self, script, terms):
+        return [self.counts.get(term, 0) for term in terms]
+
+
+def test_rank_puts_rare_present_terms_first():
+    page = _CountingPage({"Reports": 4, "Monthly": 1})
+    ranked = asyncio.run(rank_terms_on_page(page, ["Missing", "Reports", "Monthly"], limit=2))
+    assert ranked == ["Monthly", "Reports"]
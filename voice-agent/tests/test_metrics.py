@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from voice_agent import metrics
+from voice_agent.metrics import Counter, Gauge, Histogram, InstructionTimer, Registry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    return registry
+
+
+def test_counter_renders_labelled_values(registry):
+    counter = Counter("test_requests_total", "Requests", ("result",))
+    counter.inc(result="hit")
+    counter.inc(2, result="miss")
+    counter.inc(result="hit")
+    assert counter.value(result="hit") == 2
+    assert registry.render() == (
+        "# HELP test_requests_total Requests\n"
+        "# TYPE test_requests_total counter\n"
+        'test_requests_total{result="hit"} 2\n'
+        'test_requests_total{result="miss"} 2\n'
+    )
+
+
+def test_gauge_overwrites_and_escapes_labels(registry):
+    gauge = Gauge("test_connections", "Connections", ("worker",))
+    gauge.set(3, worker='a"b')
+    gauge.set(1.5, worker='a"b')
+    assert registry.render().splitlines()[-1] == 'test_connections{worker="a\\"b"} 1.5'
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("test_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="llm")
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'test_seconds_bucket{stage="llm",le="0.1"} 1',
+        'test_seconds_bucket{stage="llm",le="1"} 2',
+        'test_seconds_bucket{stage="llm",le="+Inf"} 3',
+        'test_seconds_sum{stage="llm"} 5.55',
+        'test_seconds_count{stage="llm"} 3',
+    ]
+
+
+def test_duplicate_names_are_rejected(registry):
+    Counter("test_once_total", "Once")
+    with pytest.raises(ValueError):
+        Counter("test_once_total", "Twice")
+
+
+def test_timer_accumulates_stages_within_total():
+    timer = InstructionTimer()
+    with timer.span("validation"):
+        time.sleep(0.01)
+    with timer.span("validation"):
+        pass
+    timer.record("llm_ttft", 0.002)
+    timings = timer.finish("success")
+    assert set(timings) == {"validation", "llm_ttft", "total"}
+    assert timings["validation"] >= 10
+    assert timings["llm_ttft"] == 2.0
+    assert timings["validation"] <= timings["total"]
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from voice_agent.playwright import automation_class
+from voice_agent.playwright.automation_class import PersistentPlaywright
+from voice_agent.playwright.planner import looks_compound, parse_plan, split_compound
+
+
+@pytest.mark.parametrize("instruction, steps", [
+    ("log in and open the reports page", ["log in", "open the reports page"]),
+    ("click Save, then go back", ["click Save", "go back"]),
+    ("search for milk; scroll down and then take a screenshot", ["search for milk", "scroll down", "take a screenshot"]),
+    ("open settings after that sign out.", ["open settings", "sign out"]),
+    ("select milk and cheese", ["select milk and cheese"]),
+    ("click Terms and Conditions", ["click Terms and Conditions"]),
+])
+def test_split_compound(instruction, steps):
+    assert split_compound(instruction) == steps
+
+
+def test_looks_compound():
+    assert looks_compound("log in then click Reports")
+    assert not looks_compound("select milk and cheese")
+    assert not looks_compound("")
+
+
+@pytest.mark.parametrize("text, steps", [
+    ('["log in", "open reports"]', ["log in", "open reports"]),
+    ('```json\n["log in", " ", "open reports "]\n```', ["log in", "open reports"]),
+    ("[]", None),
+    ('["log in", 2]', None),
+    ('{"steps": ["log in"]}', None),
+    ("log in, then open reports", None),
+])
+def test_parse_plan(text, steps):
+    assert parse_plan(text) == steps
+
+
+class _FakeSession:
+    closed = False
+
+    class page:
+        url = "https://example.com/"
+
+        @staticmethod
+        async def evaluate(script):
+            raise RuntimeError("no page")
+
+
+def test_plan_steps_retry_once_without_the_instructions_own_retries(monkeypatch):
+    calls = []
+
+    async def execute(session, step, progress=None, max_retries=2):
+        calls.append((step, max_retries))
+        status = "error" if step == "open reports" else "success"
+        return {"status": status, "message": status, "timings": {}}
+
+    async def plan(instruction, url, timer=None):
+        return ["log in", "open reports", "sign out"]
+
+    async def settled(page):
+        pass
+
+    monkeypatch.setattr(automation_class, "PLANNER_ENABLED", True)
+    monkeypatch.setattr(automation_class, "PLAN_STEP_RETRIES", 1)
+    monkeypatch.setattr(automation_class, "plan_instruction", plan)
+    monkeypatch.setattr(automation_class, "wait_for_settled", settled)
+    monkeypatch.setattr(PersistentPlaywright, "execute_instruction_async", staticmethod(execute))
+
+    result = asyncio.run(PersistentPlaywright.execute_plan_async(_FakeSession(), "log in then open reports then sign out"))
+
+    assert calls == [("log in", 0), ("open reports", 0), ("open reports", 0)]
+    assert result["status"] == "error"
+    assert [step["attempts"] for step in result["steps"]] == [1, 2]
+
+
+def test_no_retry_code_is_generated_without_retries(monkeypatch):
+    stages = []
+
+    async def completion(messages, progress=None, timer=None, stage="llm"):
+        stages.append(stage)
+        return "raise RuntimeError('step failed')"
+
+    async def returns(value):
+        return value
+
+    async def fails(*args, **kwargs):
+        raise RuntimeError("no screenshots")
+
+    class _State:
+        url = _FakeSession.page.url
+
+        async def title(self):
+            return "Page"
+
+    # Everything the retry prompt needs, so only the max_retries gate can stop a regeneration
+    monkeypatch.setattr(automation_class, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(automation_class, "stream_completion", completion)
+    monkeypatch.setattr(automation_class, "capture_screenshot", fails)
+    monkeypatch.setattr(automation_class, "capture_within_budget", fails)
+    monkeypatch.setattr(automation_class, "extract_ranked_terms", lambda page, instruction: returns([]))
+    monkeypatch.setattr(PersistentPlaywright, "build_system_prompt_async", staticmethod(lambda *args: returns("prompt")))
+    monkeypatch.setattr(PersistentPlaywright, "get_page_state_async", staticmethod(lambda session: returns(_State())))
+    monkeypatch.setattr(PersistentPlaywright, "get_page_overview_async", staticmethod(lambda *args: returns("overview")))
+    monkeypatch.setattr(PersistentPlaywright, "get_element_context_async", staticmethod(lambda *args: returns({})))
+    monkeypatch.setattr(PersistentPlaywright, "get_learned_selectors_async", staticmethod(lambda *args: returns("")))
+
+    result = asyncio.run(PersistentPlaywright.execute_instruction_async(_FakeSession(), "click Save", max_retries=0))
+    assert stages == ["llm"]
+    assert result["status"] == "error"
+    assert result["executed_code"] == "raise RuntimeError('step failed')"
+    assert len(result["prompt_sizes"]) == 1
+
+    stages.clear()
+    result = asyncio.run(PersistentPlaywright.execute_instruction_async(_FakeSession(), "click Save", max_retries=1))
+    assert stages == ["llm", "retry.llm"]
+    assert len(result["prompt_sizes"]) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from voice_agent.protocol import (
+    JSON_SUBPROTOCOL,
+    Channel,
+    negotiate,
+    pack_binary,
+    parse_client_message,
+    unpack_binary,
+)
+
+
+class _FakeWebSocket:
+    def __init__(self, subprotocols=(), query=None):
+        self.scope = {"subprotocols": list(subprotocols)}
+        self.query_params = query or {}
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+def test_negotiate_prefers_subprotocol():
+    assert negotiate(_FakeWebSocket([JSON_SUBPROTOCOL])) == (True, JSON_SUBPROTOCOL)
+    assert negotiate(_FakeWebSocket(query={"protocol": "json"})) == (True, None)
+    assert negotiate(_FakeWebSocket(["other"])) == (False, None)
+
+
+def test_parse_client_message():
+    assert parse_client_message('{"text": "click Login", "id": 7}') == ("click Login", 7)
+    assert parse_client_message("click Login") == ("click Login", None)
+    assert parse_client_message("{not json") == ("{not json", None)
+    assert parse_client_message('{"id": 7}') == ('{"id": 7}', None)
+
+
+def test_binary_frames_round_trip():
+    header = {"type": "screenshot", "id": 3, "mime_type": "image/png"}
+    payload = b"\x89PNG\r\n\x1a\n\x00\x01"
+    frame = pack_binary(header, payload)
+    assert int.from_bytes(frame[:4], "big") == len(json.dumps(header, separators=(",", ":")))
+    assert unpack_binary(frame) == (header, payload)
+
+
+def test_text_channel_sends_lines_and_skips_images():
+    websocket = _FakeWebSocket()
+    channel = Channel(websocket, structured=False)
+
+    async def run():
+        await channel.log("Connected")
+        await channel.event("Stopped", "stopped", stopped=True)
+        await channel.image({"id": 1}, b"data")
+
+    asyncio.run(run())
+    assert websocket.sent == ["Connected", "Stopped"]
+
+
+def test_structured_channel_sends_envelopes_and_frames():
+    websocket = _FakeWebSocket()
+    channel = Channel(websocket, structured=True)
+
+    async def run():
+        await channel.log("dropped in structured mode")
+        await channel.progress("Generating")
+        await channel.image({"id": 1, "mime_type": "image/jpeg"}, b"data")
+
+    asyncio.run(run())
+    assert [json.loads(m) for m in websocket.sent[:1]] == [{"type": "progress", "message": "Generating"}]
+    assert unpack_binary(websocket.sent[1]) == ({"type": "screenshot", "id": 1, "mime_type": "image/jpeg"}, b"data")
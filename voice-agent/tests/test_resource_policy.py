@@ -0,0 +1,101 @@
+import os
+import threading
+
+import pytest
+
+from voice_agent.playwright.resource_policy import (
+    ABORT,
+    CACHE,
+    CONTINUE,
+    STUB,
+    ResourceCache,
+    ResourcePolicy,
+    resolve_policy_name,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResourceCache(str(tmp_path), max_bytes=1000, ttl=60)
+
+
+@pytest.fixture
+def policy(cache):
+    return ResourcePolicy("lean", block_types={"font", "media"}, allow_domains=("example.com",),
+                          deny_domains=("google-analytics.com",), cache=cache)
+
+
+@pytest.mark.parametrize("url, resource_type, method, action", [
+    ("data:image/png;base64,AAAA", "image", "GET", CONTINUE),
+    ("https://www.google-analytics.com/analytics.js", "script", "GET", STUB),
+    ("https://www.google-analytics.com/collect", "beacon", "POST", ABORT),
+    ("https://example.com/font.woff2", "font", "GET", ABORT),
+    ("https://app.example.com/main.js", "script", "GET", CACHE),
+    ("https://app.example.com/main.js", "script", "POST", CONTINUE),
+    ("https://app.example.com/api/farms", "fetch", "GET", CONTINUE),
+    ("https://cdn.other.com/lib.js", "script", "GET", CONTINUE),
+])
+def test_decide(policy, url, resource_type, method, action):
+    assert policy.decide(url, resource_type, method) == action
+
+
+def test_strict_blocks_third_party_hosts():
+    policy = ResourcePolicy("strict", allow_domains=("example.com",), third_party=False)
+    assert policy.decide("https://cdn.other.com/lib.js", "script", "GET") == STUB
+    assert policy.decide("https://cdn.other.com/video.mp4", "media", "GET") == ABORT
+    assert policy.decide("https://example.com/", "document", "GET") == CONTINUE
+
+
+def test_resolve_policy_name():
+    assert resolve_policy_name("auto", headless=True) == "lean"
+    assert resolve_policy_name("auto", headless=False) == "off"
+    assert resolve_policy_name("Strict") == "strict"
+    with pytest.raises(ValueError):
+        resolve_policy_name("everything")
+
+
+def test_cache_round_trip(cache):
+    assert ResourceCache.storable(200, {"cache-control": "max-age=60"})
+    assert not ResourceCache.storable(200, {"cache-control": "private"})
+    assert not ResourceCache.storable(304, {})
+
+    assert cache.get("https://example.com/a.js") is None
+    cache.put("https://example.com/a.js", 200, {"content-type": "application/javascript"}, b"x" * 10)
+    meta, body = cache.get("https://example.com/a.js")
+    assert body == b"x" * 10 and meta["content_type"] == "application/javascript"
+    assert cache.stats() == {"bytes": 10, "hits": 1, "misses": 1}
+
+
+def test_cache_skips_large_bodies_and_evicts_oldest(cache):
+    cache.put("https://example.com/huge.js", 200, {}, b"x" * 101)
+    assert cache.get("https://example.com/huge.js") is None
+
+    for i in range(10):
+        cache.put(f"https://example.com/{i}.js", 200, {}, b"x" * 100)
+    # Explicit mtimes so eviction order does not depend on timestamp resolution
+    for i in range(10):
+        _, body_path = cache._paths(f"https://example.com/{i}.js")
+        os.utime(body_path, (1000 + i, 1000 + i))
+
+    cache.put("https://example.com/new.js", 200, {}, b"x" * 100)
+    assert cache.stats()["bytes"] == 800
+    assert cache.get("https://example.com/0.js") is None
+    assert cache.get("https://example.com/2.js") is None
+    assert cache.get("https://example.com/3.js") is not None
+    assert cache.get("https://example.com/new.js") is not None
+
+
+def test_cache_size_is_consistent_across_threads(cache):
+    cache.max_bytes = 10 ** 6
+
+    def put_many(worker):
+        for i in range(50):
+            cache.put(f"https://example.com/{worker}/{i}.js", 200, {}, b"x" * 7)
+
+    threads = [threading.Thread(target=put_many, args=(worker,)) for worker in range(8)]
+    cache.put("https://example.com/first.js", 200, {}, b"x" * 7)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["bytes"] == 7 * 401
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from voice_agent.scheduler import BARGE_IN, LATEST, QUEUE, InstructionScheduler, Job, is_stop_phrase
+
+
+class _Recorder:
+    """Scheduler callbacks that log what happened; each job runs until released."""
+
+    def __init__(self):
+        self.events = []
+        self.release = {}
+
+    async def handler(self, job):
+        self.events.append(("start", job.text))
+        self.release[job.text] = asyncio.Event()
+        await self.release[job.text].wait()
+        self.events.append(("done", job.text))
+
+    async def on_cancelled(self, job):
+        self.events.append(("cancelled", job.text))
+
+    async def on_dropped(self, job):
+        self.events.append(("dropped", job.text))
+
+    def scheduler(self, policy, max_queue=5):
+        return InstructionScheduler(self.handler, self.on_cancelled, self.on_dropped, policy=policy, max_queue=max_queue)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _finish(recorder, text):
+    recorder.release[text].set()
+    await _settle()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("stop", True), ("Cancel.", True), (" never mind! ", True), ("hold on", True),
+    ("stop the video", False), ("click Stop", False),
+])
+def test_is_stop_phrase(text, expected):
+    assert is_stop_phrase(text) is expected
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        InstructionScheduler(lambda job: None, policy="lifo")
+
+
+def test_barge_in_cancels_the_running_instruction():
+    async def run():
+        recorder = _Recorder()
+        scheduler = recorder.scheduler(BARGE_IN)
+        scheduler.start()
+        await scheduler.submit(Job("first"))
+        await _settle()
+        await scheduler.submit(Job("second"))
+        await _settle()
+        await _finish(recorder, "second")
+        await scheduler.close()
+        return recorder.events
+
+    assert asyncio.run(run()) == [("start", "first"), ("cancelled", "first"), ("start", "second"), ("done", "second")]
+
+
+def test_latest_keeps_only_the_newest_queued_instruction():
+    async def run():
+        recorder = _Recorder()
+        scheduler = recorder.scheduler(LATEST)
+        scheduler.start()
+        await scheduler.submit(Job("first"))
+        await _settle()
+        await scheduler.submit(Job("second"))
+        await scheduler.submit(Job("third"))
+        assert scheduler.busy and scheduler.pending == 1
+        await _finish(recorder, "first")
+        await _finish(recorder, "third")
+        await scheduler.close()
+        return recorder.events
+
+    assert asyncio.run(run()) == [
+        ("start", "first"), ("dropped", "second"), ("done", "first"), ("start", "third"), ("done", "third"),
+    ]
+
+
+def test_queue_runs_in_order_and_drops_the_oldest_past_the_limit():
+    async def run():
+        recorder = _Recorder()
+        scheduler = recorder.scheduler(QUEUE, max_queue=2)
+        scheduler.start()
+        await scheduler.submit(Job("a"))
+        await _settle()
+        for text in ("b", "c", "d"):
+            await scheduler.submit(Job(text))
+        for text in ("a", "c", "d"):
+            await _finish(recorder, text)
+        await scheduler.close()
+        return recorder.events
+
+    assert asyncio.run(run()) == [
+        ("start", "a"), ("dropped", "b"), ("done", "a"), ("start", "c"), ("done", "c"), ("start", "d"), ("done", "d"),
+    ]
+
+
+def test_stop_cancels_running_and_queued_work():
+    async def run():
+        recorder = _Recorder()
+        scheduler = recorder.scheduler(QUEUE)
+        scheduler.start()
+        assert await scheduler.stop() is False
+        await scheduler.submit(Job("a"))
+        await _settle()
+        await scheduler.submit(Job("b"))
+        assert await scheduler.stop() is True
+        await _settle()
+        assert not scheduler.busy and scheduler.pending == 0
+        await scheduler.close()
+        return recorder.events
+
+    assert asyncio.run(run()) == [("start", "a"), ("dropped", "b"), ("cancelled", "a")]
+
+
+def test_a_failing_instruction_does_not_stop_the_scheduler():
+    async def run():
+        ran = []
+
+        async def handler(job):
+            ran.append(job.text)
+            if job.text == "boom":
+                raise RuntimeError("boom")
+
+        scheduler = InstructionScheduler(handler, policy=QUEUE)
+        scheduler.start()
+        await scheduler.submit(Job("boom"))
+        await scheduler.submit(Job("after"))
+        await _settle()
+        await scheduler.close()
+        return ran
+
+    assert asyncio.run(run()) == ["boom", "after"]
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from voice_agent.playwright.selector_store import SelectorStore, confidence, extract_selectors, url_pattern
+
+CODE = """
+await _async_page.get_by_role('button', name='Log In').first.click()
+await _async_page.get_by_label('Email').fill('a@example.com')
+await _async_page.locator("button:has-text('Export')").nth(1).click()
+await _async_page.get_by_text(name).click()
+"""
+
+
+def test_url_pattern_replaces_record_ids():
+    assert url_pattern("https://example.com/farms/12/herd?x=1") == "example.com/farms/*/herd"
+    assert url_pattern("https://example.com/") == "example.com/"
+
+
+def test_extract_selectors_keeps_literal_locators_with_refinements_and_action():
+    selectors = {s["target"]: s for s in extract_selectors(CODE)}
+    assert {target: (s["action"], s["chain"]) for target, s in selectors.items()} == {
+        "log in": ("click", [["first"]]),
+        "email": ("fill", []),
+        "export": ("click", [["nth", 1]]),
+    }
+    assert selectors["log in"]["expression"] == "_async_page.get_by_role('button', name='Log In').first"
+    assert extract_selectors("await (") == []
+
+
+def test_learn_and_find(tmp_path):
+    store = SelectorStore(str(tmp_path / "selectors.json"))
+    store.learn("https://example.com/farms/1", CODE)
+    store.learn("https://example.com/farms/2", "await _async_page.get_by_label('Email').fill('b@example.com')")
+
+    email = store.find("https://example.com/farms/3", target="Email")
+    assert len(email) == 1 and email[0]["successes"] == 2
+    assert store.find("https://example.com/farms/3", target="email", action="click") == []
+    assert [e["target"] for e in store.find("https://example.com/farms/3", terms=["Log out"])] == ["log in"]
+    assert confidence(email[0]) == 0.75
+
+    # Outside an event loop changes are written straight away
+    saved = json.loads((tmp_path / "selectors.json").read_text())
+    assert sorted(e["target"] for e in saved["example.com/farms/*"]) == ["email", "export", "log in"]
+
+
+def test_invalidate(tmp_path):
+    store = SelectorStore(str(tmp_path / "selectors.json"))
+    store.learn("https://example.com/", CODE)
+    store.invalidate("https://example.com/", "_async_page.get_by_label('Email')")
+    assert sorted(e["target"] for e in store.find("https://example.com/")) == ["export", "log in"]
+
+
+def test_writes_on_the_event_loop_are_batched(tmp_path, monkeypatch):
+    store = SelectorStore(str(tmp_path / "selectors.json"), save_delay=0.01)
+    writes = []
+    write = store._write
+    monkeypatch.setattr(store, "_write", lambda data: (writes.append(data), write(data)))
+
+    async def run():
+        store.learn("https://example.com/", CODE)
+        store.invalidate("https://example.com/", "_async_page.get_by_label('Email')")
+        assert writes == []
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert len(writes) == 1
+    reloaded = SelectorStore(str(tmp_path / "selectors.json"))
+    assert sorted(e["target"] for e in reloaded.find("https://example.com/")) == ["export", "log in"]
+
+
+def test_flush_writes_pending_changes(tmp_path):
+    store = SelectorStore(str(tmp_path / "selectors.json"), save_delay=60)
+
+    async def run():
+        store.learn("https://example.com/", CODE)
+
+    asyncio.run(run())
+    assert not (tmp_path / "selectors.json").exists()
+    store.flush()
+    assert (tmp_path / "selectors.json").exists()
+
+
+NAVIGATING_CODE = """
+await _async_page.get_by_label('Search').fill('milk')
+await _async_page.get_by_role('link', name='Results').click()
+await _async_page.get_by_role('button', name='Export').click()
+await _async_page.goto('https://example.com/settings')
+await _async_page.get_by_label('Theme').fill('dark')
+"""
+
+
+def test_extract_selectors_can_stop_at_the_first_navigation():
+    assert [s["target"] for s in extract_selectors(NAVIGATING_CODE)] == ["search", "results", "export", "theme"]
+    assert [s["target"] for s in extract_selectors(NAVIGATING_CODE, before_navigation=True)] == ["search", "results", "export"]
+
+
+def test_locators_used_after_a_navigation_are_not_learned_for_the_start_page(tmp_path):
+    store = SelectorStore(str(tmp_path / "selectors.json"))
+    store.learn("https://example.com/search", NAVIGATING_CODE, "https://example.com/search")
+    assert sorted(e["target"] for e in store.find("https://example.com/search")) == ["export", "results", "search"]
+
+    # Ended on another page: the first click may have been what left the start page
+    store = SelectorStore(str(tmp_path / "other.json"))
+    store.learn("https://example.com/search", NAVIGATING_CODE, "https://example.com/results/12")
+    assert sorted(e["target"] for e in store.find("https://example.com/search")) == ["results", "search"]
+    assert store.find("https://example.com/results/3") == []
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from voice_agent.routes import interaction
+from voice_agent.workers import WorkerPool
+
+
+class _RunningProcess:
+    returncode = None
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(size=4, base_port=9000, sticky_slack=2)
+    for worker in pool.workers:
+        worker.process = _RunningProcess()
+        worker.ready = True
+    return pool
+
+
+def test_without_a_key_the_least_loaded_worker_is_chosen(pool):
+    for worker, connections in zip(pool.workers, (3, 1, 0, 2)):
+        worker.connections = connections
+    assert pool.choose().index == 2
+    assert pool.choose("").index == 2
+
+
+def test_a_key_sticks_to_its_home_worker(pool):
+    home = pool.choose("client-a")
+    assert all(pool.choose("client-a") is home for _ in range(5))
+    assert len({pool.choose(f"client-{i}").index for i in range(40)}) > 1
+
+
+def test_a_busy_home_worker_spills_over(pool):
+    home = pool.choose("client-a")
+    home.connections = 2
+    assert pool.choose("client-a") is home
+    home.connections = 3
+    assert pool.choose("client-a") is not home
+
+
+def test_losing_a_worker_only_moves_its_keys(pool):
+    homes = {f"client-{i}": pool.choose(f"client-{i}").index for i in range(40)}
+    pool.workers[1].ready = False
+    for key, index in homes.items():
+        if index != 1:
+            assert pool.choose(key).index == index
+        else:
+            assert pool.choose(key).index != 1
+
+
+def test_no_ready_workers(pool):
+    for worker in pool.workers:
+        worker.ready = False
+    with pytest.raises(RuntimeError):
+        pool.choose("client-a")
+
+
+def test_front_end_places_connections_by_the_client_query_parameter(monkeypatch):
+    placed = []
+
+    async def proxy(websocket, key=None, structured=False):
+        placed.append(key)
+
+    monkeypatch.setattr(interaction.worker_pool, "size", 2)
+    monkeypatch.setattr(interaction.worker_pool, "proxy", proxy)
+    app = FastAPI()
+    app.include_router(interaction.router)
+    with TestClient(app) as client:
+        with client.websocket_connect("/playwright/ws?client=tab-7"):
+            pass
+        with client.websocket_connect("/playwright/ws"):
+            pass
+    assert placed == ["tab-7", None]